@@ -25,12 +25,12 @@ from ovos_bus_client import MessageBusClient
 from ovos_bus_client.util.scheduler import EventScheduler
 from ovos_workshop.skills.api import SkillApi
 from ovos_core.intent_services import IntentService
+from ovos_core.intent_services.fallback_service import FallbackV1Host
 from ovos_core.skill_manager import SkillManager, on_error, on_stopping, on_ready, on_alive, on_started
 from ovos_utils import wait_for_exit_signal
 from ovos_utils.log import LOG, init_service_logger
 from ovos_utils.process_utils import reset_sigint_handler
 from ovos_core.skill_installer import SkillsStore
-from ovos_workshop.skills.fallback import FallbackSkill
 
 
 def main(alive_hook=on_alive, started_hook=on_started, ready_hook=on_ready,
@@ -49,7 +49,7 @@ def main(alive_hook=on_alive, started_hook=on_started, ready_hook=on_ready,
     bus = MessageBusClient()
     bus.run_in_thread()
     bus.connected_event.wait()
-    _register_intent_services(bus)
+    intent_service = _register_intent_services(bus)
     event_scheduler = EventScheduler(bus, autostart=False)
     event_scheduler.daemon = True
     event_scheduler.start()
@@ -63,12 +63,14 @@ def main(alive_hook=on_alive, started_hook=on_started, ready_hook=on_ready,
                                  stopping_hook=stopping_hook,
                                  ready_hook=ready_hook,
                                  error_hook=error_hook)
+    # Register handler to trigger the v1 fallback system
+    fallback_v1 = FallbackV1Host(bus, skill_manager.loaded_skill_ids)
 
     skill_manager.start()
 
     wait_for_exit_signal()
 
-    shutdown(skill_manager, event_scheduler, osm)
+    shutdown(skill_manager, event_scheduler, osm, intent_service, fallback_v1)
 
 
 def _register_intent_services(bus):
@@ -78,15 +80,11 @@ def _register_intent_services(bus):
         bus: messagebus client to register the services on
     """
     service = IntentService(bus)
-    # Register handler to trigger fallback system
-    bus.on(
-        'mycroft.skills.fallback',
-        FallbackSkill.make_intent_failure_handler(bus)
-    )
     return service
 
 
-def shutdown(skill_manager, event_scheduler, osm):
+def shutdown(skill_manager, event_scheduler, osm, intent_service=None,
+             fallback_v1=None):
     LOG.info('Shutting down Skills service')
     if event_scheduler is not None:
         event_scheduler.shutdown()
@@ -96,6 +94,10 @@ def shutdown(skill_manager, event_scheduler, osm):
         skill_manager.join()
     if osm is not None:
         osm.shutdown()
+    if intent_service is not None:
+        intent_service.shutdown()
+    if fallback_v1 is not None:
+        fallback_v1.shutdown()
     LOG.info('Skills service shutdown complete!')
 
 
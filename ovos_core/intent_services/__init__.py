@@ -12,24 +12,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import json
+import re
 from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from threading import Lock, Thread, Timer
 
 from ovos_config.config import Configuration
 from ovos_config.locale import setup_locale, get_valid_languages, get_full_lang_code
+from ovos_config.meta import get_xdg_base
 
 from ovos_bus_client.message import Message
 from ovos_bus_client.session import SessionManager
+from ovos_core.intent_services.active_skills import ActiveSkillsCache
 from ovos_core.intent_services.adapt_service import AdaptService
+from ovos_core.intent_services.analysis import UtteranceAnalysis
+from ovos_core.intent_services.capabilities import SkillCapabilities
 from ovos_core.intent_services.commonqa_service import CommonQAService
+from ovos_core.intent_services.concurrency import SessionShardedExecutor
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot
 from ovos_core.intent_services.converse_service import ConverseService
 from ovos_core.intent_services.stop_service import StopService
 from ovos_core.intent_services.fallback_service import FallbackService
+from ovos_core.intent_services.match_cache import MatchCache
 from ovos_core.intent_services.padacioso_service import PadaciosoService
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
+from ovos_core.intent_services.snapshot import IntentSnapshot
+from ovos_core.intent_services.stats import PipelineStats
 from ovos_core.transformers import MetadataTransformersService, UtteranceTransformersService
 from ovos_workshop.intents import open_intent_envelope
 from ovos_utils.log import LOG, deprecated, log_deprecation
 from ovos_bus_client.util import get_message_lang
 from ovos_utils.metrics import Stopwatch
+from ovos_utils.xdg_utils import xdg_data_home
 
 try:
     from ovos_core.intent_services.padatious_service import PadatiousService, PadatiousMatcher
@@ -47,6 +63,55 @@ IntentMatch = namedtuple('IntentMatch',
                          )
 
 
+def is_dry_run(message) -> bool:
+    """matchers only compute a match, without emitting anything or changing
+    any state, if message.context["dry_run"] is set"""
+    return bool(message and message.context.get("dry_run"))
+
+
+class PipelinePlan:
+    """Precompiled, ordered list of bound matcher callables.
+
+    A plan is built once per distinct session pipeline and skip list and
+    reused for every utterance until the IntentService invalidates it.
+
+    Args:
+        pipeline (list): ordered pipeline component names
+        matchers (dict): component name -> matcher callable
+        speculative (dict): optional component name -> (engine, consumer) for
+                            side effect free components that may be
+                            evaluated ahead of time, see IntentService
+    """
+
+    def __init__(self, pipeline, matchers, speculative=None):
+        self.pipeline = tuple(pipeline)
+        self.stages = []
+        for name in self.pipeline:
+            if name not in matchers:
+                LOG.error(f"unknown pipeline component '{name}', skipping it")
+                continue
+            self.stages.append((name, matchers[name]))
+        speculative = speculative or {}
+        self.speculative = {name: speculative[name] for name, _ in self.stages
+                            if name in speculative}
+        # engines to start when an utterance arrives, in pipeline order
+        self.engines = []
+        for engine, _ in self.speculative.values():
+            if engine not in self.engines:
+                self.engines.append(engine)
+
+    @property
+    def matchers(self):
+        """ordered list of matcher callables"""
+        return [match_func for _, match_func in self.stages]
+
+    def __iter__(self):
+        return iter(self.stages)
+
+    def __len__(self):
+        return len(self.stages)
+
+
 class IntentService:
     """Mycroft intent service. parses utterances using a variety of systems.
 
@@ -65,29 +130,84 @@ class IntentService:
         self.adapt_service = AdaptService()
         if PadaciosoService is not PadatiousService:
             self.padatious_service = PadatiousService(bus, config['padatious'])
+            # padatious retrains train_delay seconds after a registration,
+            # matches cached in between are stale once it is done
+            self.padatious_service.on_trained(self.handle_registry_changed)
         else:
             LOG.error(f'Failed to create padatious handlers, padatious not installed')
             self.padatious_service = None
         self.padacioso_service = PadaciosoService(bus, config['padatious'])
-        self.fallback = FallbackService(bus)
-        self.converse = ConverseService(bus)
-        self.common_qa = CommonQAService(bus)
-        self.stop = StopService(bus)
-        self.utterance_plugins = UtteranceTransformersService(bus, config=config)
-        self.metadata_plugins = MetadataTransformersService(bus, config=config)
+        # per stage latency histograms
+        self.stats = PipelineStats()
+        # capabilities pushed by skills, spares pinging them per utterance
+        self.capabilities = SkillCapabilities(bus)
+        # response latency of skills, optionally adapting how long to wait for them
+        self.skill_latency = SkillLatencyTracker(
+            config.get("skills", {}).get("adaptive_deadlines"))
+        self.fallback = FallbackService(bus, self.capabilities, self.skill_latency,
+                                        stats=self.stats)
+        # active skills of the session being handled, shared by converse and stop
+        self.active_skills_cache = ActiveSkillsCache()
+        # typed config read per utterance, rebuilt when the configuration changes
+        self.config_snapshot = ConfigSnapshot(bus)
+        self.converse = ConverseService(bus, self.capabilities, self.skill_latency,
+                                        active_skills_cache=self.active_skills_cache,
+                                        config_snapshot=self.config_snapshot)
+        self.common_qa = CommonQAService(bus, self.skill_latency)
+        self.stop = StopService(bus, self.capabilities, self.skill_latency,
+                                stats=self.stats,
+                                active_skills_cache=self.active_skills_cache,
+                                config_snapshot=self.config_snapshot)
+        self.utterance_plugins = UtteranceTransformersService(bus, config=config,
+                                                              stats=self.stats)
+        self.metadata_plugins = MetadataTransformersService(bus, config=config,
+                                                            stats=self.stats)
+
+        # compiled pipelines, see get_pipeline_plan
+        self._plan_lock = Lock()
+        self._matchers = {}
+        self._extra_matchers = {}
+        self._pipeline_plans = {}
+        self._engines = {}
+        self._speculative_stages = {}
+        self._speculation_executor = None
+
+        # opt-in cache of side effect free matcher results
+        cache_size = config.get("intents", {}).get("match_cache_size", 0)
+        self.match_cache = MatchCache(cache_size,
+                                      config.get("intents", {}).get("match_cache_ttl", 300)) \
+            if cache_size else None
+
+        # opt-in, utterances are processed concurrently across sessions
+        # but in order within a session. Skill handlers must not block the
+        # worker waiting for a later utterance of the same session, which
+        # is what get_response does on a synchronous bus such as FakeBus
+        workers = config.get("intents", {}).get("utterance_workers", 0)
+        self.utterance_executor = SessionShardedExecutor(workers, "utterance_worker") \
+            if workers else None
+
         # connection SessionManager to the bus,
         # this will sync default session across all components
         SessionManager.connect_to_bus(self.bus)
 
         self.bus.on('register_vocab', self.handle_register_vocab)
         self.bus.on('register_intent', self.handle_register_intent)
-        self.bus.on('recognizer_loop:utterance', self.handle_utterance)
+        self.bus.on('recognizer_loop:utterance', self.dispatch_utterance)
         self.bus.on('detach_intent', self.handle_detach_intent)
         self.bus.on('detach_skill', self.handle_detach_skill)
         # Context related handlers
         self.bus.on('add_context', self.handle_add_context)
         self.bus.on('remove_context', self.handle_remove_context)
         self.bus.on('clear_context', self.handle_clear_context)
+        # config changes may change the matchers, recompile pipelines
+        self.bus.on('configuration.updated', self.handle_config_changed)
+        self.bus.on('configuration.patch', self.handle_config_changed)
+        self.bus.on('configuration.patch.clear', self.handle_config_changed)
+        # registry changes not handled here invalidate cached matches
+        self.bus.on('padatious:register_intent', self.handle_padatious_registration)
+        self.bus.on('padatious:register_entity', self.handle_padatious_registration)
+        self.bus.on('mycroft.skills.trained', self.handle_registry_changed)
+        self.bus.on('mycroft.skills.initialized', self.handle_skills_initialized)
 
         # Converse method
         self.bus.on('mycroft.skills.loaded', self.update_skill_name_dict)
@@ -95,7 +215,9 @@ class IntentService:
         # Intents API
         self.registered_vocab = []
         self.bus.on('intent.service.intent.get', self.handle_get_intent)
+        self.bus.on('intent.service.intent.get_batch', self.handle_get_intent_batch)
         self.bus.on('intent.service.skills.get', self.handle_get_skills)
+        self.bus.on('intent.service.stats.get', self.handle_get_stats)
         self.bus.on('intent.service.adapt.get', self.handle_get_adapt)
         self.bus.on('intent.service.adapt.manifest.get',
                     self.handle_adapt_manifest)
@@ -108,6 +230,17 @@ class IntentService:
         self.bus.on('intent.service.padatious.entities.manifest.get',
                     self.handle_entity_manifest)
 
+        # opt-in warm start, register the intents of the previous run
+        # right away instead of waiting for every skill to load
+        self.snapshot = None
+        self._restored = {}  # snapshot key -> registration not yet sent again
+        self._snapshot_timer = None
+        if config.get("intents", {}).get("warm_start"):
+            path = config["intents"].get("snapshot_path") or \
+                   f"{xdg_data_home()}/{get_xdg_base()}/intent_snapshot.json"
+            self.snapshot = IntentSnapshot(path)
+            self.restore_snapshot()
+
     @property
     def registered_intents(self):
         lang = get_message_lang()
@@ -199,21 +332,12 @@ class IntentService:
 
         return default_lang
 
-    def get_pipeline(self, skips=None, session=None):
-        """return a list of matcher functions ordered by priority
-        utterances will be sent to each matcher in order until one can handle the utterance
-        the list can be configured in mycroft.conf under intents.pipeline,
-        in the future plugins will be supported for users to define their own pipeline"""
-        session = session or SessionManager.get()
-
-        # Create matchers
+    def _create_matchers(self):
+        """build the dict of pipeline component name to bound matcher"""
         # TODO - from plugins
         if self.padatious_service is None:
-            if any("padatious" in p for p in session.pipeline):
-                LOG.warning("padatious is not available! using padacioso in it's place")
             padatious_matcher = self.padacioso_service
         else:
-            from ovos_core.intent_services.padatious_service import PadatiousMatcher
             padatious_matcher = PadatiousMatcher(self.padatious_service)
 
         matchers = {
@@ -233,9 +357,212 @@ class IntentService:
             "padacioso_low": self.padacioso_service.match_low,
             "fallback_low": self.fallback.low_prio
         }
-        skips = skips or []
-        pipeline = [k for k in session.pipeline if k not in skips]
-        return [matchers[k] for k in pipeline]
+        matchers.update(self._extra_matchers)
+        return matchers
+
+    def _create_speculative_matchers(self):
+        """side effect free matchers that can be evaluated ahead of time
+
+        Returns:
+            engines (dict): engine name -> function(utterances, lang, message)
+                            computing a raw result for an utterance
+            stages (dict): pipeline component -> (engine name, consumer),
+                           consumer(result, message) returns an IntentMatch
+        """
+        padacioso = self.padacioso_service
+        engines = {
+            "adapt": self.adapt_service.calc_intent,
+            "padacioso": lambda utts, lang, message: padacioso.calc_intent(utts, lang)
+        }
+
+        def adapt_consumer(match, message):
+            # the session context update is the only side effect of adapt
+            self.adapt_service.update_session_context(match, message)
+            return match
+
+        stages = {
+            "adapt": ("adapt", adapt_consumer),
+            "padacioso_high": ("padacioso", lambda intent, message:
+                               padacioso.intent_to_match(intent, padacioso.conf_high)),
+            "padacioso_medium": ("padacioso", lambda intent, message:
+                                 padacioso.intent_to_match(intent, padacioso.conf_med)),
+            "padacioso_low": ("padacioso", lambda intent, message:
+                              padacioso.intent_to_match(intent, padacioso.conf_low))
+        }
+        if self.padatious_service is None:
+            padatious_engine, padatious = "padacioso", padacioso
+            to_match = padacioso.intent_to_match
+        else:
+            padatious_engine, padatious = "padatious", self.padatious_service
+            to_match = PadatiousMatcher.intent_to_match
+            engines["padatious"] = lambda utts, lang, message: padatious.calc_intent(utts, lang)
+        stages["padatious_high"] = (padatious_engine, lambda intent, message:
+                                    to_match(intent, padatious.conf_high))
+        stages["padatious_medium"] = (padatious_engine, lambda intent, message:
+                                      to_match(intent, padatious.conf_med))
+        stages["padatious_low"] = (padatious_engine, lambda intent, message:
+                                   to_match(intent, padatious.conf_low))
+        return engines, stages
+
+    def register_matcher(self, name, match_func):
+        """register an additional pipeline component
+
+        Args:
+            name (str): name used to reference this matcher in the pipeline
+            match_func (callable): function(utterances, lang, message)
+                                   returning an IntentMatch or None,
+                                   utterances is a list it may modify
+        """
+        self._extra_matchers[name] = match_func
+        self.invalidate_pipeline_plans()
+
+    def _utterances_for(self, stage, utterances):
+        """utterances argument for a pipeline stage
+
+        registered matchers get a plain list, as before UtteranceAnalysis,
+        built-in matchers share the analysis
+        """
+        if stage in self._extra_matchers:
+            return list(utterances)
+        return utterances
+
+    def invalidate_pipeline_plans(self):
+        """drop all compiled pipelines, they are rebuilt on next use"""
+        with self._plan_lock:
+            self._matchers = {}
+            self._engines = {}
+            self._speculative_stages = {}
+            self._pipeline_plans = {}
+
+    def handle_config_changed(self, message=None):
+        """Messagebus handler, configuration changed so recompile pipelines"""
+        self.invalidate_pipeline_plans()
+        self.handle_registry_changed()
+
+    def handle_registry_changed(self, message=None):
+        """Messagebus handler, registered intents changed so cached matches are stale"""
+        if self.match_cache is not None:
+            self.match_cache.bump()
+
+    def get_pipeline_plan(self, skips=None, session=None):
+        """return the compiled PipelinePlan for a session
+
+        plans are cached per session pipeline and skip list and only rebuilt
+        after a configuration change or a new matcher being registered"""
+        session = session or SessionManager.get()
+        pipeline = tuple(session.pipeline)
+        skips = tuple(skips or [])
+        key = (pipeline, skips)
+        plan = self._pipeline_plans.get(key)
+        if plan is None:
+            with self._plan_lock:
+                if not self._matchers:
+                    self._matchers = self._create_matchers()
+                    self._engines, self._speculative_stages = \
+                        self._create_speculative_matchers()
+                    if self.match_cache is not None:
+                        # pure matchers are evaluated through the match cache
+                        for stage, (engine, consumer) in self._speculative_stages.items():
+                            if stage not in self._extra_matchers:
+                                self._matchers[stage] = self._cached_matcher(
+                                    engine, consumer, self._matchers[stage])
+                if self.padatious_service is None and \
+                        any("padatious" in p for p in pipeline):
+                    LOG.warning("padatious is not available! using padacioso in it's place")
+                speculative = None
+                if Configuration().get("intents", {}).get("speculative_matching"):
+                    # custom matchers replacing a default one are not pure
+                    speculative = {k: v for k, v in self._speculative_stages.items()
+                                   if k not in self._extra_matchers}
+                plan = PipelinePlan([k for k in pipeline if k not in skips],
+                                    self._matchers, speculative)
+                self._pipeline_plans[key] = plan
+        return plan
+
+    @property
+    def speculation_executor(self):
+        """thread pool evaluating side effect free matchers ahead of time"""
+        if self._speculation_executor is None:
+            workers = Configuration().get("intents", {}).get("speculative_workers") or 3
+            self._speculation_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="intent_speculation")
+        return self._speculation_executor
+
+    @staticmethod
+    def _session_context(message):
+        """the session context speculative results were computed against"""
+        return json.dumps(SessionManager.get(message).context.serialize(),
+                          sort_keys=True, default=str)
+
+    def _start_speculation(self, plan, utterances, lang, message):
+        """start evaluating the side effect free matchers of a plan
+
+        Returns:
+            speculation (dict): engine name -> (Future with the raw engine
+                                result, session context it was started with)
+        """
+        if not plan.engines:
+            return {}
+        context = self._session_context(message)
+        return {engine: (self.speculation_executor.submit(self._run_engine, engine,
+                                                          utterances, lang, message),
+                         context)
+                for engine in plan.engines}
+
+    def _speculative_result(self, speculation, engine, utterances, lang, message):
+        """raw engine result for a pipeline stage
+
+        Earlier stages may change the session context, a result computed
+        against an older context is discarded and the engine evaluated again.
+        A failing engine is logged and treated as no match.
+        """
+        future, context = speculation[engine]
+        current = self._session_context(message)
+        try:
+            if context == current:
+                return future.result()
+            future.cancel()
+            LOG.debug(f"session context changed, re-evaluating {engine}")
+            result = self._run_engine(engine, utterances, lang, message)
+        except Exception as e:
+            LOG.exception(f"{engine} failed to match: {e}")
+            result = None
+        done = Future()
+        done.set_result(result)
+        speculation[engine] = (done, current)
+        return result
+
+    def _run_engine(self, engine, utterances, lang, message):
+        """raw result of a side effect free matcher, from the match cache if enabled"""
+        utterances = UtteranceAnalysis.from_utterances(utterances, lang)
+        func = self._engines[engine]
+        if self.match_cache is None:
+            return func(utterances, lang, message)
+        if engine == "adapt" and SessionManager.get(message).context.frame_stack:
+            # adapt matches depend on the session context, never cache those
+            return func(utterances, lang, message)
+        key = self.match_cache.make_key(engine, utterances, lang)
+        hit, result = self.match_cache.get(key)
+        if not hit:
+            result = func(utterances, lang, message)
+            self.match_cache.put(key, result)
+        return result
+
+    def _cached_matcher(self, engine, consumer, matcher):
+        """pipeline matcher for a side effect free stage using the match cache"""
+
+        @wraps(matcher)
+        def match(utterances, lang=None, message=None):
+            return consumer(self._run_engine(engine, utterances, lang, message), message)
+
+        return match
+
+    def get_pipeline(self, skips=None, session=None):
+        """return a list of matcher functions ordered by priority
+        utterances will be sent to each matcher in order until one can handle the utterance
+        the list can be configured in mycroft.conf under intents.pipeline,
+        in the future plugins will be supported for users to define their own pipeline"""
+        return self.get_pipeline_plan(skips, session).matchers
 
     def _validate_session(self, message, lang):
         # get session
@@ -258,6 +585,23 @@ class IntentService:
         sess.touch()
         return sess
 
+    def dispatch_utterance(self, message):
+        """Messagebus handler for 'recognizer_loop:utterance'
+
+        Utterances are handed to the worker owning their session, so a slow
+        utterance only delays later utterances of that same session.
+        If intents.utterance_workers is 0 they are handled inline instead.
+
+        Args:
+            message (Message): The messagebus data
+        """
+        if self.utterance_executor is None:
+            self.handle_utterance(message)
+            return
+        sess = message.context.get("session") or {}
+        session_id = sess.get("session_id") or "default"
+        self.utterance_executor.submit(session_id, self.handle_utterance, message)
+
     def handle_utterance(self, message):
         """Main entrypoint for handling user utterances
 
@@ -288,7 +632,9 @@ class IntentService:
         try:
 
             # Get utterance utterance_plugins additional context
-            message = self._handle_transformers(message)
+            transformers_stopwatch = Stopwatch()
+            with transformers_stopwatch:
+                message = self._handle_transformers(message)
 
             # tag language of this utterance
             lang = self.disambiguate_lang(message)
@@ -298,7 +644,8 @@ class IntentService:
             except Exception as e:
                 LOG.exception(f"Failed to set lingua_franca default lang to {lang}")
 
-            utterances = message.data.get('utterances', [])
+            # tokenized once, shared by all matchers
+            utterances = UtteranceAnalysis(message.data.get('utterances', []), lang)
 
             stopwatch = Stopwatch()
 
@@ -308,14 +655,36 @@ class IntentService:
 
             # match
             match = None
+            timings = {}
             with stopwatch:
+                plan = self.get_pipeline_plan(session=sess)
+                # side effect free matchers start right away in the background
+                speculation = self._start_speculation(plan, utterances, lang, message)
                 # Loop through the matching functions until a match is found.
-                for match_func in self.get_pipeline(session=sess):
-                    match = match_func(utterances, lang, message)
+                for stage, match_func in plan:
+                    stage_stopwatch = Stopwatch()
+                    with stage_stopwatch:
+                        if stage in plan.speculative:
+                            engine, consumer = plan.speculative[stage]
+                            match = consumer(self._speculative_result(
+                                speculation, engine, utterances, lang, message), message)
+                        else:
+                            match = match_func(self._utterances_for(stage, utterances),
+                                               lang, message)
+                    timings[stage] = stage_stopwatch.time
+                    self.stats.record(stage, stage_stopwatch.time,
+                                      "matched" if match else "unmatched")
                     if match:
                         break
+                for future, _ in speculation.values():
+                    future.cancel()  # no-op if already running or done
 
             LOG.debug(f"intent matching took: {stopwatch.time}")
+            message.context["pipeline_timings"] = {
+                "transformers": transformers_stopwatch.time,
+                "stages": timings,
+                "total": stopwatch.time
+            }
             if match:
                 message.data["utterance"] = match.utterance
 
@@ -347,13 +716,27 @@ class IntentService:
         except Exception as err:
             LOG.exception(err)
 
+    def shutdown(self):
+        """Stop the worker threads, queued utterances are still handled"""
+        self.config_snapshot.shutdown()
+        if self.snapshot is not None:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+            self.snapshot.save()
+        if self.utterance_executor is not None:
+            self.utterance_executor.shutdown()
+        if self._speculation_executor is not None:
+            self._speculation_executor.shutdown()
+        # after the queued utterances, their questions still need the timers
+        self.common_qa.shutdown()
+
     def send_complete_intent_failure(self, message):
         """Send a message that no skill could handle the utterance.
 
         Args:
             message (Message): original message to forward from
         """
-        sound = Configuration().get('sounds', {}).get('error', "snd/error.mp3")
+        sound = self.config_snapshot.current.error_sound
         self.bus.emit(message.forward('mycroft.audio.play_sound', {"uri": sound}))
         self.bus.emit(message.forward('complete_intent_failure'))
 
@@ -369,6 +752,12 @@ class IntentService:
                         'This will be removed in v22.02.')
             _update_keyword_message(message)
 
+        if self._snapshot_registration(message):
+            return  # already registered from the snapshot
+        self._register_vocab(message)
+        self.handle_registry_changed()
+
+    def _register_vocab(self, message):
         entity_value = message.data.get('entity_value')
         entity_type = message.data.get('entity_type')
         regex_str = message.data.get('regex')
@@ -384,9 +773,145 @@ class IntentService:
         Args:
             message (Message): message containing intent info
         """
+        if self._snapshot_registration(message):
+            return  # already registered from the snapshot
+        self._register_intent(message)
+        self.handle_registry_changed()
+
+    def _register_intent(self, message):
         intent = open_intent_envelope(message)
         self.adapt_service.register_intent(intent)
 
+    def handle_padatious_registration(self, message):
+        """Messagebus handler, padatious intent or entity registered
+
+        registration itself is done by the padatious/padacioso services
+        """
+        self._snapshot_registration(message)
+        self.handle_registry_changed()
+
+    def _snapshot_registration(self, message):
+        """record a registration in the intent snapshot
+
+        Returns:
+            True if the same registration was restored from the snapshot
+        """
+        if self.snapshot is None:
+            return False
+        key = self.snapshot.record(message)
+        self._schedule_snapshot_save()
+        if message.msg_type == "register_vocab":
+            # the skill registers this vocab again, it may have changed
+            self._drop_restored_vocab(message, key)
+            return False
+        if self._restored.pop(key, None) is not None:
+            return True
+        if message.msg_type == "register_intent":
+            # a changed intent replaces the restored one
+            name = message.data.get("name")
+            stale = [k for k, msg in self._restored.items()
+                     if msg.msg_type == "register_intent" and msg.data.get("name") == name]
+            for k in stale:
+                self._restored.pop(k)
+            if stale:
+                self.adapt_service.detach_intent(name)
+        return False
+
+    @staticmethod
+    def _vocab_id(message):
+        """skill, lang and entity a vocab registration belongs to"""
+        data = message.data
+        entity = data.get("entity_type")
+        if data.get("regex"):
+            try:
+                entity = tuple(sorted(re.compile(data["regex"]).groupindex))
+            except re.error:
+                entity = data["regex"]
+        return IntentSnapshot.get_skill_id(message), get_message_lang(message), entity
+
+    def _drop_restored_vocab(self, message, key):
+        """detach the restored vocab of the entity a skill registers again
+
+        the skill registers every entry it still has again, the others are
+        also forgotten by the snapshot
+        """
+        vocab_id = self._vocab_id(message)
+        stale = [k for k, msg in self._restored.items()
+                 if msg.msg_type == "register_vocab" and self._vocab_id(msg) == vocab_id]
+        for k in stale:
+            self._detach_vocab(self._restored.pop(k))
+        self.snapshot.forget_entries([k for k in stale if k != key])
+
+    def _detach_vocab(self, message):
+        data = message.data
+        self.adapt_service.detach_vocabulary(data.get('entity_value'),
+                                             data.get('entity_type'),
+                                             data.get('alias_of'),
+                                             data.get('regex'),
+                                             get_message_lang(message))
+
+    def restore_snapshot(self):
+        """register the intents of the last run from the snapshot
+
+        restored registrations are replaced once the skills register again,
+        the ones no skill registers again are dropped after
+        intents.snapshot_grace seconds from mycroft.skills.initialized
+        """
+        self.snapshot.load()
+        padatious = False
+        for skill_id, entries in self.snapshot.restorable().items():
+            for key, message in entries.items():
+                try:
+                    if message.msg_type == "register_vocab":
+                        self._register_vocab(message)
+                    elif message.msg_type == "register_intent":
+                        self._register_intent(message)
+                    else:
+                        for service in (self.padatious_service, self.padacioso_service):
+                            if service is not None:
+                                service.register_restored(message)
+                        padatious = True
+                    self._restored[key] = message
+                except Exception as e:
+                    LOG.error(f"failed to restore {message.msg_type} for {skill_id}: {e}")
+        LOG.info(f"restored {len(self._restored)} intent registrations from snapshot")
+        if padatious and self.padatious_service is not None:
+            Thread(target=self.padatious_service.warm_train, daemon=True).start()
+        self.handle_registry_changed()
+
+    def drop_restored(self):
+        """detach the restored registrations no skill registered again"""
+        stale, self._restored = self._restored, {}
+        for message in stale.values():
+            if message.msg_type == "register_intent":
+                self.adapt_service.detach_intent(message.data.get("name"))
+            elif message.msg_type == "register_vocab":
+                self._detach_vocab(message)
+        for service in (self.padatious_service, self.padacioso_service):
+            if service is not None:
+                service.drop_restored()
+        if stale:
+            LOG.info(f"dropped {len(stale)} stale intent registrations")
+            self.snapshot.forget_entries(list(stale))
+            self._schedule_snapshot_save()
+            self.handle_registry_changed()
+
+    def handle_skills_initialized(self, message=None):
+        """Messagebus handler, skills loaded, schedule dropping stale restored intents"""
+        if self.snapshot is None:
+            return
+        grace = Configuration().get("intents", {}).get("snapshot_grace", 60)
+        timer = Timer(grace, self.drop_restored)
+        timer.daemon = True
+        timer.start()
+
+    def _schedule_snapshot_save(self):
+        """save the snapshot after a burst of registrations"""
+        if self._snapshot_timer is None or not self._snapshot_timer.is_alive():
+            self._snapshot_timer = Timer(5, self.snapshot.save)
+            self._snapshot_timer.daemon = True
+            self._snapshot_timer.start()
+
     def handle_detach_intent(self, message):
         """Remover adapt intent.
 
@@ -395,6 +920,10 @@ class IntentService:
         """
         intent_name = message.data.get('intent_name')
         self.adapt_service.detach_intent(intent_name)
+        if self.snapshot is not None:
+            self.snapshot.forget_intent(intent_name)
+            self._schedule_snapshot_save()
+        self.handle_registry_changed()
 
     def handle_detach_skill(self, message):
         """Remove all intents registered for a specific skill.
@@ -404,6 +933,15 @@ class IntentService:
         """
         skill_id = message.data.get('skill_id')
         self.adapt_service.detach_skill(skill_id)
+        # skills send their id as an intent name prefix, eg. "skill.author:"
+        owner = (skill_id or "").rstrip(":")
+        self.skill_latency.forget(owner)
+        if self.snapshot is not None:
+            self.snapshot.forget_skill(owner)
+            self._restored = {k: msg for k, msg in self._restored.items()
+                              if msg.context.get("skill_id") != owner}
+            self._schedule_snapshot_save()
+        self.handle_registry_changed()
 
     def handle_add_context(self, message):
         """Add context
@@ -446,27 +984,31 @@ class IntentService:
     def handle_get_intent(self, message):
         """Get intent from either adapt or padatious.
 
+        Matchers run in dry run mode, see is_dry_run, unless the query
+        context explicitly sets "dry_run" to False.
+
         Args:
             message (Message): message containing utterance
         """
         utterance = message.data["utterance"]
         lang = get_message_lang(message)
         sess = SessionManager.get(message)
+        # intent queries never trigger skills unless explicitly asked to
+        query = Message(message.msg_type, message.data,
+                        dict(message.context, dry_run=message.context.get("dry_run", True)))
 
         # Loop through the matching functions until a match is found.
-        for match_func in self.get_pipeline(skips=["converse",
-                                                   "fallback_high",
-                                                   "fallback_medium",
-                                                   "fallback_low"],
-                                            session=sess):
-            match = match_func([utterance], lang, message)
+        plan = self.get_pipeline_plan(skips=["converse",
+                                             "fallback_high",
+                                             "fallback_medium",
+                                             "fallback_low"],
+                                      session=sess)
+        utterances = UtteranceAnalysis([utterance], lang)
+        for stage, match_func in plan:
+            match = match_func(self._utterances_for(stage, utterances), lang, query)
             if match:
                 if match.intent_type:
-                    intent_data = match.intent_data
-                    intent_data["intent_name"] = match.intent_type
-                    intent_data["intent_service"] = match.intent_service
-                    intent_data["skill_id"] = match.skill_id
-                    intent_data["handler"] = match_func.__name__
+                    intent_data = self._match_to_intent_data(match, match_func)
                     self.bus.emit(message.reply("intent.service.intent.reply",
                                                 {"intent": intent_data}))
                 return
@@ -475,6 +1017,97 @@ class IntentService:
         self.bus.emit(message.reply("intent.service.intent.reply",
                                     {"intent": None}))
 
+    @staticmethod
+    def _match_to_intent_data(match, match_func):
+        """intent data as sent in intent.service.intent.reply"""
+        # copy, the match may be shared with the match cache
+        intent_data = dict(match.intent_data)
+        intent_data["intent_name"] = match.intent_type
+        intent_data["intent_service"] = match.intent_service
+        intent_data["skill_id"] = match.skill_id
+        intent_data["handler"] = match_func.__name__
+        return intent_data
+
+    def handle_get_intent_batch(self, message):
+        """Get intents for a list of utterances, see iter_intent_batch.
+
+        Results are sent back in chunks, each an intent.service.intent.batch.reply
+        with the intents of the utterances[offset:offset + len(intents)],
+        the last chunk is flagged as done.
+
+        Args:
+            message (Message): message containing utterances
+        """
+        utterances = message.data.get("utterances") or []
+        chunk_size = message.data.get("chunk_size") or 100
+        lang = get_message_lang(message)
+        offset = 0
+        for intents in self.iter_intent_batch(utterances, lang, message, chunk_size):
+            offset += len(intents)
+            self.bus.emit(message.reply("intent.service.intent.batch.reply",
+                                        {"intents": intents,
+                                         "offset": offset - len(intents),
+                                         "total": len(utterances),
+                                         "done": offset >= len(utterances)}))
+        if not utterances:
+            self.bus.emit(message.reply("intent.service.intent.batch.reply",
+                                        {"intents": [], "offset": 0,
+                                         "total": 0, "done": True}))
+
+    def get_intent_batch(self, utterances, lang=None, message=None):
+        """Get the intent data of many utterances, see iter_intent_batch.
+
+        Returns:
+            list of intent data dicts, None for utterances without a match
+        """
+        return [intent for chunk in self.iter_intent_batch(utterances, lang, message)
+                for intent in chunk]
+
+    def iter_intent_batch(self, utterances, lang=None, message=None, chunk_size=100):
+        """Match utterances against the side effect free part of the pipeline.
+
+        Only adapt, padatious and padacioso stages of the session pipeline
+        are evaluated, no message is sent to skills and the session is left
+        untouched. Each engine runs at most once per utterance regardless of
+        how many confidence tiers use it, and utterances are matched in
+        parallel by intents.batch_workers threads.
+
+        Args:
+            utterances (list): utterances to match
+            lang (str): language of the utterances
+            message (Message): message with the session to match against
+            chunk_size (int): number of results per yielded chunk
+
+        Yields:
+            lists of intent data dicts, or None for utterances without a
+            match, in the same order as utterances
+        """
+        message = message or Message("intent.service.intent.get_batch")
+        message = Message(message.msg_type, message.data,
+                          dict(message.context, dry_run=True))
+        lang = lang or get_message_lang(message)
+        plan = self.get_pipeline_plan(session=SessionManager.get(message))
+        stages = [(name, self._speculative_stages[name]) for name, _ in plan
+                  if name in self._speculative_stages and name not in self._extra_matchers]
+        matchers = dict(plan)
+
+        def match_utterance(utterance):
+            utterances = UtteranceAnalysis([utterance], lang)
+            results = {}
+            for name, (engine, consumer) in stages:
+                if engine not in results:
+                    results[engine] = self._run_engine(engine, utterances, lang, message)
+                match = consumer(results[engine], message)
+                if match and match.intent_type:
+                    return self._match_to_intent_data(match, matchers[name])
+            return None
+
+        workers = Configuration().get("intents", {}).get("batch_workers") or 4
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix="intent_batch") as pool:
+            for idx in range(0, len(utterances), chunk_size):
+                yield list(pool.map(match_utterance, utterances[idx:idx + chunk_size]))
+
     def handle_get_skills(self, message):
         """Send registered skills to caller.
 
@@ -484,6 +1117,22 @@ class IntentService:
         self.bus.emit(message.reply("intent.service.skills.reply",
                                     {"skills": self.skill_names}))
 
+    def handle_get_stats(self, message):
+        """Send per pipeline stage latency statistics, match and answer cache
+        counters and per skill response latencies to caller.
+
+        Argument:
+            message: query message to reply to.
+        """
+        cache = self.match_cache.serialize() if self.match_cache is not None else None
+        answer_cache = self.common_qa.answer_cache.serialize() \
+            if self.common_qa.answer_cache is not None else None
+        self.bus.emit(message.reply("intent.service.stats.reply",
+                                    {"stats": self.stats.serialize(),
+                                     "match_cache": cache,
+                                     "answer_cache": answer_cache,
+                                     "skills": self.skill_latency.serialize()}))
+
     @deprecated("handle_get_active_skills moved to ConverseService, overriding this method has no effect, "
                 "it has been disconnected from the bus event", "0.0.8")
     def handle_get_active_skills(self, message):
@@ -0,0 +1,115 @@
+"""Per session bookkeeping of active skills and skill activations."""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Mapping, Optional
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session, SessionManager
+
+
+def expire_active_skills(session: Session, timeouts: Mapping[str, float],
+                         default_timeout: float) -> List[str]:
+    """remove the skills of a session that timed out
+
+    Args:
+        session (Session): session to update
+        timeouts (dict): skill_id: seconds a skill stays active
+        default_timeout (float): seconds for skills not in timeouts
+
+    Returns:
+        list of expired skill_ids, the active skills are left untouched if empty
+    """
+    now = time.time()
+    expired = [skill_id for skill_id, ts in session.active_skills
+               if now - ts > timeouts.get(skill_id, default_timeout)]
+    if expired:
+        session.active_skills = [skill for skill in session.active_skills
+                                 if skill[0] not in expired]
+    return expired
+
+
+class ActiveSkillsCache:
+    """Active skill_ids of the session carried by a message, in converse order.
+
+    SessionManager.get deserializes the session from message.context on
+    every call, and a single utterance reads its active skills several times,
+    converse and each stop matcher. The skill_ids are kept per serialized
+    session dict, activating, deactivating or expiring a skill serializes
+    the session into message.context again, which invalidates the entry.
+
+    Args:
+        max_entries (int): cached sessions, the least recently used is
+            dropped beyond this
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        # id(session dict): (session dict, skill_ids), the dict is kept so
+        # its id is not reused while cached
+        self._entries: Dict[int, tuple] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, message: Optional[Message] = None) -> List[str]:
+        """active skill_ids of the session of a message"""
+        data = message.context.get("session") if message is not None else None
+        if not isinstance(data, dict):
+            return [skill[0] for skill in SessionManager.get(message).active_skills]
+        with self._lock:
+            entry = self._entries.get(id(data))
+            if entry is not None and entry[0] is data:
+                self._entries.move_to_end(id(data))
+                return list(entry[1])
+        skill_ids = [skill[0] for skill in SessionManager.get(message).active_skills]
+        with self._lock:
+            self._entries[id(data)] = (data, skill_ids)
+            self._entries.move_to_end(id(data))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return list(skill_ids)
+
+
+class ActivationCounter:
+    """Consecutive activations of each skill, per session.
+
+    Only skills with a non zero count are stored, and sessions without any
+    are dropped, idle sessions are evicted least recently used first so
+    the counters stay bounded no matter how many clients connect.
+
+    Args:
+        max_sessions (int): tracked sessions, the least recently used is
+            dropped beyond this
+    """
+
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, Dict[str, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, session_id: str, skill_id: str) -> int:
+        """consecutive activations of skill_id in a session"""
+        with self._lock:
+            return self._sessions.get(session_id, {}).get(skill_id, 0)
+
+    def increment(self, session_id: str, skill_id: str) -> int:
+        """count an activation, returns the new count"""
+        with self._lock:
+            counts = self._sessions.pop(session_id, None) or {}
+            counts[skill_id] = counts.get(skill_id, 0) + 1
+            self._sessions[session_id] = counts  # most recently used
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return counts[skill_id]
+
+    def reset(self, session_id: str, skill_id: str):
+        """the streak of skill_id in a session ended"""
+        with self._lock:
+            counts = self._sessions.get(session_id)
+            if counts is not None:
+                counts.pop(skill_id, None)
+                if not counts:
+                    del self._sessions[session_id]
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
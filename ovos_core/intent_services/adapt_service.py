@@ -13,15 +13,14 @@
 # limitations under the License.
 #
 """An intent parsing service using the Adapt parser."""
-from threading import Lock
-
 from adapt.engine import IntentDeterminationEngine
 from ovos_config.config import Configuration
 
 import ovos_core.intent_services
+from ovos_core.intent_services.analysis import UtteranceAnalysis
+from ovos_core.intent_services.concurrency import ReadWriteLock
 from ovos_bus_client.session import IntentContextManager as ContextManager, \
     SessionManager
-from ovos_utils import flatten_list
 from ovos_utils.log import LOG
 
 
@@ -54,7 +53,8 @@ class AdaptService:
         self.engines = {lang: IntentDeterminationEngine()
                         for lang in langs}
 
-        self.lock = Lock()
+        # "with self.lock" is exclusive, matching uses self.lock.read()
+        self.lock = ReadWriteLock()
         self.max_words = 50  # if an utterance contains more words than this, don't attempt to match
 
     @property
@@ -142,10 +142,27 @@ class AdaptService:
         Returns:
             Intent structure, or None if no match was found.
         """
-        # we call flatten in case someone is sending the old style list of tuples
-        utterances = flatten_list(utterances)
+        match = self.calc_intent(utterances, lang, message)
+        self.update_session_context(match, message)
+        return match
+
+    def calc_intent(self, utterances, lang=None, message=None):
+        """Search for the best Adapt intent without any side effects.
 
-        utterances = [u for u in utterances if len(u.split()) < self.max_words]
+        Unlike match_intent the session context is not updated with the
+        keywords of the matched intent, see update_session_context.
+
+        Args:
+            utterances (iterable): utterances for consideration in intent
+            matching.
+            lang (str): language of the utterances
+            message (Message): message with the session to match against
+
+        Returns:
+            IntentMatch, or None if no match was found.
+        """
+        analysis = UtteranceAnalysis.from_utterances(utterances, lang)
+        utterances = analysis.within_word_limit(self.max_words)
         if not utterances:
             LOG.error(f"utterance exceeds max size of {self.max_words} words, skipping adapt match")
             return None
@@ -168,10 +185,11 @@ class AdaptService:
         sess = SessionManager.get(message)
         for utt in utterances:
             try:
-                intents = [i for i in self.engines[lang].determine_intent(
-                    utt, 100,
-                    include_tags=True,
-                    context_manager=sess.context)]
+                with self.lock.read():
+                    intents = [i for i in self.engines[lang].determine_intent(
+                        utt, 100,
+                        include_tags=True,
+                        context_manager=sess.context)]
                 if intents:
                     utt_best = max(
                         intents, key=lambda x: x.get('confidence', 0.0)
@@ -182,10 +200,6 @@ class AdaptService:
                 LOG.exception(err)
 
         if best_intent:
-            ents = [tag['entities'][0] for tag in best_intent['__tags__'] if 'entities' in tag]
-
-            sess.context.update_context(ents)
-
             skill_id = best_intent['intent_type'].split(":")[0]
             ret = ovos_core.intent_services.IntentMatch(
                 'Adapt', best_intent['intent_type'], best_intent, skill_id,
@@ -195,6 +209,21 @@ class AdaptService:
             ret = None
         return ret
 
+    @staticmethod
+    def update_session_context(match, message=None):
+        """Add the keywords of an Adapt match to the session context.
+
+        Args:
+            match (IntentMatch): result of calc_intent, may be None
+            message (Message): message with the session to update
+        """
+        if not match or ovos_core.intent_services.is_dry_run(message):
+            return
+        ents = [tag['entities'][0] for tag in match.intent_data['__tags__']
+                if 'entities' in tag]
+        sess = SessionManager.get(message)
+        sess.context.update_context(ents)
+
     def register_vocab(self, start_concept, end_concept,
                        alias_of, regex_str, lang):
         """Register Vocabulary. DEPRECATED
@@ -226,6 +255,23 @@ class AdaptService:
                     self.engines[lang].register_entity(
                         entity_value, entity_type, alias_of=alias_of)
 
+    def detach_vocabulary(self, entity_value, entity_type,
+                          alias_of, regex_str, lang):
+        """Remove a single vocabulary entry added by register_vocabulary.
+
+        Arguments are the same as the registration, other entries of the
+        same entity type are kept.
+        """
+        if lang in self.engines:
+            with self.lock:
+                engine = self.engines[lang]
+                if regex_str:
+                    engine.drop_regex_entity(
+                        match_func=lambda regexp: regexp.pattern == regex_str)
+                elif entity_value and entity_type:
+                    engine.trie.remove(entity_value.lower(),
+                                       (alias_of or entity_value, entity_type))
+
     def register_intent(self, intent):
         """Register new intent with adapt engine.
 
@@ -287,8 +333,9 @@ class AdaptService:
         Args:
             intent_name (str): Identifier for intent to remove.
         """
-        for lang in self.engines:
-            new_parsers = [
-                p for p in self.engines[lang].intent_parsers if p.name != intent_name
-            ]
-            self.engines[lang].intent_parsers = new_parsers
+        with self.lock:
+            for lang in self.engines:
+                new_parsers = [
+                    p for p in self.engines[lang].intent_parsers if p.name != intent_name
+                ]
+                self.engines[lang].intent_parsers = new_parsers
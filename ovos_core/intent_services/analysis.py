@@ -0,0 +1,56 @@
+"""Per utterance analysis shared by all pipeline matchers."""
+from typing import Iterable, Optional, Tuple
+
+from ovos_utils import flatten_list
+
+
+class UtteranceAnalysis(tuple):
+    """Immutable, precomputed view of the utterances of a query.
+
+    Built once in IntentService.handle_utterance and handed to every
+    matcher in place of the utterances list. It is a tuple of the
+    flattened and deduplicated utterances, so matchers unaware of it keep
+    working, while matchers opting in reuse the precomputed fields instead
+    of re-tokenizing.
+
+    Attributes:
+        lang (str): lowercased full lang code, eg. "en-us", may be None
+        lang2 (str): short lang code, eg. "en", may be None
+        lowercase (tuple): lowercased utterances
+        tokens (tuple): whitespace separated words of each utterance
+        word_counts (tuple): number of words of each utterance
+    """
+
+    def __new__(cls, utterances: Iterable[str], lang: Optional[str] = None):
+        # we call flatten in case someone is sending the old style list of tuples
+        utterances = tuple(dict.fromkeys(flatten_list(list(utterances))))
+        self = super().__new__(cls, utterances)
+        lang = lang.lower() if lang else None
+        tokens = tuple(tuple(u.split()) for u in utterances)
+        object.__setattr__(self, "lang", lang)
+        object.__setattr__(self, "lang2", lang.split("-")[0] if lang else None)
+        object.__setattr__(self, "lowercase", tuple(u.lower() for u in utterances))
+        object.__setattr__(self, "tokens", tokens)
+        object.__setattr__(self, "word_counts", tuple(len(t) for t in tokens))
+        return self
+
+    def __setattr__(self, key, value):
+        raise AttributeError("UtteranceAnalysis is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("UtteranceAnalysis is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (tuple(self), self.lang)
+
+    @classmethod
+    def from_utterances(cls, utterances: Iterable[str],
+                        lang: Optional[str] = None) -> "UtteranceAnalysis":
+        """return utterances as is if already analysed, else analyse them"""
+        if isinstance(utterances, cls):
+            return utterances
+        return cls(utterances, lang)
+
+    def within_word_limit(self, max_words: int) -> Tuple[str, ...]:
+        """utterances with less than max_words words"""
+        return tuple(u for u, n in zip(self, self.word_counts) if n < max_words)
@@ -0,0 +1,93 @@
+"""Capabilities advertised by skills, so matchers do not need to ping them."""
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+
+class SkillCapabilities:
+    """Registry of what each skill can handle, pushed by the skills.
+
+    Skills advertise their capabilities whenever they change with
+
+        ovos.skills.capabilities.update {"skill_id": ..., "converse": True,
+                                         "stop": False, "fallback": True}
+
+    only the given capabilities are updated. A skill that never advertised a
+    capability keeps being pinged per utterance like before, an advertised
+    capability is trusted until the skill updates or clears it, or is
+    detached.
+
+    Args:
+        bus: messagebus connection
+    """
+    CAPABILITIES = ("converse", "stop", "fallback")
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._skills: Dict[str, Dict[str, bool]] = {}
+        self._lock = Lock()
+        self.bus.on("ovos.skills.capabilities.update", self.handle_update)
+        self.bus.on("ovos.skills.capabilities.clear", self.handle_clear)
+        self.bus.on("ovos.skills.capabilities.get", self.handle_get)
+        self.bus.on("detach_skill", self.handle_clear)
+
+    @staticmethod
+    def _get_skill_id(message: Message) -> Optional[str]:
+        return message.data.get("skill_id") or message.context.get("skill_id")
+
+    def update(self, skill_id: str, **capabilities: bool):
+        """set the advertised capabilities of a skill, unknown keys are ignored"""
+        capabilities = {k: bool(v) for k, v in capabilities.items()
+                        if k in self.CAPABILITIES and v is not None}
+        with self._lock:
+            self._skills.setdefault(skill_id, {}).update(capabilities)
+
+    def forget(self, skill_id: str):
+        """drop everything a skill advertised, it will be pinged again"""
+        with self._lock:
+            self._skills.pop(skill_id, None)
+
+    def get(self, skill_id: str, capability: str) -> Optional[bool]:
+        """advertised value of a capability, None if never advertised"""
+        return self._skills.get(skill_id, {}).get(capability)
+
+    def partition(self, skill_ids: Iterable[str],
+                  capability: str) -> Tuple[List[str], List[str]]:
+        """split candidate skills by what they advertised
+
+        Returns:
+            (eligible, unknown) lists of skill_ids keeping the given order,
+            skills that advertised they can not handle it are left out
+        """
+        eligible, unknown = [], []
+        with self._lock:
+            for skill_id in skill_ids:
+                can_handle = self._skills.get(skill_id, {}).get(capability)
+                if can_handle is None:
+                    unknown.append(skill_id)
+                elif can_handle:
+                    eligible.append(skill_id)
+        return eligible, unknown
+
+    def serialize(self) -> Dict[str, Dict[str, bool]]:
+        with self._lock:
+            return {skill_id: dict(caps) for skill_id, caps in self._skills.items()}
+
+    def handle_update(self, message: Message):
+        skill_id = self._get_skill_id(message)
+        if not skill_id:
+            LOG.warning("capabilities advertised without a skill_id")
+            return
+        self.update(skill_id, **{k: message.data.get(k) for k in self.CAPABILITIES})
+
+    def handle_clear(self, message: Message):
+        # detach_skill sends the skill_id as an intent name prefix, "skill.author:"
+        skill_id = (self._get_skill_id(message) or "").rstrip(":")
+        if skill_id:
+            self.forget(skill_id)
+
+    def handle_get(self, message: Message):
+        self.bus.emit(message.reply("ovos.skills.capabilities.reply",
+                                    {"skills": self.serialize()}))
@@ -1,9 +1,11 @@
+import enum
 import re
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from itertools import chain
-from threading import Event
-from typing import Dict
+from threading import Event, Lock
+from typing import Deque, Dict, Optional, Tuple
 
 from ovos_bus_client.apis.enclosure import EnclosureAPI
 from ovos_bus_client.message import Message
@@ -13,43 +15,123 @@ from ovos_utils import flatten_list
 from ovos_utils.log import LOG
 
 import ovos_core.intent_services
+from ovos_core.intent_services.concurrency import TimerHandle, TimerQueue
+from ovos_core.intent_services.match_cache import MatchCache
+from ovos_core.intent_services.scatter_gather import CORRELATION_KEY, ScatterGather
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
+from ovos_core.intent_services.voc_match import get_voc_matcher
 from ovos_config.config import Configuration
 from ovos_workshop.resource_files import CoreResources
 
 
+class QueryState(str, enum.Enum):
+    SEARCHING = "searching"  # waiting for skills to answer
+    SELECTING = "selecting"  # responses gathered, picking the best one
+    DONE = "done"
+
+
+class AnswerHistory:
+    """Recent answer confidences of each CommonQuery skill, per language.
+
+    Args:
+        size (int): replies remembered per skill and language
+        min_samples (int): replies needed before the history is trusted
+    """
+
+    def __init__(self, size: int = 50, min_samples: int = 5):
+        self.size = size
+        self.min_samples = min_samples
+        self._replies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = Lock()
+
+    def record(self, skill_id: str, lang: str, conf: Optional[float]):
+        """record a final reply, conf is None if the skill had no answer"""
+        with self._lock:
+            if (skill_id, lang) not in self._replies:
+                self._replies[(skill_id, lang)] = deque(maxlen=self.size)
+            self._replies[(skill_id, lang)].append(conf or 0.0)
+
+    def may_beat(self, skill_id: str, lang: str, conf: float) -> bool:
+        """False only if the skill replied often enough and never above conf"""
+        with self._lock:
+            replies = list(self._replies.get((skill_id, lang), ()))
+        if len(replies) < self.min_samples:
+            return True
+        return max(replies) > conf
+
+    def serialize(self) -> dict:
+        with self._lock:
+            replies = {k: list(v) for k, v in self._replies.items()}
+        data = {}
+        for (skill_id, lang), confs in replies.items():
+            data.setdefault(skill_id, {})[lang] = {"replies": len(confs),
+                                                   "max_conf": max(confs)}
+        return data
+
+
 @dataclass
 class Query:
     session_id: str
     query: str
     lang: str
-    replies: list = None
-    extensions: list = None
-    queried_skills: list = None
+    replies: list = field(default_factory=list)
+    extensions: list = field(default_factory=list)
+    queried_skills: list = field(default_factory=list)
     query_time: float = 0
     timeout_time: float = 0
-    responses_gathered: Event = Event()
-    completed: Event = Event()
+    responses_gathered: Event = field(default_factory=Event)
+    completed: Event = field(default_factory=Event)
     answered: bool = False
     selected_skill: str = ""
+    gather: Optional[ScatterGather] = None
+    state: QueryState = QueryState.SEARCHING
+    timer: Optional[TimerHandle] = None  # next checkpoint, rearmed on extensions
+    timeout_msg: Message = None
+
+    @property
+    def query_id(self) -> str:
+        """correlation id carried in the context of every query message"""
+        return self.gather.gather_id
 
 
 class CommonQAService:
-    def __init__(self, bus):
+    def __init__(self, bus, skill_latency: Optional[SkillLatencyTracker] = None):
         self.bus = bus
         self.skill_id = "common_query.openvoiceos"  # fake skill
-        self.active_queries: Dict[str, Query] = dict()
+        self.active_queries: Dict[str, Query] = dict()  # query_id: Query
+        # latest query_id per session, for replies without a correlation id
+        self._session_queries: Dict[str, str] = dict()
+        self._lock = Lock()  # guards query state transitions
+        # checkpoints of every query, on a single thread
+        self._timers = TimerQueue("common_query_timers")
         self.enclosure = EnclosureAPI(self.bus, self.skill_id)
-        self._vocabs = {}
         self.common_query_skills = None
         config = Configuration().get('skills', {}).get("common_query") or dict()
         self._extension_time = config.get('extension_time') or 3
         CommonQAService._EXTENSION_TIME = self._extension_time
         self._min_wait = config.get('min_response_wait') or 2
         self._max_time = config.get('max_response_wait') or 6  # regardless of extensions
+        # answer as soon as a confident reply arrives if no pending skill
+        # ever answered better, instead of waiting for every skill
+        early_answer = config.get("early_answer") or {}
+        self._early_answer = early_answer.get("enabled", False)
+        self._early_conf = early_answer.get("min_conf", 0.8)
+        self.answer_history = AnswerHistory(early_answer.get("history", 50),
+                                            early_answer.get("min_samples", 5))
+        self.skill_latency = skill_latency or SkillLatencyTracker()
+        # answers to repeated questions, skills declare how long their
+        # answers stay valid in their pong or in the config, never cached by default
+        answer_cache = config.get("answer_cache") or {}
+        self._answer_ttls: Dict[str, float] = dict(answer_cache.get("skills") or {})
+        self._default_answer_ttl = answer_cache.get("ttl", 0)
+        self.answer_cache = MatchCache(answer_cache["size"]) \
+            if answer_cache.get("size") else None
+        self._pong_ttls: Dict[str, float] = {}
         self.untier = BM25MultipleChoiceSolver()  # TODO - allow plugin from config
         self.bus.on('question:query.response', self.handle_query_response)
         self.bus.on('common_query.question', self.handle_question)
         self.bus.on('ovos.common_query.pong', self.handle_skill_pong)
+        self.bus.on('detach_skill', self.handle_detach_skill)
         self.bus.emit(Message("ovos.common_query.ping"))  # gather any skills that already loaded
 
     def handle_skill_pong(self, message: Message):
@@ -59,6 +141,29 @@ class CommonQAService:
         if message.data["skill_id"] not in self.common_query_skills:
             self.common_query_skills.append(message.data["skill_id"])
             LOG.debug("Detected CommonQuery skill: " + message.data["skill_id"])
+        if message.data.get("cache_ttl") is not None:
+            self._pong_ttls[message.data["skill_id"]] = message.data["cache_ttl"]
+
+    def shutdown(self):
+        """stop the query timers, pending queries are no longer answered"""
+        self._timers.shutdown()
+
+    def handle_detach_skill(self, message: Message):
+        """ cached answers may point to a skill that is gone """
+        skill_id = (message.data.get("skill_id") or "").rstrip(":")
+        self._pong_ttls.pop(skill_id, None)
+        if self.answer_cache is not None and skill_id in (self.common_query_skills or []):
+            self.answer_cache.bump()
+
+    def answer_ttl(self, skill_id: str) -> float:
+        """seconds an answer of a skill can be reused, config takes precedence"""
+        if skill_id in self._answer_ttls:
+            return self._answer_ttls[skill_id]
+        return self._pong_ttls.get(skill_id, self._default_answer_ttl)
+
+    def _answer_cache_key(self, utterance: str, lang: str):
+        normalized = " ".join(re.sub(r"[^\w\s]", " ", utterance.lower()).split())
+        return self.answer_cache.make_key("common_query", [normalized], lang)
 
     def voc_match(self, utterance: str, voc_filename: str, lang: str,
                   exact: bool = False) -> bool:
@@ -80,24 +185,12 @@ class CommonQAService:
         Returns:
             bool: True if the utterance has the given vocabulary it
         """
-        match = False
-
-        if lang not in self._vocabs:
+        def load():
             resources = CoreResources(language=lang)
-            vocab = resources.load_vocabulary_file(voc_filename)
-            self._vocabs[lang] = list(chain(*vocab))
-
-        if utterance:
-            if exact:
-                # Check for exact match
-                match = any(i.strip() == utterance
-                            for i in self._vocabs[lang])
-            else:
-                # Check for matches against complete words
-                match = any([re.match(r'.*\b' + i + r'\b.*', utterance)
-                             for i in self._vocabs[lang]])
+            return chain(*resources.load_vocabulary_file(voc_filename))
 
-        return match
+        return get_voc_matcher(lang, voc_filename, load,
+                               source=CoreResources.__qualname__).match(utterance, exact)
 
     def is_question_like(self, utterance: str, lang: str):
         """
@@ -130,6 +223,10 @@ class CommonQAService:
         utterances = flatten_list(utterances)
         match = None
 
+        if ovos_core.intent_services.is_dry_run(message):
+            # answers are only known after asking the skills
+            return None
+
         # exit early if no common query skills are installed
         if not self.common_query_skills:
             from ovos_workshop.version import VERSION_BUILD, VERSION_ALPHA
@@ -165,39 +262,48 @@ class CommonQAService:
         """
         utt = message.data.get('utterance')
         sess = SessionManager.get(message)
-        query = Query(session_id=sess.session_id, query=utt, lang=sess.lang,
-                      replies=[], extensions=[],
-                      query_time=time.time(), timeout_time=time.time() + self._max_time,
-                      responses_gathered=Event(), completed=Event(),
-                      answered=False, queried_skills=[])
-        assert query.responses_gathered.is_set() is False
-        assert query.completed.is_set() is False
-        self.active_queries[sess.session_id] = query
-        self.enclosure.mouth_think()
-
-        LOG.info(f'Searching for {utt}')
-        # Send the query to anyone listening for them
         msg = message.reply('question:query', data={'phrase': utt})
         if "skill_id" not in msg.context:
             msg.context["skill_id"] = self.skill_id
+        # wait for every known CommonQuery skill, if unknown for the minimum wait
+        gather = ScatterGather(self.bus, None, expected=self.common_query_skills,
+                               timeout=self._max_time)
+        gather.tag(msg)
         # Define the timeout_msg here before any responses modify context
         timeout_msg = msg.response(msg.data)
-        self.bus.emit(msg)
 
-        while not query.responses_gathered.wait(0.1):
-            # forcefully timeout if search is still going
-            if time.time() > query.timeout_time:
-                if not query.completed.is_set():
-                    LOG.debug(f"Session Timeout gathering responses ({query.session_id})")
-                    LOG.warning(f"Timed out getting responses for: {query.query}")
-                    timeout = True
-                break
+        if self.answer_cache is not None:
+            hit, best = self.answer_cache.get(self._answer_cache_key(utt, sess.lang))
+            if hit:
+                LOG.info(f"Answering from cache with: {best['skill_id']}")
+                self.bus.emit(timeout_msg.reply('question:action',
+                                                data={**best, "phrase": utt}))
+                return True, best["skill_id"]
+
+        query = Query(session_id=sess.session_id, query=utt, lang=sess.lang,
+                      query_time=time.time(), timeout_time=time.time() + self._max_time,
+                      gather=gather, timeout_msg=timeout_msg)
+        self.active_queries[query.query_id] = query
+        self._session_queries[sess.session_id] = query.query_id
+        self.enclosure.mouth_think()
 
-        self._query_timeout(timeout_msg)
-        if not query.completed.wait(5):
-            raise TimeoutError("Timed out processing responses")
+        LOG.info(f'Searching for {utt}')
+        self._schedule(query)
+        # Send the query to anyone listening for them
+        self.bus.emit(msg)  # replies are fed by handle_query_response
+
+        # the last reply or the query timer completes the query
+        try:
+            while not query.completed.wait(query.gather.remaining + 5):
+                if not query.gather.remaining:
+                    raise TimeoutError("Timed out processing responses")
+        finally:
+            if query.timer is not None:
+                query.timer.cancel()
+            self.active_queries.pop(query.query_id, None)
+            if self._session_queries.get(sess.session_id) == query.query_id:
+                self._session_queries.pop(sess.session_id)
         answered = bool(query.answered)
-        self.active_queries.pop(sess.session_id)
         LOG.debug(f"answered={answered}|"
                   f"remaining active_queries={len(self.active_queries)}")
         return answered, query.selected_skill
@@ -208,46 +314,114 @@ class CommonQAService:
         searching = message.data.get('searching')
         answer = message.data.get('answer')
 
-        query = self.active_queries.get(SessionManager.get(message).session_id)
+        query = self._get_query(message)
         if not query:
             LOG.warning(f"Late answer received from {skill_id}, no active query for: {search_phrase}")
             return
 
-        # Manage requests for time to complete searches
-        if searching:
-            LOG.debug(f"{skill_id} is searching")
-            # request extending the timeout by EXTENSION_TIME
-            query.timeout_time = time.time() + self._extension_time
-            # TODO: Perhaps block multiple extensions?
-            if skill_id not in query.extensions:
-                query.extensions.append(skill_id)
-        else:
-            # Search complete, don't wait on this skill any longer
-            if answer:
-                LOG.info(f'Answer from {skill_id}')
-                query.replies.append(message.data)
-
-            query.queried_skills.append(skill_id)
-
-            # Remove the skill from list of timeout extensions
-            if skill_id in query.extensions:
-                LOG.debug(f"Done waiting for {skill_id}")
-                query.extensions.remove(skill_id)
-
-            # if all skills answered, stop searching
-            if self.common_query_skills is not None and set(query.queried_skills) == set(self.common_query_skills):
+        with self._lock:
+            if query.state != QueryState.SEARCHING:
+                LOG.warning(f"Late answer received from {skill_id}, "
+                            f"responses already gathered for: {search_phrase}")
+                return
+            # Manage requests for time to complete searches
+            if searching:
+                LOG.debug(f"{skill_id} is searching")
+                # request extending the timeout by EXTENSION_TIME
+                query.timeout_time = time.time() + self._extension_time
+                query.gather.set_deadline(self._extension_time)
+                # TODO: Perhaps block multiple extensions?
+                if skill_id not in query.extensions:
+                    query.extensions.append(skill_id)
+            else:
+                # Search complete, don't wait on this skill any longer
+                if answer:
+                    LOG.info(f'Answer from {skill_id}')
+                    query.replies.append(message.data)
+
+                query.queried_skills.append(skill_id)
+
+                # Remove the skill from list of timeout extensions
+                if skill_id in query.extensions:
+                    LOG.debug(f"Done waiting for {skill_id}")
+                    query.extensions.remove(skill_id)
+
+                query.gather.handle_reply(message)
+                if skill_id in query.gather.latencies:
+                    self.skill_latency.record(skill_id, "common_query",
+                                              query.gather.latencies[skill_id])
+                self.answer_history.record(skill_id, query.lang,
+                                           message.data.get("conf") if answer else None)
+
+        # never blocks, completes the query or moves its timer
+        self._advance(query)
+
+    def _schedule(self, query: Query):
+        """(re)arm the timer of a query for its next checkpoint"""
+        if query.timer is not None:
+            query.timer.cancel()
+        delay = query.gather.remaining
+        min_wait = query.query_time + self._min_wait - time.time()
+        if query.gather.expected is None and min_wait > 0:
+            # skills are unknown, check again once the minimum wait passed
+            delay = min(delay, min_wait)
+        query.timer = self._timers.call_later(delay, self._advance, query)
+
+    def _advance(self, query: Query):
+        """
+        Complete the query if there is nothing left to wait for, that is all
+        known skills answered, the deadline passed, or the skills are unknown
+        and none is searching after the minimum wait. Otherwise rearm its timer.
+        """
+        with self._lock:
+            if query.state != QueryState.SEARCHING:
+                return
+            if query.gather.done:
                 LOG.debug("All skills answered")
-                query.responses_gathered.set()
+            elif not query.gather.remaining:
+                if self.common_query_skills is not None:
+                    LOG.debug(f"Session Timeout gathering responses ({query.session_id})")
+                    LOG.warning(f"Timed out getting responses for: {query.query}")
+                elapsed = time.monotonic() - query.gather.started
+                for skill_id in query.gather.pending:
+                    self.skill_latency.record(skill_id, "common_query",
+                                              elapsed, timed_out=True)
+            elif self._can_answer_early(query):
+                LOG.debug(f"Answering early, skills {query.gather.pending} "
+                          f"never beat the best reply so far")
+            elif query.gather.expected is None and not query.extensions and \
+                    time.time() >= query.query_time + self._min_wait:
+                LOG.debug(f"Exiting early, no more skills to wait for session ({query.session_id})")
             else:
-                time_to_wait = (query.timeout_time - time.time())
-                if time_to_wait > 0:
-                    LOG.debug(f"Waiting up to {time_to_wait}s for other skills")
-                    query.responses_gathered.wait(time_to_wait)
-
-                # not waiting for any more skills
-                if not query.extensions and not query.responses_gathered.is_set():
-                    LOG.debug(f"Exiting early, no more skills to wait for session ({query.session_id})")
-                    query.responses_gathered.set()
+                self._schedule(query)
+                return
+            query.state = QueryState.SELECTING
+            query.timer.cancel()
+            query.responses_gathered.set()
+        self._query_timeout(query.timeout_msg)
+
+    def _can_answer_early(self, query: Query) -> bool:
+        """
+        True if the best reply so far is confident enough and none of the
+        skills still being waited on ever answered a question in this
+        language with a higher confidence
+        """
+        if not self._early_answer or query.gather.expected is None:
+            return False
+        best = max((r["conf"] for r in query.replies), default=None)
+        if best is None or best < self._early_conf:
+            return False
+        return not any(self.answer_history.may_beat(skill_id, query.lang, best)
+                       for skill_id in query.gather.pending)
+
+    def _get_query(self, message: Message) -> Optional[Query]:
+        """the active query a message belongs to"""
+        query_id = message.context.get(CORRELATION_KEY)
+        if query_id is None:
+            # skills not forwarding the message context, assume the latest
+            # question of the session
+            query_id = self._session_queries.get(SessionManager.get(message).session_id)
+        return self.active_queries.get(query_id)
 
     def _query_timeout(self, message: Message):
         """
@@ -257,7 +431,10 @@ class CommonQAService:
         handler can perform any additional actions.
         @param message: question:query.response Message with `phrase` data
         """
-        query = self.active_queries.get(SessionManager.get(message).session_id)
+        query = self._get_query(message)
+        if query is None:
+            LOG.debug("query already finished, nothing to answer")
+            return
         LOG.info(f'Check responses with {len(query.replies)} replies')
         search_phrase = message.data.get('phrase', "")
         if query.extensions:
@@ -288,8 +465,13 @@ class CommonQAService:
             LOG.info('Handling with: ' + str(best['skill_id']))
             query.selected_skill = best["skill_id"]
             response_data = {**best, "phrase": search_phrase}
+            ttl = self.answer_ttl(best["skill_id"])
+            if self.answer_cache is not None and ttl > 0:
+                self.answer_cache.put(self._answer_cache_key(query.query, query.lang),
+                                      best, ttl)
             self.bus.emit(message.reply('question:action', data=response_data))
             query.answered = True
         else:
             query.answered = False
+        query.state = QueryState.DONE
         query.completed.set()
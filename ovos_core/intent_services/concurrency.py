@@ -0,0 +1,194 @@
+"""Concurrency helpers for processing utterances of many sessions at once."""
+import heapq
+import itertools
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Condition, Lock, Thread
+from typing import Callable, List, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or a single writer.
+
+    Using the lock directly as a context manager acquires it for writing,
+    so it can replace a plain Lock that guarded modifications only.
+
+    >>> lock = ReadWriteLock()
+    >>> with lock.read():
+    ...     pass  # any number of threads may be here at once
+    >>> with lock:
+    ...     pass  # exclusive
+    """
+
+    def __init__(self):
+        self._cond = Condition(Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            # writers take precedence so registrations are not starved
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def __enter__(self):
+        self.acquire_write()
+
+    def __exit__(self, *args):
+        self.release_write()
+
+
+class SessionShardedExecutor:
+    """Run tasks on a fixed pool of single threaded workers, sharded by session.
+
+    Tasks of the same session always run on the same worker, in submission
+    order, while different sessions are processed in parallel.
+
+    Args:
+        workers (int): number of shards
+        name (str): thread name prefix
+    """
+
+    def __init__(self, workers: int = 4, name: str = "session_worker"):
+        self._shards = [ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix=f"{name}_{idx}")
+                        for idx in range(max(1, workers))]
+
+    def __len__(self):
+        return len(self._shards)
+
+    def shard_for(self, session_id: str) -> int:
+        """index of the worker handling a session"""
+        # crc32 is stable across processes, unlike hash()
+        return zlib.crc32(session_id.encode("utf-8")) % len(self._shards)
+
+    def submit(self, session_id: str, fn, *args, **kwargs) -> Future:
+        """schedule fn(*args, **kwargs) on the worker owning session_id"""
+        return self._shards[self.shard_for(session_id)].submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        for shard in self._shards:
+            shard.shutdown(wait=wait)
+
+
+class TimerHandle:
+    """A call scheduled on a TimerQueue"""
+
+    def __init__(self, callback: Callable, args: tuple = ()):
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """the call will not run, no-op if it already did"""
+        self.cancelled = True
+
+
+class TimerQueue:
+    """Run delayed calls from a single thread, ordered by deadline.
+
+    Replaces a threading.Timer per pending call, rearming a deadline is a
+    heap push instead of a new thread. Cancelled calls are dropped when
+    they come due. Calls run one after another, they must not block.
+
+    Args:
+        name (str): name of the thread, started on the first call
+    """
+
+    def __init__(self, name: str = "timer_queue"):
+        self.name = name
+        self._cond = Condition(Lock())
+        self._heap: List[Tuple[float, int, TimerHandle]] = []
+        self._counter = itertools.count()  # ties run in scheduling order
+        self._thread: Optional[Thread] = None
+        self._stopped = False
+
+    def call_later(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        """schedule callback(*args) in delay seconds"""
+        handle = TimerHandle(callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay),
+                                        next(self._counter), handle))
+            if self._thread is None:
+                self._stopped = False
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return handle
+
+    def _next(self) -> Optional[TimerHandle]:
+        """wait for the next call to come due, None once shut down"""
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                handle = heapq.heappop(self._heap)[2]
+                if not handle.cancelled:
+                    return handle
+            return None
+
+    def _run(self):
+        while True:
+            handle = self._next()
+            if handle is None:
+                return
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                LOG.exception(f"timer callback failed: {e}")
+
+    def shutdown(self):
+        """drop pending calls and stop the thread"""
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            thread, self._thread = self._thread, None
+            self._cond.notify_all()
+        if thread is not None and thread.is_alive():
+            thread.join(1)
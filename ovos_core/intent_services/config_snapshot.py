@@ -0,0 +1,181 @@
+"""Immutable snapshot of the configuration read on every utterance."""
+from dataclasses import dataclass, field
+from threading import Lock
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Tuple
+from weakref import WeakSet
+
+from ovos_config.config import Configuration
+from ovos_utils.log import LOG
+from ovos_workshop.permissions import ConverseMode, ConverseActivationMode
+
+# bus messages after which ovos_config serves a different configuration
+UPDATE_EVENTS = ("configuration.updated",
+                 "configuration.patch",
+                 "configuration.patch.clear",
+                 "configuration.cache.clear")
+
+# snapshots following the configuration files, marked stale by a single
+# watcher registered with Configuration the first time one is created
+_watched_snapshots: "WeakSet[ConfigSnapshot]" = WeakSet()
+_watcher_lock = Lock()
+
+
+def _config_files_changed(*args):
+    """Configuration reloaded a file edited on disk"""
+    for snapshot in list(_watched_snapshots):
+        snapshot.mark_stale()
+
+
+def _watch_config_files(snapshot: "ConfigSnapshot"):
+    with _watcher_lock:
+        if not _watched_snapshots:
+            # ovos_config ignores a callback it already has
+            Configuration.set_config_watcher(_config_files_changed)
+        _watched_snapshots.add(snapshot)
+
+
+def _frozen(value: Optional[Mapping] = None) -> Mapping:
+    return MappingProxyType(dict(value or {}))
+
+
+@dataclass(frozen=True)
+class ConverseConfig:
+    """"skills.converse" section of mycroft.conf"""
+    raw: Mapping = field(default_factory=_frozen)
+    timeout: float = 300
+    skill_timeouts: Mapping[str, float] = field(default_factory=_frozen)
+    cross_activation: bool = False
+    converse_mode: str = ConverseMode.ACCEPT_ALL
+    converse_activation: str = ConverseActivationMode.ACCEPT_ALL
+    converse_priorities: Mapping[str, int] = field(default_factory=_frozen)
+    converse_blacklist: Tuple[str, ...] = ()
+    converse_whitelist: Tuple[str, ...] = ()
+    max_activations: int = -1
+    skill_activations: Mapping[str, int] = field(default_factory=_frozen)
+    ping_timeout: float = 0.5
+    parallel: bool = False
+    parallel_timeout: float = 3.0
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping]) -> "ConverseConfig":
+        config = config or {}
+        return cls(raw=_frozen(config),
+                   timeout=config.get("timeout", 300),
+                   skill_timeouts=_frozen(config.get("skill_timeouts")),
+                   cross_activation=bool(config.get("cross_activation")),
+                   converse_mode=config.get("converse_mode", ConverseMode.ACCEPT_ALL),
+                   converse_activation=config.get("converse_activation") or
+                                       ConverseActivationMode.ACCEPT_ALL,
+                   converse_priorities=_frozen(config.get("converse_priorities")),
+                   converse_blacklist=tuple(config.get("converse_blacklist") or ()),
+                   converse_whitelist=tuple(config.get("converse_whitelist") or ()),
+                   max_activations=config.get("max_activations", -1),
+                   skill_activations=_frozen(config.get("skill_activations")),
+                   ping_timeout=config.get("ping_timeout", 0.5),
+                   parallel=bool(config.get("parallel")),
+                   parallel_timeout=config.get("parallel_timeout", 3.0))
+
+
+@dataclass(frozen=True)
+class StopConfig:
+    """"skills.stop" section of mycroft.conf"""
+    raw: Mapping = field(default_factory=_frozen)
+    min_conf: float = 0.5
+    ping_timeout: float = 0.5
+    parallel: bool = False
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping]) -> "StopConfig":
+        config = config or {}
+        return cls(raw=_frozen(config),
+                   min_conf=config.get("min_conf", 0.5),
+                   ping_timeout=config.get("ping_timeout", 0.5),
+                   parallel=bool(config.get("parallel")))
+
+
+@dataclass(frozen=True)
+class IntentServiceConfig:
+    """The configuration values read while handling an utterance"""
+    converse: ConverseConfig = field(default_factory=ConverseConfig)
+    stop: StopConfig = field(default_factory=StopConfig)
+    error_sound: str = "snd/error.mp3"
+
+    @classmethod
+    def from_config(cls, config: Mapping) -> "IntentServiceConfig":
+        skills = config.get("skills") or {}
+        return cls(converse=ConverseConfig.from_config(skills.get("converse")),
+                   stop=StopConfig.from_config(skills.get("stop")),
+                   error_sound=(config.get("sounds") or {}).get("error", "snd/error.mp3"))
+
+
+class ConfigSnapshot:
+    """Typed configuration snapshot, rebuilt only when the configuration changes.
+
+    Each Configuration() call merges every configuration file, hot paths read
+    the attributes of `current` instead. The snapshot is marked stale when
+    ovos_config announces a change on the bus or when a configuration file
+    changes on disk, and rebuilt the next time it is read, by then
+    Configuration applied the change itself. refresh rebuilds it right away.
+
+    Args:
+        bus: messagebus connection, if None the snapshot is only refreshed manually
+        config (dict): configuration to use instead of Configuration()
+    """
+
+    def __init__(self, bus=None, config: Optional[Mapping] = None):
+        self.bus = bus
+        self._config = config
+        self._callbacks: List[Callable[[IntentServiceConfig], None]] = []
+        self._lock = Lock()
+        self._stale = False
+        self._current = self._load()
+        if bus is not None:
+            for msg_type in UPDATE_EVENTS:
+                bus.on(msg_type, self.handle_config_update)
+            if config is None:
+                _watch_config_files(self)
+
+    def _load(self) -> IntentServiceConfig:
+        config = self._config if self._config is not None else Configuration()
+        return IntentServiceConfig.from_config(config)
+
+    @property
+    def current(self) -> IntentServiceConfig:
+        """the snapshot, rebuilt first if the configuration changed"""
+        if self._stale:
+            self.refresh()
+        return self._current
+
+    def on_change(self, callback: Callable[[IntentServiceConfig], None]):
+        """call callback with the new snapshot whenever it changes"""
+        self._callbacks.append(callback)
+
+    def mark_stale(self):
+        """rebuild the snapshot the next time it is read"""
+        self._stale = True
+
+    def handle_config_update(self, message):
+        """the configuration changed on the bus"""
+        self.mark_stale()
+
+    def shutdown(self):
+        """stop following configuration changes"""
+        if self.bus is not None:
+            for msg_type in UPDATE_EVENTS:
+                self.bus.remove(msg_type, self.handle_config_update)
+        _watched_snapshots.discard(self)
+
+    def refresh(self, message=None):
+        """rebuild the snapshot, callbacks are only called if it changed"""
+        with self._lock:
+            self._stale = False
+            snapshot = self._load()
+            if snapshot == self._current:
+                return
+            self._current = snapshot
+        for callback in self._callbacks:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                LOG.exception(f"config change callback failed: {e}")
@@ -1,8 +1,7 @@
-import time
-from threading import Event
+from threading import RLock
+from typing import Optional
 from ovos_bus_client.message import Message
 from ovos_bus_client.session import SessionManager, UtteranceState
-from ovos_config.config import Configuration
 from ovos_config.locale import setup_locale
 from ovos_utils import flatten_list
 from ovos_utils.log import LOG
@@ -10,14 +9,29 @@ from ovos_bus_client.util import get_message_lang
 from ovos_workshop.permissions import ConverseMode, ConverseActivationMode
 
 import ovos_core.intent_services
+from ovos_core.intent_services.active_skills import ActivationCounter, ActiveSkillsCache, \
+    expire_active_skills
+from ovos_core.intent_services.capabilities import SkillCapabilities
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot, ConverseConfig
+from ovos_core.intent_services.scatter_gather import ScatterGather
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
 
 
 class ConverseService:
     """Intent Service handling conversational skills."""
 
-    def __init__(self, bus):
+    def __init__(self, bus, capabilities: Optional[SkillCapabilities] = None,
+                 skill_latency: Optional[SkillLatencyTracker] = None,
+                 active_skills_cache: Optional[ActiveSkillsCache] = None,
+                 config_snapshot: Optional[ConfigSnapshot] = None):
         self.bus = bus
-        self._consecutive_activations = {}
+        self.config_snapshot = config_snapshot or ConfigSnapshot(bus)
+        self.capabilities = capabilities
+        self.skill_latency = skill_latency or SkillLatencyTracker()
+        self.active_skills_cache = active_skills_cache or ActiveSkillsCache()
+        # consecutive activations per session, for max_activations
+        self.activations = ActivationCounter()
+        self._activations_lock = RLock()  # utterances are handled concurrently
         self.bus.on('mycroft.speech.recognition.unknown', self.reset_converse)
         self.bus.on('intent.service.skills.deactivate', self.handle_deactivate_skill_request)
         self.bus.on('intent.service.skills.activate', self.handle_activate_skill_request)
@@ -32,7 +46,12 @@ class ConverseService:
         Returns:
             converse_config (dict): config for converse handling options
         """
-        return Configuration().get("skills", {}).get("converse") or {}
+        return dict(self.settings.raw)
+
+    @property
+    def settings(self) -> ConverseConfig:
+        """typed converse config, only rebuilt when the configuration changes"""
+        return self.config_snapshot.current.converse
 
     @property
     def active_skills(self):
@@ -53,8 +72,7 @@ class ConverseService:
         Returns:
             active_skills (list): ordered list of skill_ids
         """
-        session = SessionManager.get(message)
-        return [skill[0] for skill in session.active_skills]
+        return self.active_skills_cache.get(message)
 
     def deactivate_skill(self, skill_id, source_skill=None, message=None):
         """Remove a skill from being targetable by converse.
@@ -77,8 +95,7 @@ class ConverseService:
                 self.bus.emit(
                     message.forward("intent.service.skills.deactivated",
                                     data={"skill_id": skill_id}))
-                if skill_id in self._consecutive_activations:
-                    self._consecutive_activations[skill_id] = 0
+                self.activations.reset(session.session_id, skill_id)
 
     def activate_skill(self, skill_id, source_skill=None, message=None):
         """Add a skill or update the position of an active skill.
@@ -91,9 +108,14 @@ class ConverseService:
             source_skill (str): skill requesting the removal
         """
         source_skill = source_skill or skill_id
-        if self._activate_allowed(skill_id, source_skill):
+        session = SessionManager.get(message)
+        with self._activations_lock:
+            allowed = self._activate_allowed(skill_id, source_skill, message)
+            if allowed:
+                # update activation counter
+                self.activations.increment(session.session_id, skill_id)
+        if allowed:
             # update converse session
-            session = SessionManager.get(message)
             session.activate_skill(skill_id)
 
             # keep message.context
@@ -103,10 +125,8 @@ class ConverseService:
                                       {"skill_id": skill_id})
             # send bus event
             self.bus.emit(message)
-            # update activation counter
-            self._consecutive_activations[skill_id] += 1
 
-    def _activate_allowed(self, skill_id, source_skill=None):
+    def _activate_allowed(self, skill_id, source_skill=None, message=None):
         """Checks if a skill_id is allowed to jump to the front of active skills list
 
         - can a skill activate a different skill
@@ -117,13 +137,15 @@ class ConverseService:
         Args:
             skill_id (str): identifier of skill to be added.
             source_skill (str): skill requesting the removal
+            message (Message): message carrying the session
 
         Returns:
             permitted (bool): True if skill can be activated
         """
 
+        settings = self.settings
         # cross activation control if skills can activate each other
-        if not self.config.get("cross_activation"):
+        if not settings.cross_activation:
             source_skill = source_skill or skill_id
             if skill_id != source_skill:
                 # different skill is trying to activate this skill
@@ -131,36 +153,34 @@ class ConverseService:
 
         # mode of activation dictates under what conditions a skill is
         # allowed to activate itself
-        acmode = self.config.get("converse_activation") or \
-                 ConverseActivationMode.ACCEPT_ALL
+        acmode = settings.converse_activation
         if acmode == ConverseActivationMode.PRIORITY:
-            prio = self.config.get("converse_priorities") or {}
+            prio = settings.converse_priorities
             # only allowed to activate if no skill with higher priority is
             # active, currently there is no api for skills to
             # define their default priority, this is a user/developer setting
             priority = prio.get(skill_id, 50)
             if any(p > priority for p in
-                   [prio.get(s, 50) for s in self.get_active_skills()]):
+                   [prio.get(s, 50) for s in self.get_active_skills(message)]):
                 return False
         elif acmode == ConverseActivationMode.BLACKLIST:
-            if skill_id in self.config.get("converse_blacklist", []):
+            if skill_id in settings.converse_blacklist:
                 return False
         elif acmode == ConverseActivationMode.WHITELIST:
-            if skill_id not in self.config.get("converse_whitelist", []):
+            if skill_id not in settings.converse_whitelist:
                 return False
 
         # limit of consecutive activations
-        default_max = self.config.get("max_activations", -1)
+        default_max = settings.max_activations
         # per skill override limit of consecutive activations
-        skill_max = self.config.get("skill_activations", {}).get(skill_id)
+        skill_max = settings.skill_activations.get(skill_id)
         max_activations = skill_max or default_max
-        if skill_id not in self._consecutive_activations:
-            self._consecutive_activations[skill_id] = 0
         if max_activations < 0:
             pass  # no limit (mycroft-core default)
         elif max_activations == 0:
             return False  # skill activation disabled
-        elif self._consecutive_activations.get(skill_id, 0) > max_activations:
+        elif self.activations.get(SessionManager.get(message).session_id,
+                                  skill_id) > max_activations:
             return False  # skill exceeded authorized consecutive number of activations
         return True
 
@@ -177,7 +197,7 @@ class ConverseService:
             permitted (bool): True if skill can be deactivated
         """
         # cross activation control if skills can deactivate each other
-        if not self.config.get("cross_activation"):
+        if not self.settings.cross_activation:
             source_skill = source_skill or skill_id
             if skill_id != source_skill:
                 # different skill is trying to deactivate this skill
@@ -196,13 +216,13 @@ class ConverseService:
         Returns:
             permitted (bool): True if skill can converse
         """
-        opmode = self.config.get("converse_mode",
-                                 ConverseMode.ACCEPT_ALL)
+        settings = self.settings
+        opmode = settings.converse_mode
         if opmode == ConverseMode.BLACKLIST and skill_id in \
-                self.config.get("converse_blacklist", []):
+                settings.converse_blacklist:
             return False
         elif opmode == ConverseMode.WHITELIST and skill_id not in \
-                self.config.get("converse_whitelist", []):
+                settings.converse_whitelist:
             return False
         return True
 
@@ -211,57 +231,51 @@ class ConverseService:
         This includes all skills and external applications"""
         session = SessionManager.get(message)
 
-        skill_ids = []
         # include all skills in get_response state
         want_converse = [skill_id for skill_id, state in session.utterance_states.items()
                          if state == UtteranceState.RESPONSE]
-        skill_ids += want_converse # dont wait for these pong answers (optimization)
 
-        active_skills = self.get_active_skills()
+        # skip skills that repeatedly did not answer the ping
+        active_skills = self.skill_latency.available(self.get_active_skills(message),
+                                                     "converse.ping")
 
         if not active_skills:
             return want_converse
 
-        event = Event()
-
-        def handle_ack(msg):
-            nonlocal event
-            skill_id = msg.data["skill_id"]
-
-            # validate the converse pong
-            if all((skill_id not in want_converse,
-                   msg.data.get("can_handle", True),
-                   skill_id in active_skills)):
-                want_converse.append(skill_id)
-
-            if skill_id not in skill_ids: # track which answer we got
-                skill_ids.append(skill_id)
-
-            if all(s in skill_ids for s in active_skills):
-                # all skills answered the ping!
-                event.set()
-
-        self.bus.on("skill.converse.pong", handle_ack)
-
-        # ask skills if they want to converse
-        for skill_id in active_skills:
-            self.bus.emit(message.forward(f"{skill_id}.converse.ping",
-                                          {"skill_id": skill_id}))
-
-        # wait for all skills to acknowledge they want to converse
-        event.wait(timeout=0.5)
-
-        self.bus.remove("skill.converse.pong", handle_ack)
+        # dont ping skills that advertised if they want to converse
+        if self.capabilities is not None:
+            eligible, unknown = self.capabilities.partition(active_skills, "converse")
+        else:
+            eligible, unknown = [], active_skills
+        want_converse += [s for s in eligible if s not in want_converse]
+
+        if unknown:
+            # ask skills if they want to converse and wait for all of them to acknowledge
+            # dont wait for pong answers of skills in get_response state (optimization)
+            expected = [s for s in unknown if s not in want_converse]
+            timeout = self.skill_latency.gather_deadline(expected, "converse.ping",
+                                                         self.settings.ping_timeout)
+            gather = ScatterGather(self.bus, "skill.converse.pong", expected=expected,
+                                   timeout=timeout)
+            replies = gather.gather(*[message.forward(f"{skill_id}.converse.ping",
+                                                      {"skill_id": skill_id})
+                                      for skill_id in unknown])
+            self.skill_latency.record_gather(gather, "converse.ping")
+
+            # validate the converse pongs
+            want_converse += [skill_id for skill_id, msg in replies.items()
+                              if skill_id not in want_converse
+                              and msg.data.get("can_handle", True)
+                              and skill_id in active_skills]
         return want_converse
 
     def _check_converse_timeout(self, message):
         """ filter active skill list based on timestamps """
-        timeouts = self.config.get("skill_timeouts") or {}
-        def_timeout = self.config.get("timeout", 300)
+        settings = self.settings
         session = SessionManager.get(message)
-        session.active_skills = [
-            skill for skill in session.active_skills
-            if time.time() - skill[1] <= timeouts.get(skill[0], def_timeout)]
+        if expire_active_skills(session, settings.skill_timeouts, settings.timeout) \
+                and message is not None:
+            message.context["session"] = session.serialize()  # update session active skills
 
     def converse(self, utterances, skill_id, lang, message):
         """Call skill and ask if they want to process the utterance.
@@ -287,12 +301,14 @@ class ConverseService:
             self.bus.emit(converse_msg)
             return True
 
-        if self._converse_allowed(skill_id):
+        if self._converse_allowed(skill_id) and \
+                self.skill_latency.is_available(skill_id, "converse"):
             converse_msg = message.reply(f"{skill_id}.converse.request",
                                          {"utterances": utterances,
                                           "lang": lang})
-            result = self.bus.wait_for_response(converse_msg,
-                                                'skill.converse.response')
+            result = self.skill_latency.wait_for_response(self.bus, converse_msg,
+                                                          'skill.converse.response',
+                                                          skill_id, "converse")
             if result and 'error' in result.data:
                 error_msg = result.data['error']
                 LOG.error(f"{skill_id}: {error_msg}")
@@ -301,6 +317,70 @@ class ConverseService:
                 return result.data.get('result', False)
         return False
 
+    def _parallel_converse(self, skill_ids, utterances, lang, message):
+        """Ask all skills to converse at once.
+
+        The highest priority skill that handled the utterance is picked as
+        soon as every skill before it answered, skills after it and skills
+        that did not answer are told they lost, so they can discard state.
+
+        Args:
+            skill_ids (list): skills that want to converse, in priority order
+
+        Returns:
+            skill_id of the selected skill, None if no skill handled it
+        """
+        session = SessionManager.get(message)
+        session.lang = lang
+
+        # a skill waiting for a response gets the utterance unless a skill
+        # before it handles it, skills after it are never asked
+        response_skill = next((s for s in skill_ids if session.utterance_states.get(
+            s, UtteranceState.INTENT) == UtteranceState.RESPONSE), None)
+        if response_skill is not None:
+            skill_ids = skill_ids[:skill_ids.index(response_skill)]
+        skill_ids = [s for s in skill_ids if self._converse_allowed(s)
+                     and self.skill_latency.is_available(s, "converse")]
+
+        def handled(reply):
+            if 'error' in reply.data:
+                LOG.error(f"{reply.data.get('skill_id')}: {reply.data['error']}")
+                return False
+            return reply.data.get('result', False)
+
+        def first_known(replies):
+            for skill_id in skill_ids:
+                if skill_id not in replies:
+                    return False  # a higher priority skill may still handle it
+                if handled(replies[skill_id]):
+                    return True
+            return False
+
+        winner = None
+        if skill_ids:
+            timeout = self.skill_latency.gather_deadline(skill_ids, "converse",
+                                                         self.settings.parallel_timeout)
+            gather = ScatterGather(self.bus, "skill.converse.response",
+                                   expected=skill_ids, timeout=timeout, until=first_known)
+            replies = gather.gather(*[message.reply(f"{skill_id}.converse.request",
+                                                    {"utterances": utterances,
+                                                     "lang": lang})
+                                      for skill_id in skill_ids])
+            self.skill_latency.record_gather(gather, "converse")
+            winner = next((s for s in skill_ids
+                           if s in replies and handled(replies[s])), None)
+            for skill_id in skill_ids:
+                if skill_id != winner and (skill_id not in replies or
+                                           handled(replies[skill_id])):
+                    self.bus.emit(message.reply(f"{skill_id}.converse.abort",
+                                                {"skill_id": skill_id,
+                                                 "selected_skill": winner}))
+
+        if winner is None and response_skill is not None:
+            if self.converse(utterances, response_skill, lang, message):
+                winner = response_skill
+        return winner
+
     def converse_with_skills(self, utterances, lang, message):
         """Give active skills a chance at the utterance
 
@@ -313,11 +393,20 @@ class ConverseService:
             IntentMatch if handled otherwise None.
         """
         # we call flatten in case someone is sending the old style list of tuples
-        utterances = flatten_list(utterances)
+        utterances = list(flatten_list(utterances))
+        if ovos_core.intent_services.is_dry_run(message):
+            # only the skills know if they want the utterance
+            return None
         # filter allowed skills
         self._check_converse_timeout(message)
         # check if any skill wants to handle utterance
-        for skill_id in self._collect_converse_skills(message):
+        skill_ids = self._collect_converse_skills(message)
+        if self.settings.parallel:
+            skill_id = self._parallel_converse(skill_ids, utterances, lang, message)
+            if skill_id:
+                return ovos_core.intent_services.IntentMatch('Converse', None, None, skill_id, utterances[0])
+            return None
+        for skill_id in skill_ids:
             if self.converse(utterances, skill_id, lang, message):
                 return ovos_core.intent_services.IntentMatch('Converse', None, None, skill_id, utterances[0])
         return None
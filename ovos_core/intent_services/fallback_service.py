@@ -15,14 +15,21 @@
 """Intent service for Mycroft's fallback system."""
 import operator
 from collections import namedtuple
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+from uuid import uuid4
 
-import time
+from ovos_bus_client.message import Message
 from ovos_config import Configuration
 
 import ovos_core.intent_services
+from ovos_core.intent_services.capabilities import SkillCapabilities
+from ovos_core.intent_services.scatter_gather import ScatterGather
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
+from ovos_core.intent_services.stats import PipelineStats
 from ovos_utils import flatten_list
 from ovos_utils.log import LOG
-from ovos_workshop.skills.fallback import FallbackMode
+from ovos_utils.metrics import Stopwatch
+from ovos_workshop.skills.fallback import FallbackMode, FallbackSkillV1
 
 FallbackRange = namedtuple('FallbackRange', ['start', 'stop'])
 
@@ -30,12 +37,33 @@ FallbackRange = namedtuple('FallbackRange', ['start', 'stop'])
 class FallbackService:
     """Intent Service handling fallback skills."""
 
-    def __init__(self, bus):
+    def __init__(self, bus, capabilities: Optional[SkillCapabilities] = None,
+                 skill_latency: Optional[SkillLatencyTracker] = None,
+                 stats: Optional[PipelineStats] = None):
         self.bus = bus
+        self.capabilities = capabilities
+        self.skill_latency = skill_latency or SkillLatencyTracker()
+        self.stats = stats or PipelineStats()
         self.fallback_config = Configuration()["skills"].get("fallbacks", {})
         self.registered_fallbacks = {}  # skill_id: priority
+        # host_id: priorities of the FallbackSkillV1 handlers it answers for
+        self.v1_fallbacks: Dict[str, Tuple[int, ...]] = {}
+        # host_id: skills loaded in the process of that host
+        self.v1_host_skills: Dict[str, FrozenSet[str]] = {}
+        # every skill loaded in any process, hosts must report all of them
+        self.loaded_skills: Set[str] = set()
+        # skills supporting the prepare/commit handshake, see _parallel_fallback
+        self.prepare_fallbacks = set()
         self.bus.on("ovos.skills.fallback.register", self.handle_register_fallback)
         self.bus.on("ovos.skills.fallback.deregister", self.handle_deregister_fallback)
+        self.bus.on("ovos.skills.fallback.v1.register", self.handle_register_v1_host)
+        self.bus.on("ovos.skills.fallback.v1.deregister", self.handle_deregister_v1_host)
+        self.bus.on("mycroft.skills.loaded", self.handle_skill_loaded)
+        self.bus.on("mycroft.skills.shutdown", self.handle_skill_shutdown)
+        self.bus.on("mycroft.skills.list", self.handle_skill_list)
+        # hosts and skills started before us announce themselves again
+        self.bus.emit(Message("ovos.skills.fallback.v1.list"))
+        self.bus.emit(Message("skillmanager.list"))
 
     def handle_register_fallback(self, message):
         skill_id = message.data.get("skill_id")
@@ -49,11 +77,39 @@ class FallbackService:
             self.registered_fallbacks[skill_id] = new_priority
         else:
             self.registered_fallbacks[skill_id] = priority
+        if message.data.get("prepare"):
+            self.prepare_fallbacks.add(skill_id)
+        else:
+            self.prepare_fallbacks.discard(skill_id)
 
     def handle_deregister_fallback(self, message):
         skill_id = message.data.get("skill_id")
         if skill_id in self.registered_fallbacks:
             self.registered_fallbacks.pop(skill_id)
+        self.prepare_fallbacks.discard(skill_id)
+
+    def handle_register_v1_host(self, message):
+        """a process answering mycroft.skills.fallback advertised its handlers"""
+        host_id = message.data.get("host_id")
+        if host_id:
+            self.v1_fallbacks[host_id] = tuple(message.data.get("priorities") or ())
+            self.v1_host_skills[host_id] = frozenset(message.data.get("skill_ids") or ())
+
+    def handle_deregister_v1_host(self, message):
+        self.v1_fallbacks.pop(message.data.get("host_id"), None)
+        self.v1_host_skills.pop(message.data.get("host_id"), None)
+
+    def handle_skill_loaded(self, message):
+        if message.data.get("id"):
+            self.loaded_skills.add(message.data["id"])
+
+    def handle_skill_shutdown(self, message):
+        self.loaded_skills.discard(message.data.get("id"))
+
+    def handle_skill_list(self, message):
+        """skills loaded before this service started"""
+        self.loaded_skills.update(skill_id for skill_id, info in message.data.items()
+                                  if isinstance(info, dict) and info.get("active", True))
 
     def _fallback_allowed(self, skill_id):
         """Checks if a skill_id is allowed to fallback
@@ -79,37 +135,40 @@ class FallbackService:
     def _collect_fallback_skills(self, message, fb_range=FallbackRange(0, 100)):
         """use the messagebus api to determine which skills have registered fallback handlers
         This includes all skills and external applications"""
-        skill_ids = []  # skill_ids that already answered to ping
-        fallback_skills = []  # skill_ids that want to handle fallback
-
         # filter skills outside the fallback_range
         in_range = [s for s, p in self.registered_fallbacks.items()
                     if fb_range.start < p <= fb_range.stop]
-        skill_ids += [s for s in self.registered_fallbacks if s not in in_range]
+        # skip skills that repeatedly did not answer, advertised or not
+        in_range = self.skill_latency.available(in_range, "fallback.ping")
 
         def handle_ack(msg):
             skill_id = msg.data["skill_id"]
             if msg.data.get("can_handle", True):
-                if skill_id in self.registered_fallbacks:
-                    fallback_skills.append(skill_id)
                 LOG.info(f"{skill_id} will try to handle fallback")
             else:
                 LOG.info(f"{skill_id} will NOT try to handle fallback")
-            skill_ids.append(skill_id)
 
-        self.bus.on("ovos.skills.fallback.pong", handle_ack)
+        # only ping if some skills did not advertise if they handle fallbacks
+        if self.capabilities is not None:
+            eligible, unknown = self.capabilities.partition(in_range, "fallback")
+        else:
+            eligible, unknown = [], in_range
+        if not unknown:
+            return eligible
 
         LOG.info("checking for FallbackSkillsV2 candidates")
         # wait for all skills to acknowledge they want to answer fallback queries
-        self.bus.emit(message.forward("ovos.skills.fallback.ping",
-                                      message.data))
-        start = time.time()
-        while not all(s in skill_ids for s in self.registered_fallbacks) \
-                and time.time() - start <= 0.5:
-            time.sleep(0.02)
-
-        self.bus.remove("ovos.skills.fallback.pong", handle_ack)
-        return fallback_skills
+        timeout = self.skill_latency.gather_deadline(unknown, "fallback.ping",
+                                                     self.fallback_config.get("ping_timeout", 0.5))
+        gather = ScatterGather(self.bus, "ovos.skills.fallback.pong",
+                               expected=unknown, timeout=timeout,
+                               on_reply=handle_ack)
+        replies = gather.gather(message.forward("ovos.skills.fallback.ping",
+                                                message.data))
+        self.skill_latency.record_gather(gather, "fallback.ping")
+        return eligible + [skill_id for skill_id, msg in replies.items()
+                           if skill_id in unknown
+                           and msg.data.get("can_handle", True)]
 
     def attempt_fallback(self, utterances, skill_id, lang, message):
         """Call skill and ask if they want to process the utterance.
@@ -124,14 +183,16 @@ class FallbackService:
         Returns:
             handled (bool): True if handled otherwise False.
         """
-        if self._fallback_allowed(skill_id):
+        if self._fallback_allowed(skill_id) and \
+                self.skill_latency.is_available(skill_id, "fallback"):
             fb_msg = message.reply(f"ovos.skills.fallback.{skill_id}.request",
                                    {"skill_id": skill_id,
                                     "utterances": utterances,
                                     "utterance": utterances[0],  # backwards compat, we send all transcripts now
                                     "lang": lang})
-            result = self.bus.wait_for_response(fb_msg,
-                                                f"ovos.skills.fallback.{skill_id}.response")
+            result = self.skill_latency.wait_for_response(
+                self.bus, fb_msg, f"ovos.skills.fallback.{skill_id}.response",
+                skill_id, "fallback")
             if result and 'error' in result.data:
                 error_msg = result.data['error']
                 LOG.error(f"{skill_id}: {error_msg}")
@@ -140,6 +201,100 @@ class FallbackService:
                 return result.data.get('result', False)
         return False
 
+    def _prepare_fallbacks(self, skill_ids, utterances, lang, message):
+        """Ask skills at once if they would handle the utterance, without side effects.
+
+        The wait ends as soon as the highest priority skill that can handle
+        it is known, ie. it answered True and every skill before it answered.
+
+        Args:
+            skill_ids (list): skills supporting prepare, in priority order
+
+        Returns:
+            dict of skill_id: prepare reply
+        """
+        def best_known(replies):
+            for skill_id in skill_ids:
+                if skill_id not in replies:
+                    return False  # a higher priority skill may still accept
+                if replies[skill_id].data.get("result"):
+                    return True
+            return False
+
+        timeout = self.skill_latency.gather_deadline(skill_ids, "fallback.prepare",
+                                                     self.fallback_config.get("prepare_timeout", 1.0))
+        gather = ScatterGather(self.bus, "ovos.skills.fallback.prepare.response",
+                               expected=skill_ids, timeout=timeout, until=best_known)
+        replies = gather.gather(*[message.reply(f"ovos.skills.fallback.{skill_id}.prepare",
+                                                {"skill_id": skill_id,
+                                                 "utterances": utterances,
+                                                 "utterance": utterances[0],
+                                                 "lang": lang})
+                                  for skill_id in skill_ids])
+        self.skill_latency.record_gather(gather, "fallback.prepare")
+        return replies
+
+    def _commit_fallback(self, skill_id, message):
+        """Tell a prepared skill to handle the utterance.
+
+        Returns:
+            handled (bool): True if handled otherwise False.
+        """
+        commit_msg = message.reply(f"ovos.skills.fallback.{skill_id}.commit",
+                                   {"skill_id": skill_id})
+        result = self.skill_latency.wait_for_response(
+            self.bus, commit_msg, f"ovos.skills.fallback.{skill_id}.response",
+            skill_id, "fallback")
+        if result and 'error' in result.data:
+            LOG.error(f"{skill_id}: {result.data['error']}")
+            return False
+        return result is not None and result.data.get('result', False)
+
+    def _parallel_fallback(self, skill_ids, utterances, lang, message):
+        """Try fallback skills in priority order, preparing them in parallel.
+
+        Skills that registered with prepare=True are asked at once with
+        ovos.skills.fallback.<skill_id>.prepare and answer
+        ovos.skills.fallback.prepare.response with "result" without running
+        their handler. The highest priority skill that accepted then gets
+        ovos.skills.fallback.<skill_id>.commit and runs it, every other
+        prepared skill gets ovos.skills.fallback.<skill_id>.abort.
+        Skills without prepare support get a regular request when their
+        turn comes, so the priority order is respected across both.
+
+        Args:
+            skill_ids (list): candidate skills, in priority order
+
+        Returns:
+            skill_id that handled the utterance, None if unhandled
+        """
+        skill_ids = [s for s in skill_ids if self._fallback_allowed(s) and
+                     self.skill_latency.is_available(s, "fallback")]
+        # skills that timed out preparing are left out until their cooldown passed
+        prepared = [s for s in skill_ids if s in self.prepare_fallbacks and
+                    self.skill_latency.is_available(s, "fallback.prepare")]
+        replies = self._prepare_fallbacks(prepared, utterances, lang, message) \
+            if prepared else {}
+
+        handler = None
+        for skill_id in skill_ids:
+            if skill_id in self.prepare_fallbacks:
+                reply = replies.get(skill_id)
+                if reply is None or not reply.data.get("result"):
+                    continue
+                handled = self._commit_fallback(skill_id, message)
+            else:
+                handled = self.attempt_fallback(utterances, skill_id, lang, message)
+            if handled:
+                handler = skill_id
+                break
+
+        for skill_id in prepared:
+            if skill_id != handler:
+                self.bus.emit(message.reply(f"ovos.skills.fallback.{skill_id}.abort",
+                                            {"skill_id": skill_id}))
+        return handler
+
     def _fallback_range(self, utterances, lang, message, fb_range):
         """Send fallback request for a specified priority range.
 
@@ -153,21 +308,34 @@ class FallbackService:
         Returns:
             IntentMatch or None
         """
+        if ovos_core.intent_services.is_dry_run(message):
+            # only the skills know if they can handle the utterance
+            return None
         # we call flatten in case someone is sending the old style list of tuples
-        utterances = flatten_list(utterances)
+        utterances = list(flatten_list(utterances))
         message.data["utterances"] = utterances  # all transcripts
         message.data["lang"] = lang
 
         # new style bus api
+        candidates = self._collect_fallback_skills(message, fb_range)
         fallbacks = [(k, v) for k, v in self.registered_fallbacks.items()
-                     if k in self._collect_fallback_skills(message, fb_range)]
+                     if k in candidates]
         sorted_handlers = sorted(fallbacks, key=operator.itemgetter(1))
-        for skill_id, prio in sorted_handlers:
-            result = self.attempt_fallback(utterances, skill_id, lang, message)
-            if result:
+        if self.fallback_config.get("parallel"):
+            skill_id = self._parallel_fallback([s for s, _ in sorted_handlers],
+                                               utterances, lang, message)
+            if skill_id:
                 return ovos_core.intent_services.IntentMatch('Fallback', None, {}, skill_id, utterances[0])
+        else:
+            for skill_id, prio in sorted_handlers:
+                result = self.attempt_fallback(utterances, skill_id, lang, message)
+                if result:
+                    return ovos_core.intent_services.IntentMatch('Fallback', None, {}, skill_id, utterances[0])
 
         # old style deprecated fallback skill singleton class
+        if not self._v1_handlers_in_range(fb_range):
+            self.stats.record("fallback_v1", 0.0, "skipped")
+            return None
         LOG.debug("checking for FallbackSkillsV1")
         msg = message.reply(
             'mycroft.skills.fallback',
@@ -175,12 +343,36 @@ class FallbackService:
                   'lang': lang,
                   'fallback_range': (fb_range.start, fb_range.stop)}
         )
-        response = self.bus.wait_for_response(msg, timeout=10)
+        stopwatch = Stopwatch()
+        with stopwatch:
+            response = self.bus.wait_for_response(msg, timeout=10)
+        handled = bool(response and response.data['handled'])
+        self.stats.record("fallback_v1", stopwatch.time,
+                          "timeout" if response is None else
+                          "matched" if handled else "unmatched")
 
-        if response and response.data['handled']:
+        if handled:
             return ovos_core.intent_services.IntentMatch('Fallback', None, {}, None, utterances[0])
         return None
 
+    def _v1_handlers_in_range(self, fb_range):
+        """True if a FallbackSkillV1 handler may be registered in the range
+
+        v1 handlers are only known through the priorities advertised by
+        the processes hosting them, see FallbackV1Host. Skills loaded in a
+        process that did not report them may register v1 handlers nobody
+        advertises, unless every loaded skill was reported the failure
+        handler is asked as it always was.
+        """
+        if not self.v1_fallbacks:
+            return True
+        reported = set().union(*self.v1_host_skills.values())
+        if not self.loaded_skills <= reported:
+            return True
+        return any(fb_range.start <= prio < fb_range.stop
+                   for priorities in list(self.v1_fallbacks.values())
+                   for prio in priorities)
+
     def high_prio(self, utterances, lang, message):
         """Pre-padatious fallbacks."""
         return self._fallback_range(utterances, lang, message,
@@ -195,3 +387,62 @@ class FallbackService:
         """Low prio fallbacks with general matching such as chat-bot."""
         return self._fallback_range(utterances, lang, message,
                                     FallbackRange(90, 101))
+
+
+class FallbackV1Host:
+    """Answers mycroft.skills.fallback for the FallbackSkillV1 handlers of this process.
+
+    v1 handlers are registered on a class attribute and never announced on
+    the bus, the priorities of the handlers loaded in this process are
+    advertised on their behalf so the FallbackService, possibly running in
+    another process, knows when asking them is pointless. The skills loaded
+    in this process are advertised too, only once every loaded skill is
+    accounted for by some host the FallbackService trusts the priorities.
+
+    Args:
+        bus: messagebus connection
+        skill_ids (callable): returns the skill_ids loaded in this process
+    """
+
+    def __init__(self, bus, skill_ids: Optional[Callable[[], Iterable[str]]] = None):
+        self.bus = bus
+        self.host_id = str(uuid4())
+        self.skill_ids = skill_ids or (lambda: ())
+        self._advertised = None
+        self._failure_handler = FallbackSkillV1.make_intent_failure_handler(bus)
+        self.bus.on("mycroft.skills.fallback", self.handle_fallback)
+        self.bus.on("ovos.skills.fallback.v1.list", self.advertise)
+        # v1 handlers are (de)registered while skills load and unload
+        for msg_type in ("mycroft.skills.loaded", "mycroft.skills.shutdown",
+                         "mycroft.skills.initialized"):
+            self.bus.on(msg_type, self.handle_skills_changed)
+        self.advertise()
+
+    @staticmethod
+    def priorities() -> Tuple[int, ...]:
+        return tuple(sorted(FallbackSkillV1.fallback_handlers))
+
+    def _state(self) -> Tuple[Tuple[int, ...], FrozenSet[str]]:
+        return self.priorities(), frozenset(self.skill_ids())
+
+    def advertise(self, message=None):
+        """announce the v1 handler priorities and the skills of this process"""
+        self._advertised = priorities, skill_ids = self._state()
+        self.bus.emit(Message("ovos.skills.fallback.v1.register",
+                              {"host_id": self.host_id,
+                               "priorities": list(priorities),
+                               "skill_ids": sorted(skill_ids)}))
+
+    def handle_skills_changed(self, message=None):
+        if self._state() != self._advertised:
+            self.advertise()
+
+    def handle_fallback(self, message):
+        self._failure_handler(message)
+        # handlers may be registered at any time, not only on skill load
+        self.handle_skills_changed()
+
+    def shutdown(self):
+        self.bus.remove("mycroft.skills.fallback", self.handle_fallback)
+        self.bus.emit(Message("ovos.skills.fallback.v1.deregister",
+                              {"host_id": self.host_id}))
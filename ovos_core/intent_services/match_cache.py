@@ -0,0 +1,83 @@
+"""Cache for the results of side effect free intent matchers."""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, List, Optional, Tuple
+
+
+class MatchCache:
+    """LRU cache with expiration for raw intent engine results.
+
+    Entries are keyed by engine, utterances, lang and a registry generation.
+    The generation must be bumped whenever the registered intents or vocab
+    change, this makes every entry computed before the change unreachable.
+
+    Args:
+        maxsize (int): maximum number of cached results
+        ttl (float): seconds a result stays valid, 0 to never expire
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def make_key(self, engine: str, utterances: List[str], lang: str) -> Tuple:
+        """key for an engine query at the current registry generation
+
+        the generation is captured here, so a result computed while the
+        registry changes is stored under the old, unreachable, generation
+        """
+        # exact utterances, cached matches carry the utterance and entity text
+        return engine, tuple(utterances), lang, self.generation
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """return (hit, result), None is a valid cached result"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires = entry
+                if not expires or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, result
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple, result: Any, ttl: Optional[float] = None):
+        """cache a result, ttl overrides the default expiration"""
+        if key[-1] != self.generation:
+            return  # registry changed while computing
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._entries[key] = (result, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def bump(self):
+        """registry changed, invalidate all cached results"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def serialize(self) -> dict:
+        return {"size": len(self._entries),
+                "maxsize": self.maxsize,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses}
@@ -10,6 +10,7 @@ from ovos_utils.log import LOG
 from padacioso import IntentContainer as FallbackIntentContainer
 
 import ovos_core.intent_services
+from ovos_core.intent_services.analysis import UtteranceAnalysis
 from ovos_bus_client.message import Message
 
 
@@ -73,6 +74,9 @@ class PadaciosoService:
 
         self.registered_intents = []
         self.registered_entities = []
+        # registered from the intent snapshot, see register_restored
+        self.restored_intents = set()
+        self.restored_entities = set()
         self.max_words = 50  # if an utterance contains more words than this, don't attempt to match
 
     def _match_level(self, utterances, limit, lang=None):
@@ -88,6 +92,16 @@ class PadaciosoService:
         utterances = flatten_list(utterances)
         lang = lang or self.lang
         padacioso_intent = self.calc_intent(utterances, lang)
+        return self.intent_to_match(padacioso_intent, limit)
+
+    @staticmethod
+    def intent_to_match(padacioso_intent, limit):
+        """Convert a padacioso intent into an IntentMatch if confident enough.
+
+        Args:
+            padacioso_intent (PadaciosoIntent): result of calc_intent or None
+            limit (float): required confidence level.
+        """
         if padacioso_intent is not None and padacioso_intent.conf > limit:
             skill_id = padacioso_intent.name.split(':')[0]
             return ovos_core.intent_services.IntentMatch(
@@ -127,6 +141,7 @@ class PadaciosoService:
         Args:
             intent_name (str): intent identifier
         """
+        self.restored_intents.discard(intent_name)
         if intent_name in self.registered_intents:
             self.registered_intents.remove(intent_name)
             for lang in self.containers:
@@ -198,6 +213,9 @@ class PadaciosoService:
         lang = message.data.get('lang', self.lang)
         lang = lang.lower()
         if lang in self.containers:
+            if message.data['name'] in self.restored_intents:
+                # registered again by the skill, replace the restored one
+                self.__detach_intent(message.data['name'])
             self.registered_intents.append(message.data['name'])
             try:
                 self._register_object(message, 'intent',
@@ -217,10 +235,46 @@ class PadaciosoService:
         lang = message.data.get('lang', self.lang)
         lang = lang.lower()
         if lang in self.containers:
+            if message.data['name'] in self.restored_entities:
+                # registered again by the skill, replace the restored one
+                self.restored_entities.discard(message.data['name'])
+                for entity in [e for e in self.registered_entities
+                               if e['name'] == message.data['name'] and
+                               e.get('lang', self.lang).lower() == lang]:
+                    self.registered_entities.remove(entity)
+                self.__detach_entity(message.data['name'], lang)
             self.registered_entities.append(message.data)
             self._register_object(message, 'entity',
                                   self.containers[lang].add_entity)
 
+    def register_restored(self, message):
+        """Register an intent or entity restored from the intent snapshot.
+
+        It is replaced when a skill registers it again, or detached by
+        drop_restored if no skill does.
+
+        Args:
+            message (Message): padatious:register_intent or
+                               padatious:register_entity message
+        """
+        if message.msg_type == 'padatious:register_entity':
+            self.register_entity(message)
+            self.restored_entities.add(message.data['name'])
+        else:
+            self.register_intent(message)
+            self.restored_intents.add(message.data['name'])
+
+    def drop_restored(self):
+        """Detach restored intents and entities no skill registered again."""
+        for intent_name in list(self.restored_intents):
+            self.__detach_intent(intent_name)
+        for entity in [e for e in self.registered_entities
+                       if e['name'] in self.restored_entities]:
+            self.registered_entities.remove(entity)
+            self.__detach_entity(entity['name'],
+                                 entity.get('lang', self.lang).lower())
+        self.restored_entities.clear()
+
     def calc_intent(self, utterances: List[str], lang: str = None) -> Optional[PadaciosoIntent]:
         """
         Get the best intent match for the given list of utterances. Utilizes a
@@ -232,7 +286,8 @@ class PadaciosoService:
         """
         if isinstance(utterances, str):
             utterances = [utterances]  # backwards compat when arg was a single string
-        utterances = [u for u in utterances if len(u.split()) < self.max_words]
+        analysis = UtteranceAnalysis.from_utterances(utterances, lang)
+        utterances = analysis.within_word_limit(self.max_words)
         if not utterances:
             LOG.error(f"utterance exceeds max size of {self.max_words} words, skipping padacioso match")
             return None
@@ -17,7 +17,7 @@ import concurrent.futures
 from functools import lru_cache
 from os import path
 from os.path import expanduser, isfile
-from threading import Event
+from threading import Event, Lock
 from time import time as get_time, sleep
 from typing import List, Optional
 
@@ -30,6 +30,7 @@ from ovos_utils.log import LOG
 from ovos_utils.xdg_utils import xdg_data_home
 
 import ovos_core.intent_services
+from ovos_core.intent_services.analysis import UtteranceAnalysis
 from ovos_bus_client.message import Message
 
 
@@ -52,6 +53,16 @@ class PadatiousMatcher:
         utterances = flatten_list(utterances)
         lang = lang or self.service.lang
         padatious_intent = self.service.calc_intent(utterances, lang)
+        return self.intent_to_match(padatious_intent, limit)
+
+    @staticmethod
+    def intent_to_match(padatious_intent, limit):
+        """Convert a padatious intent into an IntentMatch if confident enough.
+
+        Args:
+            padatious_intent (PadatiousIntent): result of calc_intent or None
+            limit (float): required confidence level.
+        """
         if padatious_intent is not None and padatious_intent.conf > limit:
             skill_id = padatious_intent.name.split(':')[0]
             return ovos_core.intent_services.IntentMatch(
@@ -117,6 +128,8 @@ class PadatiousService:
         self.bus.on('mycroft.skills.initialized', self.train)
 
         self.finished_training_event = Event()
+        self._train_lock = Lock()
+        self._trained_callbacks = []
         self.finished_initial_train = False
 
         self.train_delay = self.padatious_config.get('train_delay', 4)
@@ -124,6 +137,9 @@ class PadatiousService:
 
         self.registered_intents = []
         self.registered_entities = []
+        # registered from the intent snapshot, see register_restored
+        self.restored_intents = set()
+        self.restored_entities = set()
         self.max_words = 50  # if an utterance contains more words than this, don't attempt to match
 
     def train(self, message=None):
@@ -139,8 +155,7 @@ class PadatiousService:
         else:
             single_thread = message.data.get('single_thread',
                                              padatious_single_thread)
-        for lang in self.containers:
-            self.containers[lang].train(single_thread=single_thread)
+        self._train_containers(single_thread)
 
         LOG.info('Training complete.')
         self.finished_training_event.set()
@@ -148,6 +163,29 @@ class PadatiousService:
             self.bus.emit(Message('mycroft.skills.trained'))
             self.finished_initial_train = True
 
+    def on_trained(self, callback):
+        """call callback() whenever a training completes, including retrains"""
+        self._trained_callbacks.append(callback)
+
+    def _train_containers(self, single_thread):
+        with self._train_lock:
+            for lang in self.containers:
+                self.containers[lang].train(single_thread=single_thread)
+        for callback in self._trained_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                LOG.exception(f"training callback failed: {e}")
+
+    def warm_train(self):
+        """Train intents restored from the intent snapshot.
+
+        Unlike train this does not signal the initial training, padatious
+        reuses the cached models so restored intents match within moments.
+        """
+        self._train_containers(self.padatious_config.get('single_thread', True))
+        LOG.info('Restored intents training complete.')
+
     def wait_and_train(self):
         """Wait for minimum time between training and start training."""
         if not self.finished_initial_train:
@@ -166,11 +204,22 @@ class PadatiousService:
         Args:
             intent_name (str): intent identifier
         """
+        self.restored_intents.discard(intent_name)
         if intent_name in self.registered_intents:
             self.registered_intents.remove(intent_name)
             for lang in self.containers:
                 self.containers[lang].remove_intent(intent_name)
 
+    def __detach_entity(self, name, lang):
+        """ Remove an entity.
+
+        Args:
+            entity name
+            entity lang
+        """
+        if lang in self.containers:
+            self.containers[lang].remove_entity(name)
+
     def handle_detach_intent(self, message):
         """Messagebus handler for detaching padatious intent.
 
@@ -226,6 +275,9 @@ class PadatiousService:
         lang = message.data.get('lang', self.lang)
         lang = lang.lower()
         if lang in self.containers:
+            if message.data['name'] in self.restored_intents:
+                # registered again by the skill, replace the restored one
+                self.__detach_intent(message.data['name'])
             self.registered_intents.append(message.data['name'])
             try:
                 self._register_object(message, 'intent',
@@ -245,10 +297,46 @@ class PadatiousService:
         lang = message.data.get('lang', self.lang)
         lang = lang.lower()
         if lang in self.containers:
+            if message.data['name'] in self.restored_entities:
+                # registered again by the skill, replace the restored one
+                self.restored_entities.discard(message.data['name'])
+                for entity in [e for e in self.registered_entities
+                               if e['name'] == message.data['name'] and
+                               e.get('lang', self.lang).lower() == lang]:
+                    self.registered_entities.remove(entity)
+                self.__detach_entity(message.data['name'], lang)
             self.registered_entities.append(message.data)
             self._register_object(message, 'entity',
                                   self.containers[lang].add_entity)
 
+    def register_restored(self, message):
+        """Register an intent or entity restored from the intent snapshot.
+
+        It is replaced when a skill registers it again, or detached by
+        drop_restored if no skill does.
+
+        Args:
+            message (Message): padatious:register_intent or
+                               padatious:register_entity message
+        """
+        if message.msg_type == 'padatious:register_entity':
+            self.register_entity(message)
+            self.restored_entities.add(message.data['name'])
+        else:
+            self.register_intent(message)
+            self.restored_intents.add(message.data['name'])
+
+    def drop_restored(self):
+        """Detach restored intents and entities no skill registered again."""
+        for intent_name in list(self.restored_intents):
+            self.__detach_intent(intent_name)
+        for entity in [e for e in self.registered_entities
+                       if e['name'] in self.restored_entities]:
+            self.registered_entities.remove(entity)
+            self.__detach_entity(entity['name'],
+                                 entity.get('lang', self.lang).lower())
+        self.restored_entities.clear()
+
     def calc_intent(self, utterances: List[str], lang: str = None) -> Optional[PadatiousIntent]:
         """
         Get the best intent match for the given list of utterances. Utilizes a
@@ -260,7 +348,8 @@ class PadatiousService:
         """
         if isinstance(utterances, str):
             utterances = [utterances]  # backwards compat when arg was a single string
-        utterances = [u for u in utterances if len(u.split()) < self.max_words]
+        analysis = UtteranceAnalysis.from_utterances(utterances, lang)
+        utterances = analysis.within_word_limit(self.max_words)
         if not utterances:
             LOG.error(f"utterance exceeds max size of {self.max_words} words, skipping padatious match")
             return None
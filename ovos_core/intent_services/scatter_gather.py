@@ -0,0 +1,141 @@
+"""Scatter-gather over the messagebus, ask many skills and wait for their replies."""
+import time
+from threading import Condition
+from typing import Callable, Dict, Iterable, Optional
+from uuid import uuid4
+
+from ovos_bus_client.message import Message
+
+# context key correlating replies with the request they answer
+CORRELATION_KEY = "gather_id"
+
+
+class ScatterGather:
+    """One round of bus requests and the replies they collect.
+
+    Replies are tracked by the skill_id in their data, the wait ends the
+    moment every expected skill replied or the deadline passes, whichever
+    comes first. Requests are tagged with a correlation id in their context,
+    replies carrying another id belong to another round and are ignored,
+    replies without one are accepted for backwards compatibility.
+
+    >>> gather = ScatterGather(bus, "skill.stop.pong", expected=["skill"])
+    >>> replies = gather.gather(message.forward("skill.stop.ping"))
+
+    Args:
+        bus: messagebus connection
+        reply_type (str): message type of the replies, if None replies
+            must be fed to handle_reply by the caller
+        expected (iterable): skill_ids expected to reply, if None the skills
+            are unknown and the gather only ends at the deadline
+        timeout (float): seconds to wait for replies
+        on_reply (callable): called with each reply of this round before it
+            is recorded, returning False means the skill is not done yet
+        until (callable): called with the replies so far after each reply,
+            returning True ends the wait without waiting for other skills
+    """
+
+    def __init__(self, bus, reply_type: Optional[str],
+                 expected: Optional[Iterable[str]] = None,
+                 timeout: float = 0.5,
+                 on_reply: Optional[Callable[[Message], bool]] = None,
+                 until: Optional[Callable[[Dict[str, Message]], bool]] = None):
+        self.bus = bus
+        self.reply_type = reply_type
+        self.gather_id = str(uuid4())
+        self.expected = set(expected) if expected is not None else None
+        self.pending = set(self.expected or ())
+        self.replies: Dict[str, Message] = {}  # skill_id: reply, in arrival order
+        self.latencies: Dict[str, float] = {}  # skill_id: seconds until its reply
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self.on_reply = on_reply
+        self.until = until
+        self.deadline = time.monotonic() + timeout
+        self._cond = Condition()
+        self._satisfied = False
+
+    @property
+    def done(self) -> bool:
+        """True if every expected skill replied or the until condition was met"""
+        return self._satisfied or (self.expected is not None and not self.pending)
+
+    @property
+    def satisfied(self) -> bool:
+        """True if the until condition ended the wait"""
+        return self._satisfied
+
+    @property
+    def remaining(self) -> float:
+        """seconds left until the deadline"""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def set_deadline(self, timeout: float):
+        """move the deadline to timeout seconds from now"""
+        with self._cond:
+            self.deadline = time.monotonic() + timeout
+            self._cond.notify_all()
+
+    def tag(self, message: Message) -> Message:
+        """add the correlation id of this round to a request
+
+        the context is replaced, not updated, forwarded messages share their
+        context with the message they were forwarded from
+        """
+        message.context = {**message.context, CORRELATION_KEY: self.gather_id}
+        return message
+
+    def is_reply(self, message: Message) -> bool:
+        """True unless the message answers a different round"""
+        return message.context.get(CORRELATION_KEY, self.gather_id) == self.gather_id
+
+    def handle_reply(self, message: Message, skill_id: Optional[str] = None):
+        """record a reply, skill_id defaults to the one in the reply data"""
+        if not self.is_reply(message):
+            return
+        skill_id = skill_id or message.data.get("skill_id")
+        if self.on_reply is not None and self.on_reply(message) is False:
+            return
+        with self._cond:
+            if skill_id not in self.replies:
+                self.replies[skill_id] = message
+                self.latencies[skill_id] = time.monotonic() - self.started
+            self.pending.discard(skill_id)
+            if self.until is not None and self.until(self.replies):
+                self._satisfied = True
+            if self.done:
+                self._cond.notify_all()
+
+    def wait(self) -> bool:
+        """block until all expected skills replied or the deadline passed
+
+        Returns:
+            True if all expected skills replied
+        """
+        with self._cond:
+            while not self.done:
+                remaining = self.remaining
+                if not remaining:
+                    break
+                self._cond.wait(remaining)
+            return self.done
+
+    def gather(self, *messages: Message) -> Dict[str, Message]:
+        """emit the requests and wait for the replies
+
+        Returns:
+            dict of skill_id: reply for every skill that replied in time
+        """
+        if self.reply_type:
+            self.bus.on(self.reply_type, self.handle_reply)
+        try:
+            self.started = time.monotonic()
+            for message in messages:
+                self.bus.emit(self.tag(message))
+            self.wait()
+            self.elapsed = time.monotonic() - self.started
+        finally:
+            if self.reply_type:
+                self.bus.remove(self.reply_type, self.handle_reply)
+        with self._cond:
+            return dict(self.replies)
@@ -0,0 +1,181 @@
+"""Response latency of skills, adaptive deadlines and a circuit breaker."""
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+from ovos_core.intent_services.scatter_gather import ScatterGather
+from ovos_core.intent_services.stats import LatencyHistogram
+
+
+class SkillLatency:
+    """Latency of one skill answering one kind of request.
+
+    Args:
+        alpha (float): weight of the newest sample in the moving average
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.histogram = LatencyHistogram()
+        self.timeouts = 0
+        self.consecutive_timeouts = 0
+        self.open_until = 0.0  # circuit breaker, skill skipped until then
+
+    def record(self, duration: float, timed_out: bool = False):
+        # a timeout is a lower bound of the real latency, counting it
+        # lets the deadline grow back if it was too tight
+        if self.ewma is None:
+            self.ewma = duration
+        else:
+            self.ewma = self.alpha * duration + (1 - self.alpha) * self.ewma
+        self.histogram.record(duration)
+        if timed_out:
+            self.timeouts += 1
+            self.consecutive_timeouts += 1
+        else:
+            self.consecutive_timeouts = 0
+            self.open_until = 0.0
+
+    def serialize(self) -> dict:
+        data = self.histogram.serialize()
+        data.update({"ewma": self.ewma,
+                     "timeouts": self.timeouts,
+                     "consecutive_timeouts": self.consecutive_timeouts,
+                     "open": self.open_until > time.monotonic()})
+        return data
+
+
+class SkillLatencyTracker:
+    """Response latency per skill and per request type.
+
+    Request types are the bus round trips the pipeline makes to skills, eg.
+    "converse", "converse.ping", "stop" or "fallback". Latencies are always
+    tracked, with adaptive deadlines enabled the wait for a skill is derived
+    from its history instead of a fixed timeout, and skills that repeatedly
+    time out are left out of the candidates for a cooldown period.
+
+    Args:
+        config (dict): "skills.adaptive_deadlines" section of mycroft.conf
+            enabled (bool): use adaptive deadlines and the circuit breaker
+            min_deadline / max_deadline (float): bounds of a deadline, seconds
+            multiplier (float): deadline is this many times the slower of
+                the moving average and the 95th percentile
+            min_samples (int): samples needed before adapting a deadline
+            alpha (float): weight of the newest sample in the moving average
+            failure_threshold (int): consecutive timeouts opening the breaker
+            cooldown (float): seconds a skill is skipped once the breaker opens
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.min_deadline = config.get("min_deadline", 0.1)
+        self.max_deadline = config.get("max_deadline", 10.0)
+        self.multiplier = config.get("multiplier", 3.0)
+        self.min_samples = config.get("min_samples", 5)
+        self.alpha = config.get("alpha", 0.2)
+        self.failure_threshold = config.get("failure_threshold", 3)
+        self.cooldown = config.get("cooldown", 60)
+        self._skills: Dict[str, Dict[str, SkillLatency]] = {}
+        self._lock = Lock()
+
+    def _get(self, skill_id: str, kind: str) -> SkillLatency:
+        with self._lock:
+            kinds = self._skills.setdefault(skill_id, {})
+            if kind not in kinds:
+                kinds[kind] = SkillLatency(self.alpha)
+            return kinds[kind]
+
+    def record(self, skill_id: str, kind: str, duration: float,
+               timed_out: bool = False):
+        """record how long a skill took to answer, or to time out
+
+        Args:
+            skill_id (str): skill that was waited on
+            kind (str): request type, eg. "converse"
+            duration (float): seconds waited
+            timed_out (bool): the skill did not answer in time
+        """
+        latency = self._get(skill_id, kind)
+        with self._lock:
+            latency.record(duration, timed_out)
+            if timed_out and self.enabled and \
+                    latency.consecutive_timeouts >= self.failure_threshold:
+                if latency.open_until <= time.monotonic():
+                    LOG.warning(f"{skill_id} timed out {latency.consecutive_timeouts} "
+                                f"times in a row on {kind}, skipping it for {self.cooldown}s")
+                latency.open_until = time.monotonic() + self.cooldown
+
+    def deadline(self, skill_id: str, kind: str, default: float) -> float:
+        """seconds to wait for a skill to answer a request
+
+        Args:
+            default (float): deadline used until enough samples are known,
+                or if adaptive deadlines are disabled
+        """
+        if not self.enabled:
+            return default
+        latency = self._skills.get(skill_id, {}).get(kind)
+        if latency is None or latency.histogram.count < self.min_samples:
+            return default
+        slowest = max(latency.ewma, latency.histogram.percentile(95) or 0)
+        return min(max(slowest * self.multiplier, self.min_deadline), self.max_deadline)
+
+    def is_available(self, skill_id: str, kind: str) -> bool:
+        """False while the circuit breaker of the skill is open"""
+        if not self.enabled:
+            return True
+        latency = self._skills.get(skill_id, {}).get(kind)
+        # once the cooldown passed a single request is let through,
+        # another timeout opens the breaker again
+        return latency is None or latency.open_until <= time.monotonic()
+
+    def available(self, skill_ids: Iterable[str], kind: str) -> List[str]:
+        """skill_ids whose circuit breaker is closed, keeping the given order"""
+        return [s for s in skill_ids if self.is_available(s, kind)]
+
+    def gather_deadline(self, skill_ids: Iterable[str], kind: str,
+                        default: float) -> float:
+        """deadline of a scatter-gather, waiting for the slowest skill"""
+        return max((self.deadline(s, kind, default) for s in skill_ids),
+                   default=default)
+
+    def record_gather(self, gather: ScatterGather, kind: str):
+        """record the reply latency of every skill a gather waited on"""
+        for skill_id in gather.expected or ():
+            if skill_id in gather.latencies:
+                self.record(skill_id, kind, gather.latencies[skill_id])
+            elif not gather.satisfied:
+                # skills left pending by an until condition were not late
+                self.record(skill_id, kind, gather.elapsed, timed_out=True)
+
+    def wait_for_response(self, bus, message: Message, reply_type: str,
+                          skill_id: str, kind: str,
+                          default_timeout: float = 3.0) -> Optional[Message]:
+        """bus.wait_for_response with the deadline of the skill, recording
+        how long it took to answer"""
+        timeout = self.deadline(skill_id, kind, default_timeout)
+        start = time.monotonic()
+        response = bus.wait_for_response(message, reply_type, timeout=timeout)
+        self.record(skill_id, kind, time.monotonic() - start,
+                    timed_out=response is None)
+        return response
+
+    def forget(self, skill_id: str):
+        with self._lock:
+            self._skills.pop(skill_id, None)
+
+    def reset(self):
+        with self._lock:
+            self._skills = {}
+
+    def serialize(self) -> dict:
+        """nested dict of skill_id -> request type -> latency summary"""
+        with self._lock:
+            skills = {skill_id: dict(kinds) for skill_id, kinds in self._skills.items()}
+        return {skill_id: {kind: latency.serialize() for kind, latency in kinds.items()}
+                for skill_id, kinds in skills.items()}
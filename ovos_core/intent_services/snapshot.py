@@ -0,0 +1,136 @@
+"""Intent registrations persisted across restarts, for a warm start."""
+import hashlib
+import json
+import os
+from os.path import dirname, isfile
+from threading import Lock
+from typing import Dict, List, Optional
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+
+class IntentSnapshot:
+    """Registration messages of every skill, saved to and loaded from disk.
+
+    Each registration is stored under its skill id and a key hashing the
+    message, padatious registrations loaded from a resource file also store
+    the hash of that file so they are not restored if it changed.
+
+    Args:
+        path (str): json file holding the snapshot
+    """
+    version = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.skills: Dict[str, Dict[str, dict]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def get_skill_id(message: Message) -> Optional[str]:
+        """skill owning a registration message, None if unknown"""
+        skill_id = message.context.get("skill_id")
+        if not skill_id and ":" in (message.data.get("name") or ""):
+            skill_id = message.data["name"].split(":")[0]
+        return skill_id
+
+    @staticmethod
+    def file_hash(file_name: str) -> Optional[str]:
+        if not file_name or not isfile(file_name):
+            return None
+        with open(file_name, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    @staticmethod
+    def entry_key(msg_type: str, data: dict) -> str:
+        """stable key of a registration"""
+        raw = json.dumps([msg_type, data], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def record(self, message: Message) -> Optional[str]:
+        """store a registration message
+
+        Returns:
+            key of the entry, None if the message can not be snapshotted
+        """
+        skill_id = self.get_skill_id(message)
+        if not skill_id:
+            return None
+        # json round trip, a copy as it will be read back from disk
+        data = json.loads(json.dumps(message.data, default=str))
+        entry = {"msg_type": message.msg_type, "data": data}
+        if message.msg_type.startswith("padatious:") and \
+                not message.data.get("samples"):
+            entry["file_hash"] = self.file_hash(message.data.get("file_name"))
+        key = self.entry_key(message.msg_type, data)
+        with self._lock:
+            self.skills.setdefault(skill_id, {})[key] = entry
+        return key
+
+    def forget_skill(self, skill_id: str):
+        with self._lock:
+            self.skills.pop(skill_id, None)
+
+    def forget_entries(self, keys: List[str]):
+        with self._lock:
+            for skill_id, entries in list(self.skills.items()):
+                for key in keys:
+                    entries.pop(key, None)
+                if not entries:
+                    self.skills.pop(skill_id)
+
+    def forget_intent(self, intent_name: str):
+        """drop the adapt and padatious registrations of an intent"""
+        with self._lock:
+            for entries in self.skills.values():
+                for key, entry in list(entries.items()):
+                    if entry["msg_type"] in ("register_intent",
+                                             "padatious:register_intent") and \
+                            entry["data"].get("name") == intent_name:
+                        entries.pop(key)
+
+    def restorable(self) -> Dict[str, Dict[str, Message]]:
+        """registration messages that are still valid, by skill id and key
+
+        padatious registrations whose resource file changed are dropped
+        """
+        restored = {}
+        with self._lock:
+            for skill_id, entries in self.skills.items():
+                for key, entry in list(entries.items()):
+                    if "file_hash" in entry and \
+                            self.file_hash(entry["data"].get("file_name")) != entry["file_hash"]:
+                        LOG.debug(f"resource file changed, not restoring {key}")
+                        entries.pop(key)
+                        continue
+                    restored.setdefault(skill_id, {})[key] = Message(
+                        entry["msg_type"], entry["data"], {"skill_id": skill_id})
+        return restored
+
+    def load(self):
+        if not isfile(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") != self.version:
+                LOG.info("ignoring intent snapshot from another version")
+                return
+            with self._lock:
+                self.skills = data.get("skills") or {}
+        except Exception as e:
+            LOG.error(f"failed to load intent snapshot {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            data = {"version": self.version, "skills": self.skills}
+            try:
+                os.makedirs(dirname(self.path), exist_ok=True)
+                # write to a temporary file so a crash never leaves a broken snapshot
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(data, f, default=str)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                LOG.error(f"failed to save intent snapshot {self.path}: {e}")
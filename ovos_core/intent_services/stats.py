@@ -0,0 +1,140 @@
+"""Latency statistics for the intent pipeline."""
+import math
+from threading import Lock
+from typing import Dict, Optional
+
+
+class LatencyHistogram:
+    """Bounded latency histogram with logarithmic buckets (HDR style).
+
+    Values are counted into buckets whose width grows geometrically, so
+    memory use is fixed regardless of how many samples are recorded and
+    percentiles are reported with a bounded relative error.
+
+    Args:
+        min_value (float): smallest distinguishable value, in seconds
+        max_value (float): values above this are clamped, in seconds
+        precision (float): relative width of each bucket
+    """
+
+    def __init__(self, min_value: float = 0.0001, max_value: float = 120.0,
+                 precision: float = 0.05):
+        self.min_value = min_value
+        self.max_value = max_value
+        self._log_base = math.log(1 + precision)
+        n_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_base)) + 1
+        self._counts = [0] * n_buckets
+        self._lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        value = min(value, self.max_value)
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+
+    def _bucket_value(self, idx: int) -> float:
+        if idx == 0:
+            return self.min_value
+        return self.min_value * math.exp(idx * self._log_base)
+
+    def record(self, value: float):
+        """add a sample to the histogram"""
+        with self._lock:
+            self._counts[self._bucket(value)] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """return the value below which pct percent of samples fall"""
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(1, int(math.ceil(self.count * pct / 100)))
+            seen = 0
+            for idx, n in enumerate(self._counts):
+                seen += n
+                if seen >= target:
+                    if idx == 0:
+                        return self.min  # underflow bucket
+                    if idx == len(self._counts) - 1:
+                        return self.max  # overflow bucket, values were clamped
+                    # never report beyond the observed extremes
+                    return max(min(self._bucket_value(idx), self.max), self.min)
+            return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def serialize(self) -> dict:
+        return {"count": self.count,
+                "mean": self.mean,
+                "min": self.min,
+                "max": self.max,
+                "p50": self.percentile(50),
+                "p95": self.percentile(95),
+                "p99": self.percentile(99)}
+
+
+class PipelineStats:
+    """Latency histograms for each pipeline stage, split by outcome.
+
+    Stages are any named step of utterance handling, eg. pipeline matchers
+    such as "padatious_high" or transformer plugins. The outcome is usually
+    "matched" / "unmatched" for matchers.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._lock = Lock()
+
+    def get_histogram(self, stage: str, outcome: str) -> LatencyHistogram:
+        try:
+            return self._histograms[stage][outcome]
+        except KeyError:
+            with self._lock:
+                outcomes = self._histograms.setdefault(stage, {})
+                if outcome not in outcomes:
+                    outcomes[outcome] = LatencyHistogram()
+                return outcomes[outcome]
+
+    def record(self, stage: str, duration: float, outcome: str = "matched"):
+        """record the duration in seconds of a pipeline stage
+
+        Args:
+            stage (str): name of the pipeline stage
+            duration (float): time spent in the stage, in seconds
+            outcome (str): result of the stage, eg. matched/unmatched
+        """
+        self.get_histogram(stage, outcome).record(duration)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def serialize(self) -> dict:
+        """nested dict of stage -> outcome -> histogram summary"""
+        with self._lock:
+            stages = {stage: dict(outcomes)
+                      for stage, outcomes in self._histograms.items()}
+        return {stage: {outcome: hist.serialize()
+                        for outcome, hist in outcomes.items()}
+                for stage, outcomes in stages.items()}
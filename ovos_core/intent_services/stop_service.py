@@ -1,28 +1,41 @@
 import os
-import re
 from os.path import dirname
-from threading import Event
+from typing import Optional
 
 import ovos_core.intent_services
-from ovos_bus_client.message import Message
-from ovos_bus_client.session import SessionManager
-from ovos_config.config import Configuration
+from ovos_core.intent_services.active_skills import ActiveSkillsCache
+from ovos_core.intent_services.capabilities import SkillCapabilities
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot, StopConfig
+from ovos_core.intent_services.scatter_gather import ScatterGather
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
+from ovos_core.intent_services.stats import PipelineStats
+from ovos_core.intent_services.voc_match import clear_voc_matchers, get_voc_matcher
 from ovos_utils import flatten_list
 from ovos_utils.bracket_expansion import expand_options
 from ovos_utils.log import LOG
+from ovos_utils.metrics import Stopwatch
 from ovos_utils.parse import match_one
 
 
 class StopService:
     """Intent Service thats handles stopping skills."""
 
-    def __init__(self, bus):
+    def __init__(self, bus, capabilities: Optional[SkillCapabilities] = None,
+                 skill_latency: Optional[SkillLatencyTracker] = None,
+                 stats: Optional[PipelineStats] = None,
+                 active_skills_cache: Optional[ActiveSkillsCache] = None,
+                 config_snapshot: Optional[ConfigSnapshot] = None):
         self.bus = bus
+        self.config_snapshot = config_snapshot or ConfigSnapshot(bus)
+        self.capabilities = capabilities
+        self.skill_latency = skill_latency or SkillLatencyTracker()
+        self.stats = stats or PipelineStats()
+        self.active_skills_cache = active_skills_cache or ActiveSkillsCache()
         self._voc_cache = {}
         self.load_resource_files()
 
     def load_resource_files(self):
-        base = f"{dirname(dirname(__file__))}/locale"
+        base = self._voc_source = f"{dirname(dirname(__file__))}/locale"
         for lang in os.listdir(base):
             lang2 = lang.split("-")[0].lower()
             self._voc_cache[lang2] = {}
@@ -32,6 +45,7 @@ class StopService:
                              if l.strip() and not l.startswith("#")]
                     n = f.split(".", 1)[0]
                     self._voc_cache[lang2][n] = flatten_list(lines)
+        clear_voc_matchers(base)  # compiled from the previous files
 
     @property
     def config(self):
@@ -39,7 +53,12 @@ class StopService:
         Returns:
             stop_config (dict): config for stop handling options
         """
-        return Configuration().get("skills", {}).get("stop") or {}
+        return dict(self.settings.raw)
+
+    @property
+    def settings(self) -> StopConfig:
+        """typed stop config, only rebuilt when the configuration changes"""
+        return self.config_snapshot.current.stop
 
     def get_active_skills(self, message=None):
         """Active skill ids ordered by converse priority
@@ -48,51 +67,40 @@ class StopService:
         Returns:
             active_skills (list): ordered list of skill_ids
         """
-        session = SessionManager.get(message)
-        return [skill[0] for skill in session.active_skills]
+        return self.active_skills_cache.get(message)
 
     def _collect_stop_skills(self, message):
         """use the messagebus api to determine which skills can stop
         This includes all skills and external applications"""
-
-        want_stop = []
-        skill_ids = []
-
-        active_skills = self.get_active_skills(message)
+        # skip skills that repeatedly did not answer the ping
+        active_skills = self.skill_latency.available(self.get_active_skills(message),
+                                                     "stop.ping")
 
         if not active_skills:
-            return want_stop
-
-        event = Event()
-
-        def handle_ack(msg):
-            nonlocal event
-            skill_id = msg.data["skill_id"]
-
-            # validate the stop pong
-            if all((skill_id not in want_stop,
-                    msg.data.get("can_handle", True),
-                    skill_id in active_skills)):
-                want_stop.append(skill_id)
-
-            if skill_id not in skill_ids:  # track which answer we got
-                skill_ids.append(skill_id)
-
-            if all(s in skill_ids for s in active_skills):
-                # all skills answered the ping!
-                event.set()
-
-        self.bus.on("skill.stop.pong", handle_ack)
-
-        # ask skills if they can stop
-        for skill_id in active_skills:
-            self.bus.emit(message.forward(f"{skill_id}.stop.ping",
-                                          {"skill_id": skill_id}))
-
-        # wait for all skills to acknowledge they can stop
-        event.wait(timeout=0.5)
-
-        self.bus.remove("skill.stop.pong", handle_ack)
+            return []
+
+        # only ping skills that did not advertise if they can stop
+        if self.capabilities is not None:
+            eligible, unknown = self.capabilities.partition(active_skills, "stop")
+        else:
+            eligible, unknown = [], active_skills
+
+        replies = {}
+        if unknown:
+            # ask skills if they can stop and wait for all of them to acknowledge
+            timeout = self.skill_latency.gather_deadline(unknown, "stop.ping",
+                                                         self.settings.ping_timeout)
+            gather = ScatterGather(self.bus, "skill.stop.pong", expected=unknown,
+                                   timeout=timeout)
+            replies = gather.gather(*[message.forward(f"{skill_id}.stop.ping",
+                                                      {"skill_id": skill_id})
+                                      for skill_id in unknown])
+            self.skill_latency.record_gather(gather, "stop.ping")
+
+        # validate the stop pongs, in the order stop will be called
+        want_stop = [skill_id for skill_id in active_skills
+                     if skill_id in eligible or (skill_id in replies and
+                                                 replies[skill_id].data.get("can_handle", True))]
         return want_stop or active_skills
 
     def stop_skill(self, skill_id, message):
@@ -106,8 +114,13 @@ class StopService:
         Returns:
             handled (bool): True if handled otherwise False.
         """
+        if not self.skill_latency.is_available(skill_id, "stop"):
+            LOG.debug(f"{skill_id} repeatedly timed out on stop, skipping it")
+            return False
         stop_msg = message.reply(f"{skill_id}.stop")
-        result = self.bus.wait_for_response(stop_msg, f"{skill_id}.stop.response")
+        result = self.skill_latency.wait_for_response(self.bus, stop_msg,
+                                                      f"{skill_id}.stop.response",
+                                                      skill_id, "stop")
         if result and 'error' in result.data:
             error_msg = result.data['error']
             LOG.error(f"{skill_id}: {error_msg}")
@@ -115,6 +128,70 @@ class StopService:
         elif result is not None:
             return result.data.get('result', False)
 
+    def _parallel_stop(self, skill_ids, message):
+        """Tell all skills to stop at once.
+
+        The wait ends as soon as the first skill, in activation order, that
+        stopped is known, ie. it confirmed and every skill before it answered.
+
+        Args:
+            skill_ids (list): skills to stop, in activation order
+
+        Returns:
+            skill_id of the first skill that stopped, None if none did
+        """
+        skill_ids = [s for s in skill_ids if self.skill_latency.is_available(s, "stop")]
+        if not skill_ids:
+            return None
+
+        def stopped(reply):
+            if 'error' in reply.data:
+                LOG.error(f"{reply.context.get('skill_id')}: {reply.data['error']}")
+                return False
+            return reply.data.get('result', False)
+
+        def first_known(replies):
+            for skill_id in skill_ids:
+                if skill_id not in replies:
+                    return False  # a skill before it may still confirm
+                if stopped(replies[skill_id]):
+                    return True
+            return False
+
+        timeout = self.skill_latency.gather_deadline(skill_ids, "stop", 3.0)
+        gather = ScatterGather(self.bus, None, expected=skill_ids,
+                               timeout=timeout, until=first_known)
+        # every skill answers on its own message type
+        handlers = {skill_id: lambda m, s=skill_id: gather.handle_reply(m, s)
+                    for skill_id in skill_ids}
+        for skill_id, handler in handlers.items():
+            self.bus.on(f"{skill_id}.stop.response", handler)
+        try:
+            replies = gather.gather(*[message.reply(f"{skill_id}.stop")
+                                      for skill_id in skill_ids])
+        finally:
+            for skill_id, handler in handlers.items():
+                self.bus.remove(f"{skill_id}.stop.response", handler)
+        self.skill_latency.record_gather(gather, "stop")
+        return next((s for s in skill_ids if s in replies and stopped(replies[s])), None)
+
+    def _stop_skills(self, skill_ids, message):
+        """Tell skills to stop, one by one until one stops or, with
+        "parallel" in the stop config, all at once
+
+        Returns:
+            skill_id of the first skill, in activation order, that stopped
+        """
+        stopwatch = Stopwatch()
+        with stopwatch:
+            if self.settings.parallel:
+                skill_id = self._parallel_stop(skill_ids, message)
+            else:
+                skill_id = next((s for s in skill_ids if self.stop_skill(s, message)), None)
+        self.stats.record("stop_dispatch", stopwatch.time,
+                          "stopped" if skill_id else "unhandled")
+        return skill_id
+
     def match_stop_high(self, utterances, lang, message):
         """If utterance is an exact match for "stop" , run before intent stage
 
@@ -140,17 +217,22 @@ class StopService:
         conf = 1.0
 
         if is_global_stop:
-            # emit a global stop, full stop anything OVOS is doing
-            self.bus.emit(message.reply("mycroft.stop", {}))
+            if not ovos_core.intent_services.is_dry_run(message):
+                # emit a global stop, full stop anything OVOS is doing
+                self.bus.emit(message.reply("mycroft.stop", {}))
             return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
                                                          None, utterance)
 
         if is_stop:
+            if ovos_core.intent_services.is_dry_run(message):
+                # skills are not asked, we can't know which one would stop
+                return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
+                                                             None, utterance)
             # check if any skill can stop
-            for skill_id in self._collect_stop_skills(message):
-                if self.stop_skill(skill_id, message):
-                    return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
-                                                                 skill_id, utterance)
+            skill_id = self._stop_skills(self._collect_stop_skills(message), message)
+            if skill_id:
+                return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
+                                                             skill_id, utterance)
         return None
 
     def match_stop_medium(self, utterances, lang, message):
@@ -204,14 +286,18 @@ class StopService:
             conf += 0.1
         conf = round(min(conf, 1.0), 3)
 
-        if conf < self.config.get("min_conf", 0.5):
+        if conf < self.settings.min_conf:
             return None
 
+        if ovos_core.intent_services.is_dry_run(message):
+            return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
+                                                         None, utterance)
+
         # check if any skill can stop
-        for skill_id in self._collect_stop_skills(message):
-            if self.stop_skill(skill_id, message):
-                return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
-                                                             skill_id, utterance)
+        skill_id = self._stop_skills(self._collect_stop_skills(message), message)
+        if skill_id:
+            return ovos_core.intent_services.IntentMatch('Stop', None, {"conf": conf},
+                                                         skill_id, utterance)
 
         # emit a global stop, full stop anything OVOS is doing
         self.bus.emit(message.reply("mycroft.stop", {}))
@@ -228,9 +314,9 @@ class StopService:
         match against "Yes.voc" containing only "yes". An exact match can be
         requested.
 
-        The method first checks in the current Skill's .voc files and secondly
-        in the "res/text" folder of mycroft-core. The result is cached to
-        avoid hitting the disk each time the method is called.
+        The vocabulary is compiled once per language and file, and the
+        compiled matcher is shared with other services loading the same
+        resource directory.
 
         Args:
             utt (str): Utterance to be tested
@@ -246,15 +332,7 @@ class StopService:
         if lang not in self._voc_cache:
             return False
 
-        _vocs = self._voc_cache[lang].get(voc_filename) or []
-
-        if utt and _vocs:
-            if exact:
-                # Check for exact match
-                return any(i.strip() == utt
-                           for i in _vocs)
-            else:
-                # Check for matches against complete words
-                return any([re.match(r'.*\b' + i + r'\b.*', utt)
-                            for i in _vocs])
-        return False
+        matcher = get_voc_matcher(lang, voc_filename,
+                                  lambda: self._voc_cache[lang].get(voc_filename) or [],
+                                  source=self._voc_source)
+        return matcher.match(utt, exact)
@@ -0,0 +1,94 @@
+"""Vocabulary matching compiled once per language and vocabulary file."""
+import re
+from threading import Lock
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+
+class VocMatcher:
+    """All lines of a vocabulary compiled into a single regex.
+
+    Each line is a regex matched against complete words of the utterance,
+    like the per line `re.match(r'.*\\b' + line + r'\\b.*', utt)` it replaces,
+    in a single pass over the utterance.
+
+    Args:
+        vocab (iterable): lines of the vocabulary file
+    """
+
+    def __init__(self, vocab: Iterable[str]):
+        self.vocab = [v for v in vocab if v]
+        self._exact = frozenset(v.strip() for v in self.vocab)
+        self._regex = None
+        if self.vocab:
+            self._regex = re.compile(r"\b(?:" + "|".join(
+                f"(?:{self._pattern(v)})" for v in self.vocab) + r")\b")
+
+    @staticmethod
+    def _pattern(line: str) -> str:
+        try:
+            re.compile(line)
+            return line
+        except re.error:
+            LOG.warning(f"invalid regex in vocabulary, matching it literally: {line}")
+            return re.escape(line)
+
+    def match(self, utterance: str, exact: bool = False) -> bool:
+        """
+        Args:
+            utterance (str): utterance to be tested
+            exact (bool): the utterance must be a vocabulary line, instead
+                of containing one
+
+        Returns:
+            bool: True if the utterance has the vocabulary
+        """
+        if not utterance or self._regex is None:
+            return False
+        if exact:
+            return utterance in self._exact
+        return self._regex.search(utterance) is not None
+
+
+_matchers: Dict[Tuple[str, str, str], VocMatcher] = {}
+_lock = Lock()
+
+
+def get_voc_matcher(lang: str, voc_filename: str,
+                    load: Optional[Callable[[], Iterable[str]]] = None,
+                    source: str = "") -> VocMatcher:
+    """compiled matcher of a vocabulary, shared by every service
+
+    Args:
+        lang (str): language of the vocabulary
+        voc_filename (str): name of the vocabulary file, eg. "stop"
+        load (callable): returns the vocabulary lines, only called the first
+            time a (source, lang, voc_filename) is requested
+        source (str): where the vocabulary is loaded from, eg. the resource
+            directory, files with the same name from different sources are
+            compiled separately
+    """
+    key = (source, lang, voc_filename)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        with _lock:
+            matcher = _matchers.get(key)
+            if matcher is None:
+                matcher = _matchers[key] = VocMatcher(load() if load else [])
+    return matcher
+
+
+def clear_voc_matchers(source: Optional[str] = None):
+    """drop compiled vocabularies, eg. after resource files changed
+
+    Args:
+        source (str): only drop the vocabularies loaded from this source,
+            all of them if None
+    """
+    with _lock:
+        if source is None:
+            _matchers.clear()
+            return
+        for key in [k for k in _matchers if k[0] == source]:
+            _matchers.pop(key)
@@ -664,6 +664,11 @@ class SkillManager(Thread):
         """ Respond to all_loaded status request."""
         return self.status.state == ProcessState.READY
 
+    def loaded_skill_ids(self):
+        """skill_ids of the skills loaded by this process"""
+        skills = {**self.skill_loaders, **self.plugin_skills}
+        return [loader.skill_id for loader in skills.values() if loader.loaded]
+
     def send_skill_list(self, message=None):
         """Send list of loaded skills."""
         try:
@@ -6,15 +6,17 @@ from ovos_plugin_manager.text_transformers import find_utterance_transformer_plu
 
 from ovos_utils.json_helper import merge_dict
 from ovos_utils.log import LOG
+from ovos_utils.metrics import Stopwatch
 
 
 class UtteranceTransformersService:
 
-    def __init__(self, bus, config=None):
+    def __init__(self, bus, config=None, stats=None):
         self.config_core = config or {}
         self.loaded_plugins = {}
         self.has_loaded = False
         self.bus = bus
+        self.stats = stats  # optional PipelineStats to record plugin latency
         self.config = self.config_core.get("utterance_transformers") or {}
         self.load_plugins()
 
@@ -55,22 +57,30 @@ class UtteranceTransformersService:
         context = context or {}
 
         for module in self.plugins:
+            stopwatch = Stopwatch()
+            outcome = "ok"
             try:
-                utterances, data = module.transform(utterances, context)
+                with stopwatch:
+                    utterances, data = module.transform(utterances, context)
                 LOG.debug(f"{module.name}: {data}")
                 context = merge_dict(context, data)
             except Exception as e:
+                outcome = "error"
                 LOG.warning(f"{module.name} transform exception: {e}")
+            if self.stats is not None:
+                self.stats.record(f"utterance_transformer:{module.name}",
+                                  stopwatch.time or 0.0, outcome)
         return utterances, context
 
 
 class MetadataTransformersService:
 
-    def __init__(self, bus, config=None):
+    def __init__(self, bus, config=None, stats=None):
         self.config_core = config or {}
         self.loaded_plugins = {}
         self.has_loaded = False
         self.bus = bus
+        self.stats = stats  # optional PipelineStats to record plugin latency
         self.config = self.config_core.get("metadata_transformers") or {}
         self.load_plugins()
 
@@ -110,12 +120,19 @@ class MetadataTransformersService:
         context = context or {}
 
         for module in self.plugins:
+            stopwatch = Stopwatch()
+            outcome = "ok"
             try:
-                data = module.transform(context)
+                with stopwatch:
+                    data = module.transform(context)
                 LOG.debug(f"{module.name}: {data}")
                 context = merge_dict(context, data)
             except Exception as e:
+                outcome = "error"
                 LOG.warning(f"{module.name} transform exception: {e}")
+            if self.stats is not None:
+                self.stats.record(f"metadata_transformer:{module.name}",
+                                  stopwatch.time or 0.0, outcome)
         return context
 
 
@@ -0,0 +1,96 @@
+"""hot path configuration micro-benchmark
+
+Times the configuration reads done by the converse and stop services for a
+single utterance, once through Configuration() as before the typed snapshot
+and once through the snapshot attributes, and reports the time per utterance
+as json
+
+    python -m test.benchmark.config_snapshot --iterations 200
+"""
+import argparse
+import json
+import sys
+import time
+
+from ovos_config.config import Configuration
+from ovos_workshop.permissions import ConverseMode
+
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot
+
+
+def legacy_reads(skill_id: str = "skill.test") -> tuple:
+    """config reads of one utterance as done before the snapshot"""
+    def converse():
+        return Configuration().get("skills", {}).get("converse") or {}
+
+    def stop():
+        return Configuration().get("skills", {}).get("stop") or {}
+
+    # converse timeout check, ping, permissions, dispatch mode
+    timeouts = converse().get("skill_timeouts") or {}
+    timeout = converse().get("timeout", 300)
+    ping = converse().get("ping_timeout", 0.5)
+    mode = converse().get("converse_mode", ConverseMode.ACCEPT_ALL)
+    blacklist = converse().get("converse_blacklist", [])
+    parallel = bool(converse().get("parallel"))
+    # stop matching and dispatch
+    min_conf = stop().get("min_conf", 0.5)
+    stop_parallel = bool(stop().get("parallel"))
+    return (timeouts.get(skill_id, timeout), ping, mode, skill_id in blacklist,
+            parallel, min_conf, stop_parallel)
+
+
+def snapshot_reads(snapshot: ConfigSnapshot, skill_id: str = "skill.test") -> tuple:
+    """the same reads through the typed snapshot"""
+    converse = snapshot.current.converse
+    stop = snapshot.current.stop
+    return (converse.skill_timeouts.get(skill_id, converse.timeout),
+            converse.ping_timeout, converse.converse_mode,
+            skill_id in converse.converse_blacklist, converse.parallel,
+            stop.min_conf, stop.parallel)
+
+
+def _time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def run_benchmark(iterations: int = 100) -> dict:
+    """run the benchmark and return the results
+
+    Args:
+        iterations (int): simulated utterances per variant
+    """
+    snapshot = ConfigSnapshot()
+    start = time.perf_counter()
+    snapshot.refresh()
+    refresh_time = time.perf_counter() - start
+
+    legacy = _time_per_call(legacy_reads, iterations)
+    typed = _time_per_call(lambda: snapshot_reads(snapshot), iterations)
+    return {"config": {"iterations": iterations},
+            "refresh": refresh_time,
+            "legacy": legacy,
+            "snapshot": typed,
+            "saved_per_utterance": legacy - typed,
+            "speedup": legacy / typed if typed else 0.0}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="OVOS config snapshot micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--output", help="write results to this json file")
+    args = parser.parse_args(args)
+
+    results = run_benchmark(args.iterations)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""Intent pipeline benchmark
+
+Runs the intent service of a MiniCroft, on a FakeBus, against N synthetic
+skills and reports registration time, training time, memory footprint,
+per pipeline stage latency percentiles and throughput as json.
+
+Synthetic skills only exist on the bus, they register adapt vocab and
+intents, padatious .intent files and optionally fallback and converse
+handlers, and answer the pings sent by the intent service like real skills
+
+    python -m test.benchmark.intent_pipeline --skills 50 --output run.json
+    python -m test.benchmark.intent_pipeline --baseline run.json --threshold 0.2
+
+the exit code is 1 if any metric regressed more than threshold compared
+to the baseline
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import SessionManager
+from ovos_utils.log import LOG
+
+from test.end2end.minicroft import get_minicroft
+
+# metrics where a higher value is better, everything else is a cost
+HIGHER_IS_BETTER = ("throughput",)
+
+
+class SyntheticSkill:
+    """Bus only skill stub registering synthetic intents
+
+    Args:
+        bus: FakeBus of the MiniCroft
+        idx (int): skill number, used to generate unique vocab
+        vocab (int): number of adapt keywords, each with an intent
+        intent_files (int): number of padatious .intent files
+        fallback (bool): register a fallback handler, handles any utterance
+        converse (bool): handle converse requests for "continue skill {idx}"
+        res_dir (str): directory to write the .intent files to
+    """
+
+    def __init__(self, bus, idx: int, vocab: int = 5, intent_files: int = 2,
+                 fallback: bool = False, converse: bool = False,
+                 res_dir: Optional[str] = None):
+        self.bus = bus
+        self.idx = idx
+        self.skill_id = f"synthetic-skill-{idx}.benchmark"
+        self.vocab = vocab
+        self.intent_files = intent_files
+        self.fallback = fallback
+        self.converse = converse
+        # removed with the skill if not given
+        self._tmp_dir = None if res_dir else tempfile.TemporaryDirectory()
+        self.res_dir = res_dir or self._tmp_dir.name
+        self.bus.on(f"{self.skill_id}.converse.ping", self.handle_converse_ping)
+        self.bus.on(f"{self.skill_id}.converse.request", self.handle_converse_request)
+        self.bus.on(f"{self.skill_id}.stop.ping", self.handle_stop_ping)
+        if self.fallback:
+            self.bus.on("ovos.skills.fallback.ping", self.handle_fallback_ping)
+            self.bus.on(f"ovos.skills.fallback.{self.skill_id}.request",
+                        self.handle_fallback_request)
+
+    def _msg(self, msg_type, data):
+        return Message(msg_type, data, {"skill_id": self.skill_id})
+
+    def keyword(self, j: int) -> str:
+        return f"kw{self.idx}x{j}"
+
+    def adapt_utterances(self) -> List[str]:
+        return [f"please {self.keyword(j)}" for j in range(self.vocab)]
+
+    def intent_samples(self, j: int) -> List[str]:
+        return [f"synthetic skill {self.idx} request {j}",
+                f"do thing {j} for skill {self.idx}"]
+
+    def padatious_utterances(self) -> List[str]:
+        return [self.intent_samples(j)[0] for j in range(self.intent_files)]
+
+    def register(self):
+        """emit all registration messages, like a skill being loaded"""
+        for j in range(self.vocab):
+            entity_type = f"{self.skill_id.replace('.', '_')}Keyword{j}"
+            self.bus.emit(self._msg("register_vocab",
+                                    {"entity_value": self.keyword(j),
+                                     "entity_type": entity_type}))
+            self.bus.emit(self._msg("register_intent",
+                                    {"name": f"{self.skill_id}:intent{j}",
+                                     "requires": [[entity_type, entity_type]],
+                                     "at_least_one": [],
+                                     "optional": []}))
+        for j in range(self.intent_files):
+            file_name = os.path.join(self.res_dir, f"{self.skill_id}-{j}.intent")
+            with open(file_name, "w") as f:
+                f.write("\n".join(self.intent_samples(j)))
+            self.bus.emit(self._msg("padatious:register_intent",
+                                    {"file_name": file_name,
+                                     "name": f"{self.skill_id}:file{j}.intent",
+                                     "lang": "en-us"}))
+        if self.fallback:
+            self.bus.emit(self._msg("ovos.skills.fallback.register",
+                                    {"skill_id": self.skill_id,
+                                     "priority": 50 + self.idx % 40}))
+
+    def handle_converse_ping(self, message):
+        self.bus.emit(message.reply("skill.converse.pong",
+                                    {"skill_id": self.skill_id,
+                                     "can_handle": self.converse},
+                                    {"skill_id": self.skill_id}))
+
+    def handle_converse_request(self, message):
+        handled = self.converse and \
+                  message.data["utterances"][0] == f"continue skill {self.idx}"
+        self.bus.emit(message.reply("skill.converse.response",
+                                    {"skill_id": self.skill_id,
+                                     "result": handled},
+                                    {"skill_id": self.skill_id}))
+
+    def handle_stop_ping(self, message):
+        self.bus.emit(message.reply("skill.stop.pong",
+                                    {"skill_id": self.skill_id,
+                                     "can_handle": False},
+                                    {"skill_id": self.skill_id}))
+
+    def handle_fallback_ping(self, message):
+        self.bus.emit(message.reply("ovos.skills.fallback.pong",
+                                    {"skill_id": self.skill_id,
+                                     "can_handle": True},
+                                    {"skill_id": self.skill_id}))
+
+    def handle_fallback_request(self, message):
+        self.bus.emit(message.reply(f"ovos.skills.fallback.{self.skill_id}.response",
+                                    {"result": True,
+                                     "fallback_handler": "SyntheticSkill.handle_fallback"},
+                                    {"skill_id": self.skill_id}))
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def pct(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    return {"count": len(values), "mean": sum(values) / len(values),
+            "p50": pct(50), "p95": pct(95), "p99": pct(99)}
+
+
+def run_benchmark(skills: int = 10, vocab: int = 5, intent_files: int = 2,
+                  fallbacks: int = 2, converse: int = 2,
+                  utterances: int = 100,
+                  pipeline: Optional[List[str]] = None) -> dict:
+    """run the benchmark and return the results
+
+    Args:
+        skills (int): number of synthetic skills
+        vocab (int): adapt keywords/intents per skill
+        intent_files (int): padatious .intent files per skill
+        fallbacks (int): number of skills with a fallback handler
+        converse (int): number of skills with a converse handler
+        utterances (int): number of utterances to match
+        pipeline (list): pipeline of the session, default from mycroft.conf
+    """
+    tmp_dir = tempfile.TemporaryDirectory()
+    res_dir = tmp_dir.name
+    croft = get_minicroft([])
+    default_pipeline = SessionManager.default_session.pipeline
+    try:
+        if pipeline:
+            SessionManager.default_session.pipeline = list(pipeline)
+        intent_service = croft.intent_service
+        synthetic = [SyntheticSkill(croft.bus, i, vocab, intent_files,
+                                    fallback=i < fallbacks,
+                                    converse=i < converse,
+                                    res_dir=res_dir)
+                     for i in range(skills)]
+
+        tracemalloc.start()
+        mem_start = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        for skill in synthetic:
+            skill.register()
+        registration_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if intent_service.padatious_service is not None:
+            intent_service.padatious_service.train()
+        training_time = time.perf_counter() - start
+
+        mem_current, mem_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # round robin over adapt, padatious, converse and fallback utterances
+        queries = [[u for s in synthetic for u in s.adapt_utterances()],
+                   [u for s in synthetic for u in s.padatious_utterances()],
+                   [f"continue skill {i}" for i in range(converse)],
+                   [f"blorp zzz{i}" for i in range(max(fallbacks, 1))]]
+        queries = [q for q in queries if q]
+        workload = [queries[i % len(queries)][(i // len(queries)) % len(queries[i % len(queries)])]
+                    for i in range(utterances)]
+
+        # converse handlers are only asked while the skill is active
+        for skill in synthetic:
+            if skill.converse:
+                croft.bus.emit(skill._msg("intent.service.skills.activate",
+                                          {"skill_id": skill.skill_id}))
+
+        intent_service.stats.reset()
+        latencies = []
+        start = time.perf_counter()
+        for utt in workload:
+            t = time.perf_counter()
+            croft.bus.emit(Message("recognizer_loop:utterance",
+                                   {"utterances": [utt], "lang": "en-us"}))
+            latencies.append(time.perf_counter() - t)
+        total_time = time.perf_counter() - start
+
+        stages = {}
+        for stage, outcomes in intent_service.stats.serialize().items():
+            stages[stage] = {outcome: {k: v for k, v in summary.items()
+                                       if k in ("count", "p50", "p95", "p99")}
+                             for outcome, summary in outcomes.items()}
+
+        return {
+            "config": {"skills": skills, "vocab": vocab,
+                       "intent_files": intent_files, "fallbacks": fallbacks,
+                       "converse": converse, "utterances": utterances,
+                       "pipeline": list(SessionManager.default_session.pipeline),
+                       "padatious": intent_service.padatious_service is not None},
+            "registration_time": registration_time,
+            "training_time": training_time,
+            "memory": {"registry_bytes": mem_current - mem_start,
+                       "peak_bytes": mem_peak - mem_start,
+                       "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+            "latency": percentiles(latencies),
+            "stages": stages,
+            "throughput": len(workload) / total_time if total_time else 0.0
+        }
+    finally:
+        croft.stop()
+        SessionManager.default_session.active_skills = []
+        SessionManager.default_session.pipeline = default_pipeline
+        tmp_dir.cleanup()
+
+
+def flatten_metrics(results: dict, prefix: str = "") -> Dict[str, float]:
+    """flat dict of metric path -> value, excluding config and sample counts"""
+    metrics = {}
+    for k, v in results.items():
+        if k in ("config", "count"):
+            continue
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            metrics.update(flatten_metrics(v, f"{key}."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            metrics[key] = v
+    return metrics
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.2) -> List[str]:
+    """compare results against a baseline run
+
+    Args:
+        results (dict): output of run_benchmark
+        baseline (dict): output of a previous run_benchmark
+        threshold (float): allowed relative change, 0.2 is 20%
+
+    Returns:
+        list of human readable regressions, empty if none
+    """
+    regressions = []
+    current = flatten_metrics(results)
+    for metric, old in flatten_metrics(baseline).items():
+        new = current.get(metric)
+        if new is None or not old:
+            continue
+        if metric.split(".")[-1] in HIGHER_IS_BETTER:
+            regressed = new < old * (1 - threshold)
+        else:
+            regressed = new > old * (1 + threshold)
+        if regressed:
+            regressions.append(f"{metric}: {old:.6g} -> {new:.6g} "
+                               f"({(new - old) / old:+.1%})")
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="OVOS intent pipeline benchmark")
+    parser.add_argument("--skills", type=int, default=10)
+    parser.add_argument("--vocab", type=int, default=5,
+                        help="adapt keywords and intents per skill")
+    parser.add_argument("--intent-files", type=int, default=2,
+                        help="padatious .intent files per skill")
+    parser.add_argument("--fallbacks", type=int, default=2,
+                        help="number of skills with a fallback handler")
+    parser.add_argument("--converse", type=int, default=2,
+                        help="number of skills with a converse handler")
+    parser.add_argument("--utterances", type=int, default=100)
+    parser.add_argument("--pipeline", help="comma separated pipeline, "
+                                           "default from mycroft.conf")
+    parser.add_argument("--output", help="write results to this json file")
+    parser.add_argument("--baseline", help="json results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression, default 0.2 (20%%)")
+    args = parser.parse_args(args)
+
+    results = run_benchmark(args.skills, args.vocab, args.intent_files,
+                            args.fallbacks, args.converse, args.utterances,
+                            args.pipeline.split(",") if args.pipeline else None)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            LOG.warning("baseline was run with a different configuration")
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""voc_match micro-benchmark
+
+Compares the precompiled vocabulary matcher against the per line regex
+matching it replaced, over the stop vocabularies of every language shipped
+in ovos_core/locale, and reports the time per call as json
+
+    python -m test.benchmark.voc_match --iterations 2000
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Dict, List
+
+from ovos_core.intent_services.stop_service import StopService
+from ovos_core.intent_services.voc_match import VocMatcher
+from ovos_utils.messagebus import FakeBus
+
+UTTERANCES = ["stop", "please stop that right now", "what is the weather like",
+              "tell me a joke about cats", "cancel all", "play some music"]
+
+
+def legacy_match(utt: str, vocab: List[str], exact: bool = False) -> bool:
+    """voc_match as implemented before the compiled matcher"""
+    if exact:
+        return any(i.strip() == utt for i in vocab)
+    return any([re.match(r'.*\b' + i + r'\b.*', utt) for i in vocab])
+
+
+def _time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def run_benchmark(iterations: int = 1000) -> dict:
+    """run the benchmark and return the results
+
+    Args:
+        iterations (int): calls timed per vocabulary and matching mode
+    """
+    vocabs = StopService(FakeBus())._voc_cache
+    results: Dict[str, dict] = {}
+    for lang, files in sorted(vocabs.items()):
+        for voc_filename, vocab in sorted(files.items()):
+            start = time.perf_counter()
+            matcher = VocMatcher(vocab)
+            compile_time = time.perf_counter() - start
+            for exact in (True, False):
+                mode = "exact" if exact else "contains"
+                for utt in UTTERANCES:  # same answers as the legacy matching
+                    assert matcher.match(utt, exact) == \
+                           legacy_match(utt, vocab, exact), (lang, voc_filename, utt)
+                legacy = _time_per_call(
+                    lambda: [legacy_match(u, vocab, exact) for u in UTTERANCES],
+                    iterations) / len(UTTERANCES)
+                compiled = _time_per_call(
+                    lambda: [matcher.match(u, exact) for u in UTTERANCES],
+                    iterations) / len(UTTERANCES)
+                results[f"{lang}.{voc_filename}.{mode}"] = {
+                    "lines": len(vocab),
+                    "compile_time": compile_time,
+                    "legacy": legacy,
+                    "compiled": compiled,
+                    "speedup": legacy / compiled if compiled else 0.0}
+    return {"config": {"iterations": iterations, "utterances": len(UTTERANCES)},
+            "vocabularies": results}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="OVOS voc_match micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--output", help="write results to this json file")
+    args = parser.parse_args(args)
+
+    results = run_benchmark(args.iterations)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
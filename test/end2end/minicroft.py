@@ -56,6 +56,7 @@ class MiniCroft(SkillManager):
     def stop(self):
         super().stop()
         self.scheduler.shutdown()
+        self.intent_service.shutdown()
         SessionManager.bus = None
         SessionManager.sessions = {}
         SessionManager.default_session = SessionManager.sessions["default"] = Session("default")
@@ -1,7 +1,13 @@
 import json
+import time
 import unittest
+from threading import Event, Thread
+from unittest.mock import patch
 
 from mycroft.skills.intent_services.commonqa_service import CommonQAService
+from ovos_core.intent_services.commonqa_service import QueryState
+from ovos_core.intent_services.match_cache import MatchCache
+from ovos_core.intent_services.scatter_gather import CORRELATION_KEY
 from ovos_tskill_fakewiki import FakeWikiSkill
 from ovos_utils.messagebus import FakeBus, Message
 
@@ -160,4 +166,199 @@ class TestCommonQuery(unittest.TestCase):
                 m["context"].pop("session")  # simplify test comparisons
             if "session" in msg.get("context", {}):
                 msg["context"].pop("session")  # simplify test comparisons
+            m.get("context", {}).pop(CORRELATION_KEY, None)  # random per query
             self.assertEqual(msg, m, f"idx={ctr}|emitted={m}")
+
+
+class TestQueryAggregation(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.cc = CommonQAService(self.bus)
+        self.cc._max_time = 0.5
+        self.cc._min_wait = 0.2
+        self.cc._extension_time = 0.6
+        self.cc.common_query_skills = ["a", "b"]
+        self.answered = None
+
+    def ask(self):
+        def question():
+            self.answered = self.cc.handle_question(
+                Message("common_query.question", {"utterance": "what is love"}))
+
+        t = Thread(target=question, daemon=True)
+        t.start()
+        while not self.cc.active_queries:
+            time.sleep(0.01)
+        return t, list(self.cc.active_queries.values())[0]
+
+    def reply(self, query, data):
+        msg = Message("question:query.response",
+                      {"phrase": "what is love", **data},
+                      {CORRELATION_KEY: query.gather.gather_id})
+        start = time.monotonic()
+        self.cc.handle_query_response(msg)
+        # recording a reply never parks the bus thread
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_all_skills_answered(self):
+        t, query = self.ask()
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.5})
+        self.assertEqual(query.state, QueryState.SEARCHING)
+        self.reply(query, {"skill_id": "b", "answer": "don't hurt me", "conf": 0.8})
+        t.join(0.2)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(self.answered, (True, "b"))
+        self.assertEqual(query.state, QueryState.DONE)
+        # replies after completion are ignored
+        self.reply(query, {"skill_id": "a", "answer": "no more", "conf": 1.0})
+        self.assertEqual(len(query.replies), 2)
+
+    def test_deadline(self):
+        t, query = self.ask()
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.5})
+        t.join(2)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(self.answered, (True, "a"))
+        self.assertGreaterEqual(time.monotonic() - query.gather.started, 0.5)
+
+    def test_extension(self):
+        t, query = self.ask()
+        time.sleep(0.3)
+        self.reply(query, {"skill_id": "a", "searching": True})
+        # the deadline moved past the max response wait
+        t.join(0.3)
+        self.assertTrue(t.is_alive())
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.5})
+        self.reply(query, {"skill_id": "b"})
+        t.join(0.2)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(self.answered, (True, "a"))
+
+    def test_unknown_skills(self):
+        self.cc.common_query_skills = None
+        t, query = self.ask()
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.5})
+        # nobody is searching, done once the minimum wait passed
+        t.join(0.4)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(self.answered, (True, "a"))
+
+    def test_early_answer(self):
+        self.cc._early_answer = True
+        self.cc._early_conf = 0.7
+        for _ in range(5):
+            self.cc.answer_history.record("b", "en-us", 0.5)
+        t, query = self.ask()
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.8})
+        # "b" never answered above 0.5, no need to wait for it
+        t.join(0.2)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(self.answered, (True, "a"))
+        skills = self.cc.skill_latency.serialize()
+        self.assertEqual(list(skills), ["a"])
+        self.assertEqual(skills["a"]["common_query"]["count"], 1)
+
+    def test_early_answer_beaten(self):
+        self.cc._early_answer = True
+        self.cc._early_conf = 0.7
+        for conf in (0.5, 0.5, 0.9, None, 0.5):
+            self.cc.answer_history.record("b", "en-us", conf)
+        t, query = self.ask()
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.8})
+        t.join(0.2)
+        self.assertTrue(t.is_alive())
+        self.reply(query, {"skill_id": "b", "answer": "don't hurt me", "conf": 0.9})
+        t.join(0.2)
+        self.assertEqual(self.answered, (True, "b"))
+
+    def test_answer_cache(self):
+        self.cc.answer_cache = MatchCache(maxsize=2)
+        self.cc.handle_skill_pong(Message("ovos.common_query.pong",
+                                          {"skill_id": "b", "cache_ttl": 60}))
+        t, query = self.ask()
+        self.reply(query, {"skill_id": "a", "answer": "baby", "conf": 0.5})
+        self.reply(query, {"skill_id": "b", "answer": "don't hurt me", "conf": 0.8})
+        t.join(0.2)
+        self.assertEqual(self.answered, (True, "b"))
+
+        emitted = []
+        self.bus.on("message", lambda m: emitted.append(json.loads(m)["type"]))
+        answered = self.cc.handle_question(
+            Message("common_query.question", {"utterance": "What is love?"}))
+        self.assertEqual(answered, (True, "b"))
+        self.assertEqual(emitted, ["question:action"])
+        self.assertEqual(self.cc.answer_cache.serialize()["hits"], 1)
+
+        # answers of skills without a ttl are not cached
+        self.cc.handle_question(Message("common_query.question",
+                                        {"utterance": "what is hate"}))
+        self.assertIn("question:query", emitted)
+
+    def test_answer_cache_detach(self):
+        self.cc.answer_cache = MatchCache(maxsize=2)
+        self.cc._answer_ttls = {"b": 60}
+        key = self.cc._answer_cache_key("what is love", "en-us")
+        self.cc.answer_cache.put(key, {"skill_id": "b"}, self.cc.answer_ttl("b"))
+        self.bus.emit(Message("detach_skill", {"skill_id": "b:"}))
+        self.assertFalse(self.cc.answer_cache.get(
+            self.cc._answer_cache_key("what is love", "en-us"))[0])
+
+    def test_concurrent_queries(self):
+        t1, q1 = self.ask()
+        t2 = Thread(target=self.cc.handle_question, daemon=True,
+                    args=(Message("common_query.question",
+                                  {"utterance": "what is hate"}),),)
+        t2.start()
+        while len(self.cc.active_queries) < 2:
+            time.sleep(0.01)
+        q2 = self.cc.active_queries[self.cc._session_queries["default"]]
+        self.assertIsNot(q1, q2)
+        self.assertIsNot(q1.completed, q2.completed)
+
+        # same session, replies reach the query they answer
+        self.reply(q2, {"skill_id": "a", "answer": "hate", "conf": 0.5})
+        self.reply(q1, {"skill_id": "a", "answer": "baby", "conf": 0.5})
+        self.reply(q1, {"skill_id": "b", "answer": "don't hurt me", "conf": 0.8})
+        t1.join(0.2)
+        self.assertEqual(self.answered, (True, "b"))
+        self.assertEqual([r["answer"] for r in q2.replies], ["hate"])
+
+        # replies without a correlation id go to the latest question
+        self.cc.handle_query_response(Message("question:query.response",
+                                              {"phrase": "what is hate",
+                                               "skill_id": "b"}))
+        t2.join(0.2)
+        self.assertFalse(t2.is_alive())
+        self.assertEqual(self.cc.active_queries, {})
+
+    def test_timeout_cleanup(self):
+        self.cc._max_time = 0.05
+        # neither the query timer nor a reply ever completes the query
+        with patch.object(self.cc, "_schedule"), \
+                patch.object(Event, "wait", return_value=False):
+            with self.assertRaises(TimeoutError):
+                self.cc.handle_question(
+                    Message("common_query.question", {"utterance": "what is love"}))
+        self.assertEqual(self.cc.active_queries, {})
+        self.assertEqual(self.cc._session_queries, {})
+
+    def test_timeout_cancels_timer(self):
+        self.cc._max_time = 0.05
+        scheduled = []
+        schedule = self.cc._schedule
+
+        def spy(query):
+            scheduled.append(query)
+            schedule(query)
+
+        with patch.object(self.cc, "_schedule", spy), \
+                patch.object(self.cc, "_advance"), \
+                patch.object(Event, "wait", return_value=False):
+            with self.assertRaises(TimeoutError):
+                self.cc.handle_question(
+                    Message("common_query.question", {"utterance": "what is love"}))
+        query = scheduled[0]
+        self.assertTrue(query.timer.cancelled)
+        # a checkpoint already running when the question gave up
+        self.cc._advance(query)
+        self.assertEqual(query.state, QueryState.SELECTING)
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_core.intent_services.active_skills import ActivationCounter, ActiveSkillsCache, \
+    expire_active_skills
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot
+from ovos_core.intent_services.converse_service import ConverseService
+from ovos_utils.messagebus import FakeBus
+
+
+class TestActiveSkills(TestCase):
+    def test_expire(self):
+        session = Session("a")
+        now = time.time()
+        session.active_skills = [["fresh", now], ["stale", now - 10], ["long", now - 10]]
+        self.assertEqual(expire_active_skills(session, {"long": 60}, 5), ["stale"])
+        self.assertEqual(session.active_skills, [["fresh", now], ["long", now - 10]])
+        # nothing expired, the list is not rebuilt
+        active = session.active_skills
+        self.assertEqual(expire_active_skills(session, {"long": 60}, 5), [])
+        self.assertIs(session.active_skills, active)
+
+    def test_cache(self):
+        cache = ActiveSkillsCache(max_entries=2)
+        session = Session("a")
+        session.activate_skill("old")
+        session.activate_skill("new")
+        message = Message("", context={"session": session.serialize()})
+        self.assertEqual(cache.get(message), ["new", "old"])
+        self.assertEqual(len(cache._entries), 1)
+        # callers may modify the returned list
+        cache.get(message).clear()
+        self.assertEqual(cache.get(message), ["new", "old"])
+        # a serialized session replaces the entry
+        session.activate_skill("old")
+        message.context["session"] = session.serialize()
+        self.assertEqual(cache.get(message), ["old", "new"])
+        for sess in (Session("b"), Session("c")):
+            cache.get(Message("", context={"session": sess.serialize()}))
+        self.assertEqual(len(cache._entries), 2)
+
+    def test_converse_timeout(self):
+        config = {"skills": {"converse": {"timeout": 5}}}
+        converse = ConverseService(FakeBus(),
+                                   config_snapshot=ConfigSnapshot(config=config))
+        session = Session("a")
+        session.active_skills = [["fresh", time.time()], ["stale", time.time() - 10]]
+        message = Message("", context={"session": session.serialize()})
+        self.assertEqual(converse.get_active_skills(message), ["fresh", "stale"])
+        converse._check_converse_timeout(message)
+        self.assertEqual(converse.get_active_skills(message), ["fresh"])
+
+
+class TestActivationCounter(TestCase):
+    def setUp(self):
+        self.counter = ActivationCounter(max_sessions=2)
+
+    def test_per_session(self):
+        self.assertEqual(self.counter.increment("a", "skill"), 1)
+        self.assertEqual(self.counter.increment("a", "skill"), 2)
+        self.assertEqual(self.counter.get("b", "skill"), 0)
+        self.counter.reset("a", "skill")
+        self.assertEqual(self.counter.get("a", "skill"), 0)
+        # nothing is kept for sessions without activations
+        self.assertEqual(dict(self.counter._sessions), {})
+
+    def test_lru(self):
+        for session_id in "abc":
+            self.counter.increment(session_id, "skill")
+        self.assertEqual(list(self.counter._sessions), ["b", "c"])
+        self.counter.increment("b", "skill")
+        self.counter.increment("d", "skill")
+        self.assertEqual(list(self.counter._sessions), ["b", "d"])
+
+    def test_concurrent(self):
+        counter = ActivationCounter()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda i: counter.increment(str(i % 4), "skill"),
+                          range(400)))
+        self.assertEqual([counter.get(str(i), "skill") for i in range(4)],
+                         [100] * 4)
+
+    def test_converse_max_activations(self):
+        config = {"skills": {"converse": {"max_activations": 1}}}
+        converse = ConverseService(FakeBus(),
+                                   config_snapshot=ConfigSnapshot(config=config))
+
+        def activate(session):
+            message = Message("", context={"session": session.serialize()})
+            converse.activate_skill("skill", message=message)
+            return Session.deserialize(message.context["session"]).active_skills
+
+        a, b = Session("a"), Session("b")
+        self.assertTrue(activate(a))
+        self.assertTrue(activate(a))
+        self.assertFalse(activate(a))
+        # another client is not limited by the first one
+        self.assertTrue(activate(b))
@@ -0,0 +1,94 @@
+import gc
+import weakref
+from unittest import TestCase
+
+from ovos_bus_client.message import Message
+from ovos_config.config import Configuration
+from ovos_core.intent_services import config_snapshot
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot, ConverseConfig, StopConfig
+from ovos_core.intent_services.converse_service import ConverseService
+from ovos_utils.messagebus import FakeBus
+from ovos_workshop.permissions import ConverseActivationMode
+
+from test.benchmark.config_snapshot import legacy_reads, run_benchmark, snapshot_reads
+
+
+class TestConfigSnapshot(TestCase):
+    def test_defaults(self):
+        self.assertEqual(ConverseConfig.from_config(None), ConverseConfig())
+        self.assertEqual(StopConfig.from_config({}), StopConfig())
+        converse = ConverseConfig.from_config({"converse_activation": None,
+                                               "converse_blacklist": ["a"],
+                                               "skill_timeouts": {"a": 10}})
+        self.assertEqual(converse.converse_activation, ConverseActivationMode.ACCEPT_ALL)
+        self.assertEqual(converse.converse_blacklist, ("a",))
+        with self.assertRaises(TypeError):
+            converse.skill_timeouts["b"] = 5
+
+    def test_refresh(self):
+        config = {"skills": {"stop": {"min_conf": 0.8}}}
+        snapshot = ConfigSnapshot(config=config)
+        changes = []
+        snapshot.on_change(changes.append)
+        self.assertEqual(snapshot.current.stop.min_conf, 0.8)
+
+        snapshot.refresh()
+        self.assertEqual(changes, [])
+        config["skills"]["stop"]["min_conf"] = 0.3
+        # not re-read until told the configuration changed
+        self.assertEqual(snapshot.current.stop.min_conf, 0.8)
+        snapshot.refresh()
+        self.assertEqual(snapshot.current.stop.min_conf, 0.3)
+        self.assertEqual(changes, [snapshot.current])
+
+    def test_bus_update(self):
+        bus = FakeBus()
+        config = {"skills": {"converse": {"parallel": False}}}
+        converse = ConverseService(bus, config_snapshot=ConfigSnapshot(bus, config))
+        self.assertFalse(converse.settings.parallel)
+        config["skills"]["converse"]["parallel"] = True
+        bus.emit(Message("configuration.updated"))
+        self.assertTrue(converse.settings.parallel)
+        self.assertEqual(converse.config, {"parallel": True})
+        # a copy, callers may modify it
+        self.assertIsInstance(converse.config, dict)
+        converse.config["parallel"] = False
+        self.assertTrue(converse.settings.parallel)
+
+    def test_patch(self):
+        bus = FakeBus()
+        snapshot = ConfigSnapshot(bus)
+        patch = Message("configuration.patch",
+                        {"config": {"skills": {"stop": {"test_patch": True}}}})
+        try:
+            # ovos_config merges patches into its defaults, use an unused key
+            Configuration.patch(patch)
+            # applied by Configuration, the snapshot only learns it changed
+            self.assertFalse(snapshot.current.stop.raw.get("test_patch"))
+            bus.emit(patch)
+            self.assertTrue(snapshot.current.stop.raw.get("test_patch"))
+        finally:
+            Configuration.patch_clear(Message("configuration.patch.clear"))
+            snapshot.shutdown()
+
+    def test_file_watcher(self):
+        snapshot = ConfigSnapshot(FakeBus())
+        self.assertIn(snapshot, config_snapshot._watched_snapshots)
+        config_snapshot._config_files_changed()
+        self.assertTrue(snapshot._stale)
+        snapshot.current
+        self.assertFalse(snapshot._stale)
+        snapshot.shutdown()
+        self.assertNotIn(snapshot, config_snapshot._watched_snapshots)
+        # snapshots of a given config do not follow the configuration files
+        snapshot = ConfigSnapshot(FakeBus(), {})
+        self.assertNotIn(snapshot, config_snapshot._watched_snapshots)
+        # nor do snapshots nobody references anymore
+        snapshot = weakref.ref(ConfigSnapshot(FakeBus()))
+        gc.collect()
+        self.assertIsNone(snapshot())
+
+    def test_benchmark(self):
+        self.assertEqual(legacy_reads(), snapshot_reads(ConfigSnapshot()))
+        results = run_benchmark(iterations=1)
+        self.assertIn("saved_per_utterance", results)
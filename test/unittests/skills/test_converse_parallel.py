@@ -0,0 +1,94 @@
+import time
+from threading import Thread
+from unittest import TestCase
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session, UtteranceState
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot
+from ovos_core.intent_services.converse_service import ConverseService
+from ovos_utils.messagebus import FakeBus
+
+
+class ConversingSkill:
+    """converse skill stub recording the requests it gets"""
+
+    def __init__(self, bus, skill_id, handles, delay=0.0):
+        self.bus = bus
+        self.skill_id = skill_id
+        self.handles = handles
+        self.delay = delay
+        self.events = []
+        bus.on(f"{skill_id}.converse.request", self.handle_request)
+        bus.on(f"{skill_id}.converse.get_response",
+               lambda m: self.events.append("get_response"))
+        bus.on(f"{skill_id}.converse.abort", lambda m: self.events.append("abort"))
+
+    def handle_request(self, message):
+        def reply():
+            time.sleep(self.delay)
+            self.events.append("request")
+            self.bus.emit(message.reply("skill.converse.response",
+                                        {"skill_id": self.skill_id,
+                                         "result": self.handles}))
+        if self.delay:
+            Thread(target=reply, daemon=True).start()
+        else:
+            reply()
+
+
+class TestParallelConverse(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.converse = ConverseService(self.bus, config_snapshot=ConfigSnapshot(
+            config={"skills": {"converse": {"parallel": True}}}))
+        self.message = Message("recognizer_loop:utterance",
+                               context={"session": Session("123").serialize()})
+
+    def run_converse(self, skill_ids):
+        return self.converse._parallel_converse(skill_ids, ["hello"], "en-us",
+                                                self.message)
+
+    def test_priority_order(self):
+        a = ConversingSkill(self.bus, "a", False)
+        b = ConversingSkill(self.bus, "b", True, delay=0.2)
+        c = ConversingSkill(self.bus, "c", True)
+        self.assertEqual(self.run_converse(["a", "b", "c"]), "b")
+        # every skill was asked, the ones after the winner lost
+        self.assertEqual(a.events, ["request"])
+        self.assertEqual(b.events, ["request"])
+        self.assertEqual(c.events, ["request", "abort"])
+
+    def test_no_wait_for_lower_priority(self):
+        ConversingSkill(self.bus, "a", True)
+        b = ConversingSkill(self.bus, "b", True, delay=2)
+        start = time.monotonic()
+        self.assertEqual(self.run_converse(["a", "b"]), "a")
+        self.assertLess(time.monotonic() - start, 1)
+        # told it lost before it even answered
+        self.assertEqual(b.events, ["abort"])
+
+    def test_timeout(self):
+        self.converse.config_snapshot = ConfigSnapshot(config={"skills": {"converse": {
+            "parallel": True, "parallel_timeout": 0.1}}})
+        b = ConversingSkill(self.bus, "b", True, delay=2)
+        start = time.monotonic()
+        self.assertIsNone(self.run_converse(["b"]))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(b.events, ["abort"])
+
+    def test_get_response(self):
+        a = ConversingSkill(self.bus, "a", False)
+        b = ConversingSkill(self.bus, "b", True)
+        c = ConversingSkill(self.bus, "c", True)
+        session = Session("123")
+        session.utterance_states["b"] = UtteranceState.RESPONSE
+        self.message.context["session"] = session.serialize()
+        self.assertEqual(self.run_converse(["a", "b", "c"]), "b")
+        self.assertEqual(a.events, ["request"])
+        self.assertEqual(b.events, ["get_response"])
+        self.assertEqual(c.events, [])
+
+    def test_none_handled(self):
+        a = ConversingSkill(self.bus, "a", False)
+        self.assertIsNone(self.run_converse(["a"]))
+        self.assertEqual(a.events, ["request"])
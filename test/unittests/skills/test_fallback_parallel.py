@@ -0,0 +1,92 @@
+import time
+from threading import Thread
+from unittest import TestCase
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_core.intent_services.fallback_service import FallbackService
+from ovos_utils.messagebus import FakeBus
+
+
+class PreparedFallback:
+    """fallback skill stub supporting the prepare/commit handshake"""
+
+    def __init__(self, bus, skill_id, priority, accept, delay=0.0, prepare=True):
+        self.bus = bus
+        self.skill_id = skill_id
+        self.accept = accept
+        self.delay = delay
+        self.events = []
+        prefix = f"ovos.skills.fallback.{skill_id}"
+        bus.on(f"{prefix}.prepare", self.handle_prepare)
+        bus.on(f"{prefix}.commit", self.handle_commit)
+        bus.on(f"{prefix}.request", self.handle_commit)
+        bus.on(f"{prefix}.abort", lambda m: self.events.append("abort"))
+        bus.emit(Message("ovos.skills.fallback.register",
+                         {"skill_id": skill_id, "priority": priority,
+                          "prepare": prepare}))
+
+    def handle_prepare(self, message):
+        def reply():
+            time.sleep(self.delay)
+            self.events.append("prepare")
+            self.bus.emit(message.reply("ovos.skills.fallback.prepare.response",
+                                        {"skill_id": self.skill_id,
+                                         "result": self.accept}))
+        if self.delay:
+            Thread(target=reply, daemon=True).start()
+        else:
+            reply()
+
+    def handle_commit(self, message):
+        self.events.append("handle")
+        self.bus.emit(message.reply(f"ovos.skills.fallback.{self.skill_id}.response",
+                                    {"result": self.accept}))
+
+
+class TestParallelFallback(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.fallback = FallbackService(self.bus)
+        self.fallback.fallback_config = {"parallel": True, "prepare_timeout": 2}
+        self.message = Message("test", context={"session": Session("fb").serialize()})
+
+    def dispatch(self, skills):
+        ids = [s.skill_id for s in sorted(skills, key=lambda s: self.fallback.registered_fallbacks[s.skill_id])]
+        return self.fallback._parallel_fallback(ids, ["hello"], "en-us", self.message)
+
+    def test_priority_order(self):
+        low = PreparedFallback(self.bus, "low", 80, accept=True)
+        high = PreparedFallback(self.bus, "high", 20, accept=True)
+        no = PreparedFallback(self.bus, "no", 10, accept=False)
+        self.assertEqual(self.dispatch([low, high, no]), "high")
+        # only the committed skill runs its handler
+        self.assertEqual(high.events, ["prepare", "handle"])
+        self.assertEqual(low.events, ["prepare", "abort"])
+        self.assertEqual(no.events, ["prepare", "abort"])
+
+    def test_commit_without_waiting_for_lower_priority(self):
+        high = PreparedFallback(self.bus, "high", 20, accept=True)
+        slow = PreparedFallback(self.bus, "slow", 80, accept=True, delay=1)
+        start = time.monotonic()
+        self.assertEqual(self.dispatch([high, slow]), "high")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(slow.events, ["abort"])
+
+    def test_waits_for_higher_priority(self):
+        high = PreparedFallback(self.bus, "high", 20, accept=True, delay=0.2)
+        low = PreparedFallback(self.bus, "low", 80, accept=True)
+        self.assertEqual(self.dispatch([high, low]), "high")
+        self.assertEqual(low.events, ["prepare", "abort"])
+
+    def test_mixed_with_legacy_skills(self):
+        legacy = PreparedFallback(self.bus, "legacy", 20, accept=True, prepare=False)
+        low = PreparedFallback(self.bus, "low", 80, accept=True)
+        self.assertEqual(self.dispatch([legacy, low]), "legacy")
+        self.assertEqual(legacy.events, ["handle"])
+        self.assertEqual(low.events, ["prepare", "abort"])
+
+    def test_unhandled(self):
+        no = PreparedFallback(self.bus, "no", 10, accept=False)
+        self.assertIsNone(self.dispatch([no]))
+        self.assertEqual(no.events, ["prepare", "abort"])
@@ -0,0 +1,102 @@
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_core.intent_services.fallback_service import FallbackService, FallbackV1Host
+from ovos_core.intent_services.stats import PipelineStats
+from ovos_utils.messagebus import FakeBus
+from ovos_workshop.skills.fallback import FallbackSkillV1
+
+
+class TestFallbackService(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.stats = PipelineStats()
+        self.fallback = FallbackService(self.bus, stats=self.stats)
+        self.message = Message("test", context={"session": Session("fb").serialize()})
+        self.v1_requests = []
+        self.bus.on("mycroft.skills.fallback", self.handle_v1)
+
+    def handle_v1(self, message):
+        self.v1_requests.append(message.data["fallback_range"])
+        self.bus.emit(message.response({"handled": False}))
+
+    def advertise(self, host_id, priorities, skill_ids=()):
+        self.bus.emit(Message("ovos.skills.fallback.v1.register",
+                              {"host_id": host_id, "priorities": priorities,
+                               "skill_ids": list(skill_ids)}))
+
+    def test_skip_v1_without_handlers(self):
+        self.advertise("host", [])
+        self.assertIsNone(self.fallback.high_prio(["hello"], "en-us", self.message))
+        self.assertEqual(self.v1_requests, [])
+        self.assertEqual(self.stats.serialize()["fallback_v1"]["skipped"]["count"], 1)
+
+    def test_v1_handler_in_range(self):
+        self.advertise("host", [])
+        self.advertise("other_host", [50])
+        self.fallback.high_prio(["hello"], "en-us", self.message)
+        self.fallback.medium_prio(["hello"], "en-us", self.message)
+        self.assertEqual(self.v1_requests, [(5, 90)])
+        self.assertEqual(self.stats.serialize()["fallback_v1"]["unmatched"]["count"], 1)
+        self.bus.emit(Message("ovos.skills.fallback.v1.deregister",
+                              {"host_id": "other_host"}))
+        self.fallback.medium_prio(["hello"], "en-us", self.message)
+        self.assertEqual(self.v1_requests, [(5, 90)])
+
+    def test_v1_unknown_hosts(self):
+        # nothing advertised, v1 handlers may live in a process we don't know
+        self.fallback.high_prio(["hello"], "en-us", self.message)
+        self.assertEqual(self.v1_requests, [(0, 5)])
+
+    def test_v1_unreported_skills(self):
+        self.bus.emit(Message("mycroft.skills.loaded", {"id": "reported"}))
+        self.bus.emit(Message("mycroft.skills.list", {"other": {"active": True,
+                                                               "id": "other"}}))
+        self.advertise("host", [], ["reported"])
+        # "other" runs in a process that does not advertise its v1 handlers
+        self.fallback.high_prio(["hello"], "en-us", self.message)
+        self.assertEqual(self.v1_requests, [(0, 5)])
+        self.advertise("other_host", [], ["other"])
+        self.fallback.high_prio(["hello"], "en-us", self.message)
+        self.assertEqual(self.v1_requests, [(0, 5)])
+        # skills unloaded from a host that went away no longer need a report
+        self.bus.emit(Message("ovos.skills.fallback.v1.deregister",
+                              {"host_id": "other_host"}))
+        self.bus.emit(Message("mycroft.skills.shutdown", {"id": "other"}))
+        self.fallback.high_prio(["hello"], "en-us", self.message)
+        self.assertEqual(self.v1_requests, [(0, 5)])
+
+
+class TestFallbackV1Host(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.fallback = FallbackService(self.bus)
+        self.handlers = {}
+        patcher = mock.patch.object(FallbackSkillV1, "fallback_handlers", self.handlers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.skill_ids = []
+        self.host = FallbackV1Host(self.bus, lambda: self.skill_ids)
+
+    def test_advertise(self):
+        self.assertEqual(self.fallback.v1_fallbacks, {self.host.host_id: ()})
+        # a skill with a v1 handler loaded in the host process
+        def handler(message):
+            return True
+
+        self.handlers[50] = handler
+        self.skill_ids.append("skill")
+        self.bus.emit(Message("mycroft.skills.loaded", {"id": "skill"}))
+        self.assertEqual(self.fallback.v1_fallbacks, {self.host.host_id: (50,)})
+        self.assertEqual(self.fallback.v1_host_skills, {self.host.host_id: {"skill"}})
+        # every loaded skill is reported, no v1 handler in the high range
+        self.assertIsNone(self.fallback.high_prio(["hello"], "en-us", Message("test")))
+        self.assertIsNotNone(self.fallback.medium_prio(["hello"], "en-us", Message("test")))
+        self.host.shutdown()
+        self.assertEqual(self.fallback.v1_fallbacks, {})
+
+    def test_service_started_later(self):
+        self.handlers[95] = mock.Mock()
+        fallback = FallbackService(self.bus)
+        self.assertEqual(fallback.v1_fallbacks, {self.host.host_id: (95,)})
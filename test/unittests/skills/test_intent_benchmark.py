@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from test.benchmark.intent_pipeline import compare, flatten_metrics, run_benchmark
+
+
+class TestIntentBenchmark(TestCase):
+    def test_run(self):
+        pipeline = ["converse", "padatious_high", "adapt",
+                    "padatious_medium", "fallback_low"]
+        results = run_benchmark(skills=2, vocab=2, intent_files=1,
+                                fallbacks=1, converse=1, utterances=8,
+                                pipeline=pipeline)
+        self.assertEqual(results["config"]["pipeline"], pipeline)
+        self.assertEqual(results["latency"]["count"], 8)
+        self.assertGreater(results["throughput"], 0)
+        self.assertIn("adapt", results["stages"])
+        self.assertIn("converse", results["stages"])
+        self.assertGreater(results["memory"]["registry_bytes"], 0)
+        # a run never regresses against itself
+        self.assertEqual(compare(results, results), [])
+
+    def test_compare(self):
+        baseline = {"config": {"skills": 1}, "registration_time": 1.0,
+                    "latency": {"count": 10, "p50": 0.1}, "throughput": 100}
+        self.assertEqual(set(flatten_metrics(baseline)),
+                         {"registration_time", "latency.p50", "throughput"})
+        results = {"registration_time": 1.1,
+                   "latency": {"count": 1, "p50": 0.2}, "throughput": 50}
+        regressions = compare(results, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("latency.p50"))
+        self.assertTrue(regressions[1].startswith("throughput"))
+        self.assertEqual(compare(results, baseline, threshold=1.0), [])
@@ -0,0 +1,125 @@
+import threading
+from threading import Event, Thread
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_core.intent_services import IntentService
+from ovos_core.intent_services.concurrency import ReadWriteLock, SessionShardedExecutor, TimerQueue
+
+
+class TestSessionShardedExecutor(TestCase):
+    def test_order_within_session(self):
+        executor = SessionShardedExecutor(4)
+        results = []
+        futures = [executor.submit("A", results.append, i) for i in range(50)]
+        for f in futures:
+            f.result(timeout=1)
+        self.assertEqual(results, list(range(50)))
+        executor.shutdown()
+
+    def test_sessions_in_parallel(self):
+        executor = SessionShardedExecutor(4)
+        # find two sessions on different shards
+        other = next(f"session_{i}" for i in range(100)
+                     if executor.shard_for(f"session_{i}") != executor.shard_for("slow"))
+        release = Event()
+        slow = executor.submit("slow", release.wait, 5)
+        fast = executor.submit(other, lambda: "done")
+        self.assertEqual(fast.result(timeout=1), "done")
+        self.assertFalse(slow.done())
+        release.set()
+        self.assertTrue(slow.result(timeout=1))
+        executor.shutdown()
+
+
+class TestTimerQueue(TestCase):
+    def setUp(self):
+        self.timers = TimerQueue("test_timers")
+        self.addCleanup(self.timers.shutdown)
+
+    def test_deadline_order(self):
+        calls = []
+        done = Event()
+        self.timers.call_later(0.1, done.set)
+        self.timers.call_later(0.05, calls.append, "late")
+        self.timers.call_later(0.01, calls.append, "early")
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, ["early", "late"])
+
+    def test_cancel(self):
+        calls = []
+        done = Event()
+        self.timers.call_later(0.01, calls.append, "cancelled").cancel()
+        self.timers.call_later(0.05, done.set)
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, [])
+
+    def test_single_thread(self):
+        done = Event()
+        handles = [self.timers.call_later(5, done.set) for _ in range(20)]
+        # rearming a deadline does not start a thread
+        for handle in handles:
+            handle.cancel()
+        self.timers.call_later(0.01, done.set)
+        self.assertEqual(len([t for t in threading.enumerate()
+                              if t.name == "test_timers"]), 1)
+        self.assertTrue(done.wait(1))
+
+    def test_failing_callback(self):
+        done = Event()
+        self.timers.call_later(0, lambda: 1 / 0)
+        self.timers.call_later(0.01, done.set)
+        self.assertTrue(done.wait(1))
+
+
+class TestReadWriteLock(TestCase):
+    def test_concurrent_readers(self):
+        lock = ReadWriteLock()
+        with lock.read():
+            t = Thread(target=lambda: lock.acquire_read() or lock.release_read())
+            t.start()
+            t.join(1)
+            self.assertFalse(t.is_alive())
+
+    def test_writer_is_exclusive(self):
+        lock = ReadWriteLock()
+        entered = Event()
+
+        def write():
+            with lock:
+                entered.set()
+
+        with lock.read():
+            t = Thread(target=write)
+            t.start()
+            self.assertFalse(entered.wait(0.1))
+        self.assertTrue(entered.wait(1))
+        t.join()
+
+
+class TestUtteranceDispatch(TestCase):
+    def test_dispatch_to_session_worker(self):
+        intent_service = IntentService(mock.Mock())
+        intent_service.utterance_executor = SessionShardedExecutor(2)
+        handled = Event()
+        threads = []
+
+        def handle(message):
+            threads.append(message.context["session"]["session_id"])
+            handled.set()
+
+        intent_service.handle_utterance = handle
+        intent_service.dispatch_utterance(
+            Message("recognizer_loop:utterance", {"utterances": ["hello"]},
+                    {"session": {"session_id": "test"}}))
+        self.assertTrue(handled.wait(1))
+        self.assertEqual(threads, ["test"])
+        intent_service.shutdown()
+
+    def test_inline_dispatch(self):
+        intent_service = IntentService(mock.Mock())
+        intent_service.utterance_executor = None
+        intent_service.handle_utterance = mock.Mock()
+        msg = Message("recognizer_loop:utterance", {"utterances": ["hello"]})
+        intent_service.dispatch_utterance(msg)
+        intent_service.handle_utterance.assert_called_once_with(msg)
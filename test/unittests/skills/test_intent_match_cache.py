@@ -0,0 +1,149 @@
+import time
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_core.intent_services import IntentMatch, IntentService
+from ovos_core.intent_services.match_cache import MatchCache
+from ovos_workshop.intents import IntentBuilder
+
+
+def create_vocab_msg(keyword, value):
+    return Message('register_vocab',
+                   {'entity_value': value, 'entity_type': keyword})
+
+
+class TestMatchCache(TestCase):
+    def test_hit_and_miss(self):
+        cache = MatchCache(maxsize=2)
+        key = cache.make_key("adapt", ["hello"], "en-us")
+        self.assertEqual(cache.get(key), (False, None))
+        cache.put(key, None)
+        self.assertEqual(cache.get(key), (True, None))
+        self.assertEqual(cache.serialize()["hits"], 1)
+        self.assertEqual(cache.serialize()["misses"], 1)
+
+    def test_exact_utterances(self):
+        cache = MatchCache()
+        cache.put(cache.make_key("adapt", ["play Metallica"], "en-us"), 1)
+        for utt in ("play metallica", "play Metallica ", "play  Metallica"):
+            self.assertFalse(cache.get(cache.make_key("adapt", [utt], "en-us"))[0], utt)
+
+    def test_lru_eviction(self):
+        cache = MatchCache(maxsize=2)
+        keys = [cache.make_key("adapt", [str(i)], "en-us") for i in range(3)]
+        cache.put(keys[0], 0)
+        cache.put(keys[1], 1)
+        cache.get(keys[0])  # most recently used now
+        cache.put(keys[2], 2)
+        self.assertTrue(cache.get(keys[0])[0])
+        self.assertFalse(cache.get(keys[1])[0])
+
+    def test_ttl(self):
+        cache = MatchCache(ttl=0.05)
+        key = cache.make_key("adapt", ["hello"], "en-us")
+        cache.put(key, 1)
+        self.assertTrue(cache.get(key)[0])
+        time.sleep(0.1)
+        self.assertFalse(cache.get(key)[0])
+        # per entry expiration
+        cache.put(key, 1, ttl=10)
+        time.sleep(0.1)
+        self.assertTrue(cache.get(key)[0])
+
+    def test_generation(self):
+        cache = MatchCache()
+        key = cache.make_key("adapt", ["hello"], "en-us")
+        cache.put(key, 1)
+        cache.bump()
+        self.assertFalse(cache.get(cache.make_key("adapt", ["hello"], "en-us"))[0])
+        # results computed before the bump are discarded
+        cache.put(key, 1)
+        self.assertEqual(len(cache), 0)
+
+
+class TestIntentServiceMatchCache(TestCase):
+    def setUp(self):
+        self.intent_service = IntentService(mock.Mock())
+        self.intent_service.match_cache = MatchCache()
+        self.intent_service.invalidate_pipeline_plans()
+        self.intent_service.handle_register_vocab(
+            create_vocab_msg('testKeyword', 'test'))
+        intent = IntentBuilder('skill:testIntent').require('testKeyword')
+        self.intent_service.handle_register_intent(
+            Message('register_intent', intent.__dict__))
+        self.session = Session("cache-test", pipeline=["adapt"])
+        self.adapt = self.intent_service.get_pipeline(session=self.session)[0]
+
+    def test_cached_match(self):
+        cache = self.intent_service.match_cache
+        with mock.patch.object(self.intent_service.adapt_service, "calc_intent",
+                               wraps=self.intent_service.adapt_service.calc_intent) as calc:
+            self.intent_service._engines["adapt"] = calc
+            match = self.adapt(["test"], "en-us", Message(""))
+            self.assertEqual(match.intent_type, 'skill:testIntent')
+            self.assertEqual(self.adapt(["test"], "en-us", Message("")), match)
+            self.assertEqual(calc.call_count, 1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_entities_follow_the_utterance(self):
+        def calc(utterances, lang, message):
+            utt = utterances[0]
+            return IntentMatch("Adapt", "skill:playIntent",
+                               {"song": utt.split(" ", 1)[1]}, "skill", utt)
+
+        self.intent_service._engines["adapt"] = calc
+        first = self.intent_service._run_engine("adapt", ["play Metallica"],
+                                                "en-us", Message(""))
+        second = self.intent_service._run_engine("adapt", ["play metallica"],
+                                                 "en-us", Message(""))
+        self.assertEqual(first.intent_data, {"song": "Metallica"})
+        self.assertEqual(second.intent_data, {"song": "metallica"})
+        self.assertEqual(second.utterance, "play metallica")
+
+    def test_registry_change_invalidates(self):
+        cache = self.intent_service.match_cache
+        self.assertIsNone(self.adapt(["hello"], "en-us", Message("")))
+        generation = cache.generation
+        self.intent_service.handle_register_vocab(
+            create_vocab_msg('helloKeyword', 'hello'))
+        intent = IntentBuilder('skill:helloIntent').require('helloKeyword')
+        self.intent_service.handle_register_intent(
+            Message('register_intent', intent.__dict__))
+        self.assertGreater(cache.generation, generation)
+        match = self.adapt(["hello"], "en-us", Message(""))
+        self.assertEqual(match.intent_type, 'skill:helloIntent')
+
+        self.intent_service.handle_detach_intent(
+            Message('detach_intent', {"intent_name": 'skill:helloIntent'}))
+        self.assertIsNone(self.adapt(["hello"], "en-us", Message("")))
+
+    def test_adapt_context_bypass(self):
+        cache = self.intent_service.match_cache
+        sess = Session("context-test")
+        sess.context.inject_context({'data': [('test', 'testKeyword')],
+                                     'key': 'test', 'match': 'test',
+                                     'confidence': 1.0, 'origin': ''})
+        msg = Message("", context={"session": sess.serialize()})
+        self.adapt(["test"], "en-us", msg)
+        self.adapt(["test"], "en-us", msg)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+
+    def test_stats_reply(self):
+        self.adapt(["test"], "en-us", Message(""))
+        self.adapt(["test"], "en-us", Message(""))
+        self.intent_service.handle_get_stats(Message("intent.service.stats.get"))
+        reply = self.intent_service.bus.emit.call_args[0][0]
+        self.assertEqual(reply.data["match_cache"]["hits"], 1)
+        self.assertEqual(reply.data["match_cache"]["misses"], 1)
+
+    def test_padatious_retrain_invalidates(self):
+        padatious = self.intent_service.padatious_service
+        if padatious is None:
+            return  # skip test, padatious not installed
+        generation = self.intent_service.match_cache.generation
+        with mock.patch.object(padatious, "containers", {}):
+            padatious.train()
+        self.assertGreater(self.intent_service.match_cache.generation, generation)
@@ -19,7 +19,8 @@ from ovos_workshop.intents import IntentBuilder, Intent as AdaptIntent
 from ovos_config.locale import setup_locale
 from ovos_config import Configuration
 from ovos_bus_client.message import Message
-from ovos_core.intent_services import IntentService
+from ovos_bus_client.session import Session, SessionManager
+from ovos_core.intent_services import IntentService, is_dry_run
 from ovos_bus_client.util import get_message_lang
 from ovos_utils.log import LOG
 from ovos_core.intent_services.adapt_service import ContextManager
@@ -255,3 +256,230 @@ class TestAdaptIntent(TestCase):
     def test_unnamed_intent(self):
         intent = AdaptIntent()
         self.assertEqual(intent.name, "")
+
+
+class TestPipelinePlan(TestCase):
+    def setUp(self):
+        self.intent_service = IntentService(mock.Mock())
+        self.session = Session("plan-test", pipeline=["stop_high",
+                                                       "adapt",
+                                                       "fallback_low"])
+
+    def test_plan_is_cached(self):
+        plan = self.intent_service.get_pipeline_plan(session=self.session)
+        self.assertEqual([name for name, _ in plan],
+                         ["stop_high", "adapt", "fallback_low"])
+        self.assertIs(plan,
+                      self.intent_service.get_pipeline_plan(session=self.session))
+        skipped = self.intent_service.get_pipeline_plan(skips=["fallback_low"],
+                                                        session=self.session)
+        self.assertIsNot(plan, skipped)
+        self.assertEqual(len(skipped), 2)
+
+    def test_plan_invalidation(self):
+        plan = self.intent_service.get_pipeline_plan(session=self.session)
+        self.intent_service.handle_config_changed(Message("configuration.updated"))
+        self.assertIsNot(plan,
+                         self.intent_service.get_pipeline_plan(session=self.session))
+
+    def test_register_matcher(self):
+        matcher = mock.Mock(return_value=None)
+        self.session.pipeline = ["custom", "adapt", "unknown"]
+        plan = self.intent_service.get_pipeline_plan(session=self.session)
+        self.assertEqual([name for name, _ in plan], ["adapt"])
+        self.intent_service.register_matcher("custom", matcher)
+        plan = self.intent_service.get_pipeline_plan(session=self.session)
+        self.assertEqual([name for name, _ in plan], ["custom", "adapt"])
+        self.assertEqual(self.intent_service.get_pipeline(session=self.session)[0],
+                         matcher)
+
+    def test_register_matcher_gets_list(self):
+        received = []
+
+        def matcher(utterances, lang, message):
+            received.append(utterances)
+            utterances.append("mutated")  # a plain list, as before
+            return None
+
+        self.intent_service.register_matcher("custom", matcher)
+        self.intent_service.handle_utterance(
+            Message("recognizer_loop:utterance",
+                    {"utterances": ["hello", "hello"], "lang": "en-us"},
+                    {"session": {"session_id": "custom-test",
+                                 "pipeline": ["custom"]}}))
+        self.assertEqual(len(received), 1)
+        self.assertIs(type(received[0]), list)
+        self.assertEqual(received[0], ["hello", "mutated"])
+
+    def test_speculative_matching(self):
+        self.session.pipeline = ["converse", "padacioso_high", "adapt",
+                                 "fallback_low"]
+        patch = {"intents": {"speculative_matching": False}}
+        with mock.patch.dict(Configuration._Configuration__patch, patch):
+            plan = self.intent_service.get_pipeline_plan(session=self.session)
+        self.assertEqual(plan.speculative, {})
+
+        patch = {"intents": {"speculative_matching": True}}
+        with mock.patch.dict(Configuration._Configuration__patch, patch):
+            self.intent_service.invalidate_pipeline_plans()
+            plan = self.intent_service.get_pipeline_plan(session=self.session)
+        self.assertEqual(set(plan.speculative), {"padacioso_high", "adapt"})
+        self.assertEqual(plan.engines, ["padacioso", "adapt"])
+
+    def test_speculative_match(self):
+        self.intent_service.handle_register_vocab(
+            create_vocab_msg('testKeyword', 'test'))
+        intent = IntentBuilder('skill:testIntent').require('testKeyword')
+        self.intent_service.handle_register_intent(
+            Message('register_intent', intent.__dict__))
+        self.intent_service.converse.converse_with_skills = \
+            mock.Mock(return_value=None)
+        self.intent_service.fallback.low_prio = mock.Mock(return_value=None)
+
+        patch = {"intents": {"speculative_matching": True}}
+        with mock.patch.dict(Configuration._Configuration__patch, patch):
+            self.intent_service.invalidate_pipeline_plans()
+            msg = Message("recognizer_loop:utterance",
+                          {"utterances": ["test"], "lang": "en-us"},
+                          {"session": {"session_id": "speculative",
+                                       "pipeline": ["converse",
+                                                    "padacioso_high",
+                                                    "adapt",
+                                                    "fallback_low"]}})
+            match, _, _ = self.intent_service.handle_utterance(msg)
+        self.assertEqual(match.intent_type, 'skill:testIntent')
+        self.assertEqual(match.intent_service, 'Adapt')
+        self.intent_service.fallback.low_prio.assert_not_called()
+
+    def _speculative_utterance(self):
+        msg = Message("recognizer_loop:utterance",
+                      {"utterances": ["test"], "lang": "en-us"},
+                      {"session": {"session_id": "speculative",
+                                   "pipeline": ["converse", "adapt"]}})
+        patch = {"intents": {"speculative_matching": True}}
+        with mock.patch.dict(Configuration._Configuration__patch, patch):
+            self.intent_service.invalidate_pipeline_plans()
+            return self.intent_service.handle_utterance(msg)
+
+    def test_speculative_context_changed(self):
+        def converse(utterances, lang, message):
+            # an earlier stage changes the session context
+            sess = SessionManager.get(message)
+            sess.context.inject_context({"data": "value", "key": "testContext"})
+            message.context["session"] = sess.serialize()
+
+        self.intent_service.converse.converse_with_skills = \
+            mock.Mock(side_effect=converse)
+        calc_intent = self.intent_service.adapt_service.calc_intent = \
+            mock.Mock(return_value=None)
+        self._speculative_utterance()
+        # the result computed before converse ran was discarded
+        self.assertEqual(calc_intent.call_count, 2)
+
+    def test_speculative_engine_failure(self):
+        self.intent_service.converse.converse_with_skills = \
+            mock.Mock(return_value=None)
+        self.intent_service.adapt_service.calc_intent = \
+            mock.Mock(side_effect=RuntimeError)
+        self.intent_service.bus.emit.reset_mock()
+        match, _, _ = self._speculative_utterance()
+        self.assertIsNone(match)
+        sent = [c[0][0].msg_type for c in self.intent_service.bus.emit.call_args_list]
+        self.assertIn("complete_intent_failure", sent)
+
+
+class TestIntentBatch(TestCase):
+    def setUp(self):
+        self.intent_service = IntentService(mock.Mock())
+        self.intent_service.handle_register_vocab(
+            create_vocab_msg('testKeyword', 'test'))
+        intent = IntentBuilder('skill:testIntent').require('testKeyword')
+        self.intent_service.handle_register_intent(
+            Message('register_intent', intent.__dict__))
+        self.intent_service.converse.converse_with_skills = mock.Mock()
+        self.intent_service.fallback.low_prio = mock.Mock()
+        self.session = Session("batch-test", pipeline=["converse",
+                                                        "adapt",
+                                                        "fallback_low"])
+        self.msg = Message("intent.service.intent.get_batch",
+                           {"utterances": ["test", "nothing", "a test"],
+                            "lang": "en-us", "chunk_size": 2},
+                           {"session": self.session.serialize()})
+
+    def test_get_intent_batch(self):
+        intents = self.intent_service.get_intent_batch(
+            self.msg.data["utterances"], "en-us", self.msg)
+        self.assertEqual(len(intents), 3)
+        self.assertEqual(intents[0]['intent_name'], 'skill:testIntent')
+        self.assertEqual(intents[0]['handler'], 'match_intent')
+        self.assertIsNone(intents[1])
+        self.assertEqual(intents[2]['utterance'], 'a test')
+        # only side effect free matchers are used
+        self.intent_service.converse.converse_with_skills.assert_not_called()
+        self.intent_service.fallback.low_prio.assert_not_called()
+
+    def test_get_batch_chunks(self):
+        self.intent_service.handle_get_intent_batch(self.msg)
+        replies = [c[0][0] for c in self.intent_service.bus.emit.call_args_list
+                   if c[0][0].msg_type == "intent.service.intent.batch.reply"]
+        self.assertEqual([r.data["offset"] for r in replies], [0, 2])
+        self.assertEqual([r.data["done"] for r in replies], [False, True])
+        self.assertEqual(len(replies[0].data["intents"]), 2)
+        self.assertEqual(replies[1].data["intents"][0]['intent_name'],
+                         'skill:testIntent')
+
+    def test_empty_batch(self):
+        self.msg.data["utterances"] = []
+        self.intent_service.handle_get_intent_batch(self.msg)
+        reply = self.intent_service.bus.emit.call_args[0][0]
+        self.assertEqual(reply.data["intents"], [])
+        self.assertTrue(reply.data["done"])
+
+
+class TestDryRun(TestCase):
+    def setUp(self):
+        self.intent_service = IntentService(mock.Mock())
+        self.sess = Session("dry-run", pipeline=["stop_high", "adapt",
+                                                 "common_qa", "fallback_low"])
+        self.sess.activate_skill("skill")
+        self.intent_service.bus.emit.reset_mock()
+
+    def _emitted(self):
+        return [c[0][0].msg_type for c in self.intent_service.bus.emit.call_args_list]
+
+    def test_is_dry_run(self):
+        self.assertFalse(is_dry_run(None))
+        self.assertFalse(is_dry_run(Message("")))
+        self.assertTrue(is_dry_run(Message("", context={"dry_run": True})))
+
+    def test_stop_dry_run(self):
+        stop = self.intent_service.stop
+        msg = Message("", context={"session": self.sess.serialize(),
+                                   "dry_run": True})
+        for utt in ["stop", "stop everything"]:
+            match = stop.match_stop_high([utt], "en-us", msg)
+            self.assertEqual(match.intent_service, 'Stop')
+            self.assertIsNone(match.skill_id)
+        match = stop.match_stop_low(["stop"], "en-us", msg)
+        self.assertEqual(match.intent_service, 'Stop')
+        self.assertEqual(self._emitted(), [])
+
+    def test_skill_matchers_dry_run(self):
+        msg = Message("", {}, {"session": self.sess.serialize(),
+                               "dry_run": True})
+        self.assertIsNone(self.intent_service.converse.converse_with_skills(
+            ["hello"], "en-us", msg))
+        self.assertIsNone(self.intent_service.common_qa.match(
+            ["what is the speed of light"], "en-us", msg))
+        self.assertIsNone(self.intent_service.fallback.low_prio(
+            ["hello"], "en-us", msg))
+        self.assertEqual(self._emitted(), [])
+
+    def test_get_intent_is_dry_run(self):
+        msg = Message("intent.service.intent.get",
+                      {"utterance": "stop", "lang": "en-us"},
+                      {"session": self.sess.serialize()})
+        self.intent_service.handle_get_intent(msg)
+        # no stop ping, mycroft.stop or skill stop request
+        self.assertEqual(self._emitted(), [])
+        self.assertNotIn("dry_run", msg.context)
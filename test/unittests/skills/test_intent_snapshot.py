@@ -0,0 +1,157 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_core.intent_services import IntentService
+from ovos_core.intent_services.snapshot import IntentSnapshot
+from ovos_workshop.intents import IntentBuilder
+
+
+def vocab_msg(keyword, value):
+    return Message('register_vocab',
+                   {'entity_value': value, 'entity_type': keyword},
+                   {"skill_id": "skill"})
+
+
+def intent_msg(name, keyword):
+    intent = IntentBuilder(name).require(keyword)
+    return Message('register_intent', intent.__dict__, {"skill_id": "skill"})
+
+
+def padatious_msg(name, samples):
+    return Message('padatious:register_intent',
+                   {"name": name, "samples": samples, "lang": "en-us"},
+                   {"skill_id": "skill"})
+
+
+class TestIntentSnapshot(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "snapshot.json")
+
+    def test_save_and_load(self):
+        snapshot = IntentSnapshot(self.path)
+        key = snapshot.record(intent_msg("skill:testIntent", "testKeyword"))
+        self.assertIsNone(snapshot.record(Message("register_vocab", {})))
+        snapshot.save()
+
+        loaded = IntentSnapshot(self.path)
+        loaded.load()
+        restored = loaded.restorable()
+        self.assertEqual(list(restored), ["skill"])
+        self.assertEqual(restored["skill"][key].data["name"], "skill:testIntent")
+        self.assertEqual(restored["skill"][key].context["skill_id"], "skill")
+
+    def test_resource_file_changed(self):
+        intent_file = os.path.join(self.tmp, "hello.intent")
+        with open(intent_file, "w") as f:
+            f.write("hello world")
+        snapshot = IntentSnapshot(self.path)
+        snapshot.record(Message('padatious:register_intent',
+                                {"name": "skill:hello.intent",
+                                 "file_name": intent_file},
+                                {"skill_id": "skill"}))
+        self.assertEqual(len(snapshot.restorable()["skill"]), 1)
+        with open(intent_file, "w") as f:
+            f.write("hello there")
+        self.assertEqual(snapshot.restorable(), {})
+        self.assertEqual(snapshot.skills["skill"], {})
+
+    def test_forget(self):
+        snapshot = IntentSnapshot(self.path)
+        snapshot.record(intent_msg("skill:testIntent", "testKeyword"))
+        snapshot.record(vocab_msg("testKeyword", "test"))
+        snapshot.forget_intent("skill:testIntent")
+        self.assertEqual(len(snapshot.skills["skill"]), 1)
+        snapshot.forget_skill("skill")
+        self.assertEqual(snapshot.skills, {})
+
+
+class TestWarmStart(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "snapshot.json")
+        # a previous run registering an adapt and a padacioso intent
+        service = self.get_intent_service()
+        service.handle_register_vocab(vocab_msg("testKeyword", "test"))
+        service.handle_register_intent(intent_msg("skill:testIntent", "testKeyword"))
+        msg = padatious_msg("skill:hello.intent", ["hello world"])
+        service.padacioso_service.register_intent(msg)
+        service.handle_padatious_registration(msg)
+        service.shutdown()
+
+    def get_intent_service(self):
+        service = IntentService(mock.Mock())
+        service.snapshot = IntentSnapshot(self.path)
+        return service
+
+    def restore(self):
+        service = self.get_intent_service()
+        service.restore_snapshot()
+        return service
+
+    def adapt_parsers(self, service):
+        return [p.name for p in service.adapt_service.engines["en-us"].intent_parsers]
+
+    def test_restore(self):
+        service = self.restore()
+        match = service.adapt_service.match_intent(["test"], "en-us", Message(""))
+        self.assertEqual(match.intent_type, "skill:testIntent")
+        match = service.padacioso_service.match_high(["hello world"], "en-us")
+        self.assertEqual(match.intent_type, "skill:hello.intent")
+
+    def test_reconcile(self):
+        service = self.restore()
+        # identical registrations are not applied twice
+        service.handle_register_vocab(vocab_msg("testKeyword", "test"))
+        service.handle_register_intent(intent_msg("skill:testIntent", "testKeyword"))
+        self.assertEqual(self.adapt_parsers(service), ["skill:testIntent"])
+        # a changed intent replaces the restored one
+        msg = padatious_msg("skill:hello.intent", ["hello there"])
+        service.padacioso_service.register_intent(msg)
+        service.handle_padatious_registration(msg)
+        self.assertEqual(service.padacioso_service.registered_intents,
+                         ["skill:hello.intent"])
+        self.assertIsNone(service.padacioso_service.match_high(["hello world"], "en-us"))
+        # only the replaced registration is left to drop from the snapshot
+        self.assertEqual([m.data["samples"] for m in service._restored.values()],
+                         [["hello world"]])
+
+    def test_reregistered_entity(self):
+        service = self.get_intent_service()
+        padacioso = service.padacioso_service
+        msg = Message('padatious:register_entity',
+                      {"name": "skill:name.entity", "samples": ["joe"], "lang": "en-us"},
+                      {"skill_id": "skill"})
+        padacioso.register_restored(msg)
+        padacioso.register_entity(Message(msg.msg_type, dict(msg.data, samples=["jane"]),
+                                          msg.context))
+        self.assertEqual([e["samples"] for e in padacioso.registered_entities],
+                         [["jane"]])
+        self.assertEqual(padacioso.restored_entities, set())
+
+    def test_drop_stale(self):
+        service = self.restore()
+        service.drop_restored()
+        self.assertEqual(self.adapt_parsers(service), [])
+        self.assertEqual(service.padacioso_service.registered_intents, [])
+        self.assertEqual(service.snapshot.skills, {})
+
+    def test_changed_vocab(self):
+        service = self.restore()
+        # the skill now registers another value for the same keyword
+        service.handle_register_vocab(vocab_msg("testKeyword", "exam"))
+        service.handle_register_intent(intent_msg("skill:testIntent", "testKeyword"))
+        self.assertIsNone(service.adapt_service.match_intent(["test"], "en-us", Message("")))
+        match = service.adapt_service.match_intent(["exam"], "en-us", Message(""))
+        self.assertEqual(match.intent_type, "skill:testIntent")
+        values = [e["data"].get("entity_value") for e in service.snapshot.skills["skill"].values()
+                  if e["msg_type"] == "register_vocab"]
+        self.assertEqual(values, ["exam"])
+
+    def test_drop_stale_vocab(self):
+        service = self.restore()
+        trie = service.adapt_service.engines["en-us"].trie
+        self.assertTrue(list(trie.lookup("test")))
+        service.drop_restored()
+        self.assertEqual(list(trie.lookup("test")), [])
@@ -0,0 +1,60 @@
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_core.intent_services import IntentService
+from ovos_core.intent_services.stats import LatencyHistogram, PipelineStats
+
+
+class TestLatencyHistogram(TestCase):
+    def test_percentiles(self):
+        hist = LatencyHistogram()
+        for i in range(1, 101):
+            hist.record(i / 1000)
+        self.assertEqual(hist.count, 100)
+        self.assertAlmostEqual(hist.mean, 0.0505)
+        # buckets are 5% wide
+        self.assertAlmostEqual(hist.percentile(50), 0.05, delta=0.05 * 0.05)
+        self.assertAlmostEqual(hist.percentile(99), 0.099, delta=0.099 * 0.05)
+        self.assertEqual(hist.percentile(100), 0.1)
+
+    def test_bounded(self):
+        hist = LatencyHistogram(max_value=1.0)
+        n_buckets = len(hist._counts)
+        hist.record(0)
+        hist.record(500)
+        self.assertEqual(len(hist._counts), n_buckets)
+        self.assertEqual(hist.percentile(100), 500)
+        self.assertEqual(hist.percentile(1), 0)
+
+    def test_empty(self):
+        hist = LatencyHistogram()
+        self.assertIsNone(hist.percentile(50))
+        self.assertEqual(hist.serialize()["count"], 0)
+
+
+class TestPipelineStats(TestCase):
+    def test_record(self):
+        stats = PipelineStats()
+        stats.record("adapt", 0.01, "matched")
+        stats.record("adapt", 0.02, "unmatched")
+        stats.record("converse", 0.5, "unmatched")
+        data = stats.serialize()
+        self.assertEqual(set(data), {"adapt", "converse"})
+        self.assertEqual(set(data["adapt"]), {"matched", "unmatched"})
+        self.assertEqual(data["converse"]["unmatched"]["count"], 1)
+
+    def test_intent_service_stats(self):
+        intent_service = IntentService(mock.Mock())
+        intent_service.converse.converse_with_skills = mock.Mock(return_value=None)
+        intent_service.invalidate_pipeline_plans()
+        msg = Message("recognizer_loop:utterance",
+                      {"utterances": ["hello world"]},
+                      {"session": {"session_id": "stats-test",
+                                   "pipeline": ["converse"]}})
+        _, context, _ = intent_service.handle_utterance(msg)
+        self.assertIn("converse", context["pipeline_timings"]["stages"])
+
+        intent_service.handle_get_stats(Message("intent.service.stats.get"))
+        reply = intent_service.bus.emit.call_args[0][0]
+        self.assertEqual(reply.msg_type, "intent.service.stats.reply")
+        self.assertEqual(reply.data["stats"]["converse"]["unmatched"]["count"], 1)
@@ -0,0 +1,86 @@
+import time
+from threading import Thread
+from unittest import TestCase
+
+from ovos_bus_client.message import Message
+from ovos_core.intent_services.scatter_gather import ScatterGather, CORRELATION_KEY
+from ovos_utils.messagebus import FakeBus
+
+
+class TestScatterGather(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+
+    def answer(self, skill_id, delay=0.0, **data):
+        def handler(message):
+            def reply():
+                time.sleep(delay)
+                self.bus.emit(message.reply("test.pong", dict(data, skill_id=skill_id)))
+            if delay:
+                Thread(target=reply, daemon=True).start()
+            else:
+                reply()
+
+        self.bus.on("test.ping", handler)
+
+    def test_all_replied(self):
+        self.answer("a")
+        self.answer("b", delay=0.05)
+        gather = ScatterGather(self.bus, "test.pong", expected=["a", "b"], timeout=5)
+        start = time.monotonic()
+        replies = gather.gather(Message("test.ping"))
+        # the wait ends with the last expected reply, not at the deadline
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(gather.done)
+        self.assertEqual(list(replies), ["a", "b"])
+        self.assertEqual(len(self.bus.ee.listeners("test.pong")), 0)
+
+    def test_deadline(self):
+        self.answer("a")
+        gather = ScatterGather(self.bus, "test.pong", expected=["a", "b"], timeout=0.1)
+        replies = gather.gather(Message("test.ping"))
+        self.assertFalse(gather.done)
+        self.assertEqual(list(replies), ["a"])
+        self.assertEqual(gather.pending, {"b"})
+
+    def test_nothing_expected(self):
+        gather = ScatterGather(self.bus, "test.pong", expected=[], timeout=5)
+        start = time.monotonic()
+        self.assertEqual(gather.gather(Message("test.ping")), {})
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_correlation(self):
+        gather = ScatterGather(self.bus, "test.pong", expected=["a"], timeout=0.1)
+        other = ScatterGather(self.bus, "test.pong", expected=["a"], timeout=0.1)
+        gather.handle_reply(other.tag(Message("test.pong", {"skill_id": "a"})))
+        self.assertFalse(gather.done)
+        # replies without a correlation id are accepted
+        gather.handle_reply(Message("test.pong", {"skill_id": "a"}))
+        self.assertTrue(gather.done)
+        msg = gather.tag(Message("test.ping"))
+        self.assertEqual(msg.reply("test.pong").context[CORRELATION_KEY], gather.gather_id)
+
+    def test_source_context(self):
+        self.answer("a")
+        utterance = Message("recognizer_loop:utterance", context={"session": {}})
+        gather = ScatterGather(self.bus, "test.pong", expected=["a"], timeout=5)
+        gather.gather(utterance.forward("test.ping"))
+        self.assertTrue(gather.done)
+        # the correlation id does not leak into the utterance
+        self.assertEqual(utterance.context, {"session": {}})
+
+    def test_on_reply(self):
+        self.answer("a", searching=True)
+        self.answer("a", delay=0.05)
+
+        def on_reply(message):
+            if message.data.get("searching"):
+                gather.set_deadline(5)
+                return False
+            return True
+
+        gather = ScatterGather(self.bus, "test.pong", expected=["a"], timeout=0.01,
+                               on_reply=on_reply)
+        replies = gather.gather(Message("test.ping"))
+        self.assertTrue(gather.done)
+        self.assertNotIn("searching", replies["a"].data)
@@ -0,0 +1,86 @@
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_core.intent_services.capabilities import SkillCapabilities
+from ovos_core.intent_services.converse_service import ConverseService
+from ovos_core.intent_services.fallback_service import FallbackService, FallbackRange
+from ovos_core.intent_services.stop_service import StopService
+from ovos_utils.messagebus import FakeBus
+
+
+def update_msg(skill_id, **capabilities):
+    return Message("ovos.skills.capabilities.update",
+                   dict(capabilities, skill_id=skill_id))
+
+
+class TestSkillCapabilities(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.capabilities = SkillCapabilities(self.bus)
+
+    def test_update(self):
+        self.bus.emit(update_msg("a", converse=True, stop=False))
+        self.bus.emit(update_msg("a", stop=True, unknown=True))
+        self.assertEqual(self.capabilities.serialize(),
+                         {"a": {"converse": True, "stop": True}})
+        self.assertIsNone(self.capabilities.get("a", "fallback"))
+
+    def test_partition(self):
+        self.capabilities.update("a", stop=True)
+        self.capabilities.update("b", stop=False)
+        self.assertEqual(self.capabilities.partition(["c", "b", "a"], "stop"),
+                         (["a"], ["c"]))
+
+    def test_clear(self):
+        self.bus.emit(update_msg("a", stop=True))
+        self.bus.emit(Message("detach_skill", {"skill_id": "a:"}))
+        self.assertEqual(self.capabilities.serialize(), {})
+
+    def test_get(self):
+        self.bus.emit(update_msg("a", fallback=True))
+        reply = self.bus.wait_for_response(Message("ovos.skills.capabilities.get"),
+                                           "ovos.skills.capabilities.reply")
+        self.assertEqual(reply.data["skills"], {"a": {"fallback": True}})
+
+
+class TestAdvertisedSkillsNotPinged(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.capabilities = SkillCapabilities(self.bus)
+        self.pings = []
+        self.bus.on("message", lambda m: self.pings.append(Message.deserialize(m).msg_type)
+                    if ".ping" in m else None)
+        sess = Session("caps")
+        sess.activate_skill("b")
+        sess.activate_skill("a")
+        self.message = Message("test", context={"session": sess.serialize()})
+
+    def test_stop(self):
+        stop = StopService(self.bus, self.capabilities)
+        self.capabilities.update("a", stop=True)
+        self.capabilities.update("b", stop=False)
+        self.assertEqual(stop._collect_stop_skills(self.message), ["a"])
+        self.assertEqual(self.pings, [])
+
+    def test_converse(self):
+        converse = ConverseService(self.bus, self.capabilities)
+        self.capabilities.update("a", converse=True)
+        self.capabilities.update("b", converse=False)
+        with mock.patch.object(converse, "get_active_skills", return_value=["a", "b"]):
+            self.assertEqual(converse._collect_converse_skills(self.message), ["a"])
+        self.assertEqual(self.pings, [])
+
+    def test_fallback(self):
+        fallback = FallbackService(self.bus, self.capabilities)
+        fallback.registered_fallbacks = {"a": 50, "b": 50}
+        self.capabilities.update("a", fallback=True)
+        self.capabilities.update("b", fallback=False)
+        self.assertEqual(fallback._collect_fallback_skills(self.message,
+                                                           FallbackRange(5, 90)), ["a"])
+        self.assertEqual(self.pings, [])
+        # unknown skills are still pinged
+        fallback.registered_fallbacks["c"] = 95
+        self.assertEqual(fallback._collect_fallback_skills(self.message,
+                                                           FallbackRange(90, 100)), [])
+        self.assertEqual(self.pings, ["ovos.skills.fallback.ping"])
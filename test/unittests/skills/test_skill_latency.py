@@ -0,0 +1,96 @@
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_core.intent_services import IntentService
+from ovos_core.intent_services.capabilities import SkillCapabilities
+from ovos_core.intent_services.fallback_service import FallbackService, FallbackRange
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
+from ovos_utils.messagebus import FakeBus
+
+
+class TestSkillLatencyTracker(TestCase):
+    def test_default_deadline(self):
+        tracker = SkillLatencyTracker()
+        for _ in range(10):
+            tracker.record("a", "stop", 0.01)
+        # tracked but not adapted unless enabled
+        self.assertEqual(tracker.deadline("a", "stop", 3.0), 3.0)
+        self.assertEqual(tracker.serialize()["a"]["stop"]["count"], 10)
+
+    def test_adaptive_deadline(self):
+        tracker = SkillLatencyTracker({"enabled": True, "min_samples": 3,
+                                       "multiplier": 2, "min_deadline": 0.05,
+                                       "max_deadline": 1})
+        tracker.record("a", "stop", 0.1)
+        self.assertEqual(tracker.deadline("a", "stop", 3.0), 3.0)
+        tracker.record("a", "stop", 0.1)
+        tracker.record("a", "stop", 0.1)
+        self.assertAlmostEqual(tracker.deadline("a", "stop", 3.0), 0.2, places=2)
+        for _ in range(5):
+            tracker.record("b", "stop", 5)
+        self.assertEqual(tracker.deadline("b", "stop", 3.0), 1)
+        for _ in range(5):
+            tracker.record("c", "stop", 0.001)
+        self.assertEqual(tracker.deadline("c", "stop", 3.0), 0.05)
+        # other request types are tracked separately
+        self.assertEqual(tracker.deadline("a", "converse", 3.0), 3.0)
+
+    def test_circuit_breaker(self):
+        tracker = SkillLatencyTracker({"enabled": True, "failure_threshold": 2,
+                                       "cooldown": 60})
+        tracker.record("a", "fallback", 3, timed_out=True)
+        self.assertEqual(tracker.available(["a", "b"], "fallback"), ["a", "b"])
+        tracker.record("a", "fallback", 3, timed_out=True)
+        self.assertEqual(tracker.available(["a", "b"], "fallback"), ["b"])
+        self.assertTrue(tracker.is_available("a", "converse"))
+        self.assertTrue(tracker.serialize()["a"]["fallback"]["open"])
+        # after the cooldown an answer closes the breaker
+        tracker._skills["a"]["fallback"].open_until = 0
+        tracker.record("a", "fallback", 0.1)
+        self.assertFalse(tracker.serialize()["a"]["fallback"]["open"])
+        self.assertEqual(tracker.serialize()["a"]["fallback"]["consecutive_timeouts"], 0)
+
+    def test_wait_for_response(self):
+        tracker = SkillLatencyTracker({"enabled": True, "failure_threshold": 1})
+        bus = mock.Mock()
+        bus.wait_for_response.return_value = None
+        tracker.wait_for_response(bus, Message("a.stop"), "a.stop.response", "a", "stop")
+        self.assertEqual(bus.wait_for_response.call_args[1]["timeout"], 3.0)
+        self.assertFalse(tracker.is_available("a", "stop"))
+
+
+class TestSlowSkills(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.tracker = SkillLatencyTracker({"enabled": True, "failure_threshold": 2})
+        self.fallback = FallbackService(self.bus, skill_latency=self.tracker)
+        self.fallback.fallback_config = {"ping_timeout": 0.05}
+        self.fallback.registered_fallbacks = {"silent": 50}
+        self.message = Message("test", context={"session": Session("slow").serialize()})
+
+    def test_ping_timeouts_open_breaker(self):
+        for _ in range(2):
+            self.assertEqual(self.fallback._collect_fallback_skills(
+                self.message, FallbackRange(5, 90)), [])
+        self.assertEqual(self.tracker.serialize()["silent"]["fallback.ping"]["timeouts"], 2)
+        self.assertEqual(self.tracker.available(["silent"], "fallback.ping"), [])
+
+    def test_breaker_skips_advertised_skills(self):
+        self.fallback.capabilities = SkillCapabilities(self.bus)
+        self.fallback.capabilities.update("silent", fallback=True)
+        self.assertEqual(self.fallback._collect_fallback_skills(
+            self.message, FallbackRange(5, 90)), ["silent"])
+        for _ in range(2):
+            self.tracker.record("silent", "fallback.ping", 0.05, timed_out=True)
+        self.assertEqual(self.fallback._collect_fallback_skills(
+            self.message, FallbackRange(5, 90)), [])
+
+    def test_stats_reply(self):
+        intent_service = IntentService(mock.Mock())
+        intent_service.skill_latency.record("a", "converse", 0.1)
+        intent_service.handle_get_stats(Message("intent.service.stats.get"))
+        reply = intent_service.bus.emit.call_args[0][0]
+        self.assertEqual(reply.data["skills"]["a"]["converse"]["count"], 1)
+        intent_service.handle_detach_skill(Message("detach_skill", {"skill_id": "a:"}))
+        self.assertEqual(intent_service.skill_latency.serialize(), {})
@@ -0,0 +1,61 @@
+import time
+from unittest import TestCase
+
+from ovos_bus_client.message import Message
+from ovos_core.intent_services.config_snapshot import ConfigSnapshot
+from ovos_core.intent_services.skill_latency import SkillLatencyTracker
+from ovos_core.intent_services.stats import PipelineStats
+from ovos_core.intent_services.stop_service import StopService
+from ovos_utils.messagebus import FakeBus
+
+
+class StoppableSkill:
+    def __init__(self, bus, skill_id, stops=True, answers=True):
+        self.bus = bus
+        self.skill_id = skill_id
+        self.stops = stops
+        self.answers = answers
+        self.stopped = False
+        self.bus.on(f"{skill_id}.stop", self.handle_stop)
+
+    def handle_stop(self, message):
+        self.stopped = self.stops
+        if self.answers:
+            self.bus.emit(message.reply(f"{self.skill_id}.stop.response",
+                                        {"result": self.stops},
+                                        {"skill_id": self.skill_id}))
+
+
+class TestParallelStop(TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.stats = PipelineStats()
+        self.stop = StopService(self.bus, skill_latency=SkillLatencyTracker(),
+                                stats=self.stats, config_snapshot=ConfigSnapshot(
+                                    config={"skills": {"stop": {"parallel": True}}}))
+
+    def test_first_confirmed_in_activation_order(self):
+        skills = [StoppableSkill(self.bus, "a", stops=False),
+                  StoppableSkill(self.bus, "b"),
+                  StoppableSkill(self.bus, "c")]
+        self.assertEqual(self.stop._stop_skills(["a", "b", "c"], Message("stop")), "b")
+        # every candidate was told to stop at once
+        self.assertEqual([s.stopped for s in skills], [False, True, True])
+        stats = self.stats.serialize()["stop_dispatch"]
+        self.assertEqual(list(stats), ["stopped"])
+        self.assertEqual(self.bus.ee.listeners("b.stop.response"), [])
+
+    def test_silent_skill_after_winner(self):
+        StoppableSkill(self.bus, "a")
+        StoppableSkill(self.bus, "b", answers=False)
+        start = time.monotonic()
+        self.assertEqual(self.stop._stop_skills(["a", "b"], Message("stop")), "a")
+        self.assertLess(time.monotonic() - start, 1)
+        # not a timeout, the wait ended before its answer mattered
+        self.assertEqual(self.stop.skill_latency.serialize()["a"]["stop"]["count"], 1)
+        self.assertNotIn("b", self.stop.skill_latency.serialize())
+
+    def test_none_stopped(self):
+        StoppableSkill(self.bus, "a", stops=False)
+        self.assertIsNone(self.stop._stop_skills(["a"], Message("stop")))
+        self.assertEqual(list(self.stats.serialize()["stop_dispatch"]), ["unhandled"])
@@ -0,0 +1,48 @@
+import pickle
+from unittest import TestCase, mock
+
+from ovos_bus_client.message import Message
+from ovos_core.intent_services import IntentService
+from ovos_core.intent_services.analysis import UtteranceAnalysis
+from ovos_utils import flatten_list
+
+
+class TestUtteranceAnalysis(TestCase):
+    def test_analysis(self):
+        analysis = UtteranceAnalysis([("Hello World", "hello world"),
+                                      ("Hello World",)], "EN-US")
+        self.assertEqual(analysis, ("Hello World", "hello world"))
+        self.assertEqual(analysis.lowercase, ("hello world", "hello world"))
+        self.assertEqual(analysis.tokens, (("Hello", "World"), ("hello", "world")))
+        self.assertEqual(analysis.word_counts, (2, 2))
+        self.assertEqual(analysis.lang, "en-us")
+        self.assertEqual(analysis.lang2, "en")
+        self.assertEqual(analysis.within_word_limit(2), ())
+
+    def test_immutable(self):
+        analysis = UtteranceAnalysis(["hello"])
+        with self.assertRaises(AttributeError):
+            analysis.lang = "en-us"
+        with self.assertRaises(AttributeError):
+            del analysis.tokens
+        self.assertEqual(pickle.loads(pickle.dumps(analysis)).word_counts, (1,))
+
+    def test_compat(self):
+        analysis = UtteranceAnalysis(["hello world"])
+        # matchers unaware of the analysis still see a list of utterances
+        self.assertIs(flatten_list(analysis), analysis)
+        self.assertEqual(analysis[0], "hello world")
+        self.assertIs(UtteranceAnalysis.from_utterances(analysis), analysis)
+
+    def test_shared_by_matchers(self):
+        intent_service = IntentService(mock.Mock())
+        matcher = intent_service.converse.converse_with_skills = \
+            mock.Mock(return_value=None)
+        msg = Message("recognizer_loop:utterance",
+                      {"utterances": ["hello world"], "lang": "en-us"},
+                      {"session": {"session_id": "analysis",
+                                   "pipeline": ["converse"]}})
+        intent_service.handle_utterance(msg)
+        utterances = matcher.call_args[0][0]
+        self.assertIsInstance(utterances, UtteranceAnalysis)
+        self.assertEqual(utterances.tokens, (("hello", "world"),))
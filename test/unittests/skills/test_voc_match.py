@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from ovos_core.intent_services.voc_match import VocMatcher, clear_voc_matchers, get_voc_matcher
+from test.benchmark.voc_match import legacy_match, run_benchmark
+
+
+class TestVocMatcher(TestCase):
+    def setUp(self):
+        clear_voc_matchers()
+
+    def test_match(self):
+        vocab = ["turn off", "switch (off|down)", "stop"]
+        matcher = VocMatcher(vocab)
+        for utt, expected in [("turn off the lights", True),
+                              ("would you switch down the tv", True),
+                              ("return office", False),
+                              ("stopping", False),
+                              ("", False)]:
+            self.assertEqual(matcher.match(utt), expected, utt)
+            self.assertEqual(legacy_match(utt, vocab), expected, utt)
+
+    def test_exact(self):
+        matcher = VocMatcher(["stop ", "stop that"])
+        self.assertTrue(matcher.match("stop", exact=True))
+        self.assertTrue(matcher.match("stop that", exact=True))
+        self.assertFalse(matcher.match("please stop that", exact=True))
+        self.assertFalse(VocMatcher([]).match("stop"))
+
+    def test_invalid_regex(self):
+        matcher = VocMatcher(["what (is", "stop"])
+        self.assertTrue(matcher.match("so what (is it"))
+        self.assertTrue(matcher.match("stop"))
+
+    def test_shared(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            return ["stop"]
+
+        matcher = get_voc_matcher("en", "stop", load)
+        self.assertIs(get_voc_matcher("en", "stop", load), matcher)
+        self.assertIsNot(get_voc_matcher("de", "stop", load), matcher)
+        self.assertEqual(len(loads), 2)
+
+    def test_sources(self):
+        stop = get_voc_matcher("en", "stop", lambda: ["stop"], source="a")
+        halt = get_voc_matcher("en", "stop", lambda: ["halt"], source="b")
+        self.assertTrue(stop.match("stop"))
+        self.assertFalse(halt.match("stop"))
+        self.assertTrue(halt.match("halt"))
+
+        # clearing one source keeps the other compiled
+        clear_voc_matchers("a")
+        self.assertIsNot(get_voc_matcher("en", "stop", source="a"), stop)
+        self.assertIs(get_voc_matcher("en", "stop", source="b"), halt)
+
+    def test_benchmark(self):
+        results = run_benchmark(iterations=1)
+        self.assertIn("en.stop.contains", results["vocabularies"])